@@ -0,0 +1,55 @@
+# benchmarks/bench_implied_volatility.py
+# Run with: python -m benchmarks.bench_implied_volatility
+import time
+
+import numpy as np
+from scipy.optimize import brentq
+
+from features.implied_volatility import black_scholes_price, implied_volatility
+
+
+def make_chain(n_contracts, seed=0):
+    rng = np.random.default_rng(seed)
+    S = 100.0
+    K = rng.uniform(60, 140, n_contracts)
+    T = rng.uniform(7, 365, n_contracts) / 365
+    sigma = rng.uniform(0.1, 1.0, n_contracts)
+    is_call = rng.random(n_contracts) < 0.5
+    price = black_scholes_price(S, K, T, 0.05, sigma, is_call)
+    intrinsic = np.where(is_call, np.maximum(S - K * np.exp(-0.05 * T), 0), np.maximum(K * np.exp(-0.05 * T) - S, 0))
+    # Quotes trade in cents, less than that in time value carries no volatility information.
+    keep = price - intrinsic >= 0.01
+    return price[keep], S, K[keep], T[keep], sigma[keep], is_call[keep]
+
+
+def bench_vectorized(n_contracts, repeats=5):
+    price, S, K, T, sigma, is_call = make_chain(n_contracts)
+    best = np.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        iv, converged = implied_volatility(price, S, K, T, 0.05, is_call, full_output=True)
+        best = min(best, time.perf_counter() - start)
+    max_error = np.nanmax(np.abs(iv - sigma))
+    return len(price), best, converged.mean(), max_error
+
+
+def bench_scalar_brentq(n_contracts):
+    price, S, K, T, _, is_call = make_chain(n_contracts)
+    start = time.perf_counter()
+    for i in range(len(price)):
+        objective = lambda vol: black_scholes_price(S, K[i], T[i], 0.05, vol, is_call[i]) - price[i]
+        brentq(objective, 1e-4, 5.0, xtol=1e-8)
+    return len(price), time.perf_counter() - start
+
+
+def main():
+    print(f"{'solver':<18}{'contracts':>10}{'seconds':>10}{'contracts/s':>14}{'converged':>11}{'max |err|':>12}")
+    n, seconds = bench_scalar_brentq(2_000)
+    print(f"{'scipy brentq':<18}{n:>10}{seconds:>10.3f}{n / seconds:>14,.0f}{'':>11}{'':>12}")
+    for n_contracts in [1_000, 10_000, 100_000, 1_000_000]:
+        n, seconds, converged, max_error = bench_vectorized(n_contracts)
+        print(f"{'vectorized':<18}{n:>10}{seconds:>10.3f}{n / seconds:>14,.0f}{converged:>11.2%}{max_error:>12.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/bench_neural_network.py
+# Run with: python -m benchmarks.bench_neural_network
+import time
+
+import numpy as np
+import tensorflow as tf
+from sklearn.datasets import make_classification
+from sklearn.metrics import roc_auc_score
+
+from models.neural_network_model import KerasBinaryClassifier
+
+
+def make_data(n_samples, n_features=20, seed=0):
+    X, y = make_classification(n_samples=n_samples, n_features=n_features, n_informative=10, random_state=seed)
+    return X.astype(np.float32), y
+
+
+def bench_training(X, y, X_test, y_test, **params):
+    start = time.perf_counter()
+    estimator = KerasBinaryClassifier(random_state=0, **params).fit(X, y)
+    seconds = time.perf_counter() - start
+    auc = roc_auc_score(y_test, estimator.predict_proba(X_test)[:, 1])
+    return estimator, seconds, estimator.best_epoch_, len(estimator.history_['loss']), auc
+
+
+def latency(function, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return np.percentile(times, 50) * 1000, np.percentile(times, 99) * 1000
+
+
+def main():
+    tf.keras.utils.set_random_seed(0)
+    X, y = make_data(60_000)
+    X_train, y_train, X_test, y_test = X[:50_000], y[:50_000], X[50_000:], y[50_000:]
+
+    print(f"{'training':<36}{'seconds':>10}{'s/epoch':>10}{'best epoch':>12}{'epochs run':>12}{'test AUC':>10}")
+    runs = {
+        'numpy batches of 32, 20 epochs': dict(epochs=20, batch_size=32),
+        'tf.data 1024, early stopping': dict(epochs=200, batch_size=1024, patience=10, learning_rate=0.002),
+    }
+    for name, params in runs.items():
+        estimator, seconds, best_epoch, epochs_run, auc = bench_training(X_train, y_train, X_test, y_test, **params)
+        print(f"{name:<36}{seconds:>10.1f}{seconds / epochs_run:>10.2f}{best_epoch:>12}{epochs_run:>12}{auc:>10.4f}")
+
+    single, bulk = X_test[:1], np.repeat(X_test, 10, axis=0)
+    estimator.predict_proba(single)
+    print(f"\n{'inference':<36}{'rows':>10}{'p50 ms':>12}{'p99 ms':>12}")
+    for rows, name, function in [
+        (1, 'keras model.predict', lambda: estimator.model_.predict(single, verbose=0)),
+        (1, 'compiled tf.function', lambda: estimator.predict_proba(single)),
+        (len(bulk), 'keras model.predict', lambda: estimator.model_.predict(bulk, verbose=0)),
+        (len(bulk), 'compiled tf.function', lambda: estimator.predict_proba(bulk)),
+    ]:
+        p50, p99 = latency(function, 200 if rows == 1 else 10)
+        print(f"{name:<36}{rows:>10}{p50:>12.2f}{p99:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
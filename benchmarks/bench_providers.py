@@ -0,0 +1,48 @@
+# benchmarks/bench_providers.py
+# Run with: python -m benchmarks.bench_providers [--tickers 5000] [--bars 2758]
+import argparse
+import contextlib
+import io
+import time
+from datetime import datetime
+
+from data.simulated_data_fetcher import SimulatedDataFetcher, SimulatedMarket, trading_hours
+
+
+def bench_generate(tickers, index, model, block_size):
+    market = SimulatedMarket(index, datetime.now(), model=model)
+    start = time.perf_counter()
+    for position in range(0, len(tickers), block_size):
+        market.generate(tuple(tickers[position:position + block_size]))
+    return len(tickers) / (time.perf_counter() - start)
+
+
+def bench_fetch(tickers, n_bars, model, block_size):
+    expirations = {'mode': 'all', 'option_types': ['calls', 'puts']}
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for ticker in tickers:
+            SimulatedDataFetcher(ticker, None, None, expirations=expirations, model=model, n_bars=n_bars,
+                                 block_size=block_size, universe=tickers).fetch_data()
+    return len(tickers) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tickers per second of the simulated data provider.")
+    parser.add_argument('--tickers', type=int, default=5000)
+    parser.add_argument('--bars', type=int, default=2758, help="Hourly bars per ticker (2758 is 2023-01-01..2024-07-05)")
+    parser.add_argument('--block-size', type=int, default=256)
+    args = parser.parse_args()
+
+    tickers = [f"SYN{i:05d}" for i in range(args.tickers)]
+    index = trading_hours(None, datetime.now().strftime('%Y-%m-%d'), args.bars)
+    print(f"{args.tickers} tickers x {args.bars} bars x 8 expirations x 40 strikes x 2 types")
+    print(f"{'model':<8}{'generate':>14}{'fetch_data':>14}   (tickers/s)")
+    for model in ('gbm', 'heston'):
+        generate = bench_generate(tickers, index, model, args.block_size)
+        fetch = bench_fetch(tickers, args.bars, model, args.block_size)
+        print(f"{model:<8}{generate:>14.0f}{fetch:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/bench_startup.py
+# Run with: python -m benchmarks.bench_startup [--repeats N] [--output startup.json]
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Backends that should only load when a run actually needs them.
+HEAVY_MODULES = ['tensorflow', 'matplotlib', 'seaborn', 'plotly', 'scipy.signal', 'sklearn']
+
+SCENARIOS = {
+    'data pipeline': 'import data.data_pipeline',
+    'model factory': 'import models.model_factory',
+    'results manager': 'import utils.results_manager',
+    'main': 'import main',
+    'random forest': "from models.model_factory import ModelFactory; "
+                     "ModelFactory.create_model('RandomForestClassifier', None, None, {})",
+    'neural network': "from models.model_factory import ModelFactory; "
+                      "ModelFactory.create_model('NeuralNetworkModel', None, None, {})",
+}
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                  'loaded': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def measure(statement, repeats):
+    # A fresh interpreter per run, so nothing is already imported.
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+                                cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'seconds': statistics.median(run['seconds'] for run in runs),
+        'max_rss_mb': statistics.median(run['max_rss_mb'] for run in runs),
+        'loaded': runs[-1]['loaded'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and memory of the entry points in fresh interpreters.")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', help="Also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'scenario':<18}{'seconds':>10}{'max RSS MB':>12}  heavy modules loaded")
+    for name, statement in SCENARIOS.items():
+        results[name] = measure(statement, args.repeats)
+        result = results[name]
+        print(f"{name:<18}{result['seconds']:>10.3f}{result['max_rss_mb']:>12.0f}  {', '.join(result['loaded']) or '-'}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+# benchmarks/run_benchmarks.py
+# Run with: python -m benchmarks.run_benchmarks [--scale small|medium|large] [--save-baseline]
+import argparse
+import contextlib
+import io
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+from data.data_pipeline import DataPipeline
+from data.provider_factory import ProviderFactory
+from features.feature_factory import FeatureFactory
+from features.panel import Panel, PanelFeatureEngine
+from models.model_factory import ModelFactory
+from utils.config_manager import ConfigManager
+from utils.logger import set_log_level
+
+ROOT = Path(__file__).resolve().parents[1]
+BASELINE_DIRECTORY = ROOT / 'benchmarks' / 'baselines'
+
+# tickers x expirations x strikes x hourly bars
+SCALES = {
+    'small': {'tickers': 5, 'expirations': 4, 'strikes': 30, 'bars': 1000},
+    'medium': {'tickers': 20, 'expirations': 8, 'strikes': 50, 'bars': 2000},
+    'large': {'tickers': 100, 'expirations': 12, 'strikes': 80, 'bars': 3500},
+}
+OPTION_TYPES = ['calls', 'puts']
+
+
+def measure(function, repeats, memory=True):
+    """Best wall time over ``repeats`` runs, then one run under tracemalloc for the peak.
+
+    tracemalloc sees Python and NumPy allocations, not TensorFlow's own allocator.
+    """
+    times = []
+    for _ in range(repeats):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+    result = {'seconds': min(times)}
+    if memory:
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                function()
+            result['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def benchmark_config(scale, directory, model='heston'):
+    """The repo config on the simulated provider at ``scale``, with every cache and store off."""
+    with open(ROOT / 'config.yaml') as file:
+        config = yaml.safe_load(file)
+    config['data'].update({'tickers': [f"SYN{i:03d}" for i in range(scale['tickers'])], 'end_date': 'auto'})
+    config['data']['provider'] = {'type': 'simulated', 'simulated': {
+        **config['data']['provider']['simulated'], 'model': model, 'n_expirations': scale['expirations'],
+        'n_strikes': scale['strikes'], 'n_bars': scale['bars']}}
+    config['data']['expirations'].update({'mode': 'all', 'option_types': OPTION_TYPES})
+    config['data']['bulk_download']['enabled'] = False
+    for section in ('cache', 'bar_store', 'feature_store'):
+        config[section]['enabled'] = False
+    config['preprocessing']['artifact_path'] = str(Path(directory) / 'preprocessor.joblib')
+    path = Path(directory) / 'config.yaml'
+    path.write_text(yaml.safe_dump(config))
+    return ConfigManager(str(path))
+
+
+def stages(config, model_names=None):
+    """(name, function) for every benchmarked stage, in dependency order."""
+    pipeline = DataPipeline(config)
+    tickers = config.get_nested('data', 'tickers')
+    start_date, end_date = pipeline.date_range()
+    state = {}
+
+    def fetch():
+        # From a fresh market, so the paths and chains are generated, not just handed out.
+        fetchers = [ProviderFactory.create_fetcher(config, ticker, start_date, end_date, universe=tickers)
+                    for ticker in tickers]
+        fetchers[0].market.clear()
+        state['fetched'] = [fetcher.fetch_data() for fetcher in fetchers]
+
+    def feature_engineer(feature_type):
+        def run():
+            for calls, underlying, expiration in state['fetched']:
+                FeatureFactory.create_feature_engineer(feature_type, calls.copy(), underlying, expiration).engineer_features()
+        return run
+
+    def target_engineer(target_type):
+        params = config.get('target').get('params', {})
+        def run():
+            for calls, underlying, expiration in state['fetched']:
+                FeatureFactory.create_target_engineer(target_type, calls.copy(), underlying,
+                                                      expiration_date=expiration, **params).create_target()
+        return run
+
+    def panel():
+        # Every feature type and the target for all tickers at once, to set against the per-type stages.
+        target = config.get('target')
+        engine = PanelFeatureEngine(pipeline.feature_graph.plan(pipeline.requested_features()), target['type'],
+                                    target.get('params', {}))
+        engine.run(Panel.stack([(ticker, *fetched) for ticker, fetched in zip(tickers, state['fetched'])]))
+
+    def end_to_end():
+        state['combined'] = pipeline.process_data()
+
+    def preprocess():
+        state['X'], state['y'] = pipeline.preprocess_data(state['combined'])
+
+    yield 'provider.fetch', fetch
+    yield from ((f"features.{name}", feature_engineer(name)) for name in FeatureFactory.FEATURE_ENGINEERS.names())
+    yield from ((f"target.{name}", target_engineer(name)) for name in FeatureFactory.TARGET_ENGINEERS.names())
+    yield 'features.panel', panel
+    yield 'pipeline.end_to_end', end_to_end
+    yield 'preprocess_data', preprocess
+
+    n_folds = config.get_nested('cross_validation', 'n_folds', default=5)
+    n_jobs = config.get_nested('cross_validation', 'n_jobs')
+    for model_config in ModelFactory.model_configs(config):
+        name = model_config['name']
+        if model_names and name not in model_names:
+            continue
+
+        def train(model_config=model_config):
+            model = ModelFactory.create_model(model_config['type'], state['X'], state['y'], model_config['params'])
+            model.train()
+            state[model_config['name']] = model
+
+        yield f"model.{name}.train", train
+        yield f"model.{name}.cv", lambda name=name: state[name].cross_validate(cv=n_folds, n_jobs=n_jobs)
+        yield f"model.{name}.predict", lambda name=name: state[name].predict_proba(state['X'])
+
+
+def run(scale, repeats=3, memory=True, model_names=None, stage_filter=None, model='heston'):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        config = benchmark_config(scale, directory, model)
+        for name, function in stages(config, model_names):
+            # Filtered-out stages still run once when later stages depend on their output.
+            if stage_filter and not any(pattern in name for pattern in stage_filter):
+                if name in ('provider.fetch', 'pipeline.end_to_end', 'preprocess_data') or name.endswith('.train'):
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        function()
+                continue
+            results[name] = measure(function, repeats, memory)
+            print(f"  {name:<36}{results[name]['seconds']:>9.3f}s", file=sys.stderr)
+    return {
+        'scale': {**scale, 'model': model},
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': {'python': platform.python_version(), 'machine': platform.machine(),
+                        'processor': platform.processor(), 'pandas': pd.__version__},
+        'stages': results,
+    }
+
+
+def compare(results, baseline, tolerance=0.2, min_delta=0.05):
+    """Stages more than ``tolerance`` (relative) and ``min_delta`` seconds slower than the baseline."""
+    regressions = []
+    for name, result in results['stages'].items():
+        base = baseline['stages'].get(name)
+        if base is None:
+            continue
+        slowdown = result['seconds'] - base['seconds']
+        if slowdown > min_delta and result['seconds'] > base['seconds'] * (1 + tolerance):
+            regressions.append({'stage': name, 'baseline': base['seconds'], 'seconds': result['seconds'],
+                                'change': result['seconds'] / base['seconds'] - 1})
+    return regressions
+
+
+def print_table(results, baseline=None):
+    print(f"{'stage':<36}{'seconds':>10}{'peak MB':>10}{'baseline':>10}{'change':>9}")
+    for name, result in results['stages'].items():
+        base = (baseline or {}).get('stages', {}).get(name)
+        peak = f"{result['peak_mb']:>10.1f}" if 'peak_mb' in result else f"{'':>10}"
+        comparison = (f"{base['seconds']:>10.3f}{result['seconds'] / base['seconds'] - 1:>+9.0%}"
+                      if base else f"{'':>10}{'':>9}")
+        print(f"{name:<36}{result['seconds']:>10.3f}{peak}{comparison}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline stage benchmarks on the simulated data provider.")
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--model', choices=['gbm', 'heston'], default='heston', help="Simulated price process")
+    for dimension in ('tickers', 'expirations', 'strikes', 'bars'):
+        parser.add_argument(f'--{dimension}', type=int, help=f"Override the scale's number of {dimension}")
+    parser.add_argument('--repeats', type=int, default=3, help="Runs per stage; the fastest counts")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc run of each stage")
+    parser.add_argument('--models', nargs='+', help="Configured model names to benchmark (default: all)")
+    parser.add_argument('--stages', nargs='+', help="Only time stages whose name contains one of these")
+    parser.add_argument('--baseline', help="Baseline JSON (default: benchmarks/baselines/<scale>.json)")
+    parser.add_argument('--save-baseline', action='store_true', help="Write these results as the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative slowdown per stage")
+    parser.add_argument('--min-delta', type=float, default=0.05, help="Slowdowns under this many seconds never fail")
+    parser.add_argument('--output', help="Also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    set_log_level(logging.WARNING)
+    scale = {dimension: getattr(args, dimension) or value for dimension, value in SCALES[args.scale].items()}
+    results = run(scale, repeats=args.repeats, memory=not args.no_memory,
+                  model_names=args.models, stage_filter=args.stages, model=args.model)
+
+    baseline_path = Path(args.baseline) if args.baseline else BASELINE_DIRECTORY / f"{args.scale}.json"
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() and not args.save_baseline else None
+    if baseline is not None and baseline['scale'] != results['scale']:
+        print(f"Baseline {baseline_path} was recorded at scale {baseline['scale']}, not {results['scale']}; not comparing")
+        baseline = None
+    print_table(results, baseline)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2))
+        print(f"\nBaseline written to {baseline_path}")
+        return
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance, args.min_delta)
+        for regression in regressions:
+            print(f"REGRESSION {regression['stage']}: {regression['baseline']:.3f}s -> "
+                  f"{regression['seconds']:.3f}s ({regression['change']:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"\nNo stage slower than {args.tolerance:.0%} over {baseline_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,15 @@
+# Core tests for benchmarks
+
+from benchmarks.run_benchmarks import compare, run
+
+
+def test_benchmark_run_times_every_stage_and_gates_regressions():
+    scale = {'tickers': 2, 'expirations': 2, 'strikes': 12, 'bars': 400}
+    results = run(scale, repeats=1, memory=False, model_names=['RandomForest'])
+
+    assert {'provider.fetch', 'features.basic', 'features.technical', 'features.advanced', 'target.profit', 'target.delta_profit', 'features.panel',
+            'pipeline.end_to_end', 'preprocess_data', 'model.RandomForest.train', 'model.RandomForest.cv',
+            'model.RandomForest.predict'} == set(results['stages'])
+    baseline = {'stages': {'fast': {'seconds': 1.0}, 'noisy': {'seconds': 0.01}, 'slow': {'seconds': 1.0}}}
+    current = {'stages': {'fast': {'seconds': 1.1}, 'noisy': {'seconds': 0.03}, 'slow': {'seconds': 1.5}}}
+    assert [regression['stage'] for regression in compare(current, baseline, tolerance=0.2)] == ['slow']
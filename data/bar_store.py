@@ -0,0 +1,148 @@
+# data/bar_store.py
+import json
+import threading
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from .cache import CacheMissError
+from utils.logger import LazyText, app_logger as logger
+
+# Consecutive bars further apart than this are reported as gaps. Long weekends are up to
+# four calendar days, so anything beyond that means bars are missing.
+MAX_BAR_SPACING = pd.Timedelta(days=4)
+
+
+def find_gaps(bars, max_spacing=MAX_BAR_SPACING):
+    if len(bars) < 2:
+        return []
+    spacing = bars.index.to_series().diff()
+    gap_ends = spacing[spacing > max_spacing].index
+    return [(bars.index[bars.index.get_loc(end) - 1], end) for end in gap_ends]
+
+
+class BarStore:
+    """Per-ticker store of historical bars that only downloads what it does not have yet.
+
+    Each ticker/interval keeps its bars in ``<directory>/<interval>/<ticker>.parquet`` and the
+    date range it has fully covered in a JSON sidecar. A request fetches only the uncovered head
+    and tail of the window, merges and dedupes the new bars and checks the result for gaps.
+    """
+
+    def __init__(self, directory, offline=False):
+        self.directory = Path(directory)
+        self.offline = offline
+        self._locks = defaultdict(threading.Lock)
+
+    @classmethod
+    def from_config(cls, config):
+        store_config = config.get('bar_store') or {}
+        if not store_config.get('enabled', False):
+            return None
+        offline = config.get_nested('cache', 'offline', default=False)
+        return cls(store_config.get('directory', '.cache/bars'), offline=offline)
+
+    def get(self, ticker, interval, start, end, fetch):
+        """Return bars in [start, end), calling fetch(start, end) only for uncovered ranges."""
+        with self._locks[(ticker, interval)]:
+            bars, coverage = self.load(ticker, interval)
+            windows = self.missing_ranges(coverage, start, end)
+
+            if windows and self.offline:
+                if bars is None:
+                    raise CacheMissError(f"Offline mode: no stored {interval} bars for {ticker}")
+                logger.warning(f"Offline mode: {ticker} {interval} bars only cover {coverage['start']} to {coverage['end']}")
+            elif windows:
+                fetched = [fetch(window_start, window_end) for window_start, window_end in windows]
+                logger.debug("Fetched %s new %s bars for %s in %s",
+                             LazyText(lambda: sum(len(f) for f in fetched)), interval, ticker, windows)
+                # A window that came back empty stays uncovered and is retried by the next request.
+                covered = coverage
+                for (window_start, window_end), window_bars in zip(windows, fetched):
+                    if len(window_bars) > 0:
+                        covered = self._extend_coverage(covered, window_start, window_end)
+                if covered is not coverage:
+                    bars = self.merge(ticker, interval, [bars] + fetched, covered)
+
+            if bars is None:
+                return pd.DataFrame()
+            return self._slice(bars, start, end)
+
+    def add(self, ticker, interval, start, end, fetched):
+        """Merge bars downloaded elsewhere (e.g. in a batch) for the window [start, end)."""
+        with self._locks[(ticker, interval)]:
+            bars, coverage = self.load(ticker, interval)
+            self.merge(ticker, interval, [bars] + list(fetched), self._extend_coverage(coverage, start, end))
+
+    def coverage(self, ticker, interval):
+        path = self._path(ticker, interval).with_suffix('.json')
+        if not path.exists():
+            return None
+        with open(path) as file:
+            return json.load(file)
+
+    def load(self, ticker, interval):
+        path = self._path(ticker, interval)
+        if not path.exists():
+            return None, None
+        return pd.read_parquet(path), self.coverage(ticker, interval)
+
+    @staticmethod
+    def missing_ranges(coverage, start, end):
+        if coverage is None:
+            return [(start, end)]
+        windows = []
+        if pd.Timestamp(start) < pd.Timestamp(coverage['start']):
+            windows.append((start, coverage['start']))
+        if pd.Timestamp(end) > pd.Timestamp(coverage['end']):
+            windows.append((coverage['end'], end))
+        return windows
+
+    def merge(self, ticker, interval, frames, coverage):
+        frames = [frame for frame in frames if frame is not None and len(frame) > 0]
+        if not frames:
+            merged = None
+        else:
+            merged = pd.concat(frames)
+            # Later downloads win: they replace the partial session a previous run stored.
+            merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+            gaps = find_gaps(merged)
+            if gaps:
+                logger.warning(f"{ticker} {interval} bars have {len(gaps)} gap(s), first between {gaps[0][0]} and {gaps[0][1]}")
+        self._save(ticker, interval, merged, coverage)
+        return merged
+
+    def _extend_coverage(self, coverage, start, end):
+        # Today's session is still trading, so coverage stops at today and the next run
+        # refetches from there.
+        today = datetime.now().strftime('%Y-%m-%d')
+        covered_end = min(pd.Timestamp(end), pd.Timestamp(today)).strftime('%Y-%m-%d')
+        if coverage is None:
+            return {'start': start, 'end': covered_end}
+        return {
+            'start': min(pd.Timestamp(start), pd.Timestamp(coverage['start'])).strftime('%Y-%m-%d'),
+            'end': max(pd.Timestamp(covered_end), pd.Timestamp(coverage['end'])).strftime('%Y-%m-%d'),
+        }
+
+    def _save(self, ticker, interval, bars, coverage):
+        path = self._path(ticker, interval)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if bars is not None:
+            bars.to_parquet(path)
+        elif not path.exists():
+            pd.DataFrame().to_parquet(path)
+        with open(path.with_suffix('.json'), 'w') as file:
+            json.dump(coverage, file)
+
+    def _path(self, ticker, interval):
+        return self.directory / interval / f"{ticker.replace('^', '_').replace('/', '_')}.parquet"
+
+    @staticmethod
+    def _slice(bars, start, end):
+        if len(bars) == 0:
+            return bars.copy()
+        tz = bars.index.tz
+        start = pd.Timestamp(start, tz=tz) if tz is not None else pd.Timestamp(start)
+        end = pd.Timestamp(end, tz=tz) if tz is not None else pd.Timestamp(end)
+        return bars[(bars.index >= start) & (bars.index < end)].copy()
@@ -0,0 +1,135 @@
+# data/base_data_fetcher.py
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+DEFAULT_EXPIRATIONS = {
+    'mode': 'nearest',  # nearest | all | window
+    'min_dte': 30,
+    'max_dte': None,
+    'option_types': ['calls'],
+    'max_workers': 4,
+}
+
+# Chain name (yfinance's option_chain attribute) -> value of the stacked frame's option_type column
+OPTION_TYPES = {'calls': 'call', 'puts': 'put'}
+
+
+class BaseDataFetcher(ABC):
+    """Option chains, bars, market indices and fundamentals for one ticker from one provider.
+
+    A provider implements the four ``_get_*`` primitives with yfinance's shapes: expiration
+    dates as 'YYYY-MM-DD' strings, one chain frame per (expiration, 'calls'|'puts'), OHLCV bars
+    indexed by timestamp for any symbol (the ticker or a market index), and an info dict.
+    Expiration selection, stacking the chains and the hourly-to-daily fallback live here.
+    """
+
+    # The pipeline hands every provider the same resources; ones it has no use for (bar store,
+    # bulk bars) are ignored.
+    def __init__(self, ticker, start_date, end_date, cache=None, expirations=None, **kwargs):
+        self.ticker = ticker
+        self.start_date = start_date
+        self.end_date = end_date
+        self.cache = cache
+        self.expirations = {**DEFAULT_EXPIRATIONS, **(expirations or {})}
+
+    def fetch_data(self):
+        today = self._now()
+        selected = self.select_expirations(self._get_expirations(), today)
+        if not selected:
+            raise ValueError("No valid expiration dates found")
+        print(f"Using expiration dates: {', '.join(selected)}")
+        calls = self._get_option_chains(selected)
+        nearest_expiration = selected[0]
+
+        try:
+            underlying = self._get_history(self.ticker, interval="1h")
+            if len(underlying) == 0:
+                raise ValueError("No hourly data available")
+        except:
+            print(f"Hourly data not available for {self.ticker}. Falling back to daily data.")
+            underlying = self._get_history(self.ticker, interval="1d")
+
+        if len(underlying) == 0:
+            raise ValueError(f"No data available for {self.ticker}")
+
+        underlying_info = self._get_info()
+        underlying['volume'] = underlying_info.get('volume', 0)
+        underlying['market_cap'] = underlying_info.get('marketCap', 0)
+        underlying['sector'] = underlying_info.get('sector', 'Unknown')
+
+        print(f"Number of option contracts: {len(calls)}")
+        print(f"Number of periods in underlying data: {len(underlying)}")
+        return calls, underlying, nearest_expiration
+
+    def fetch_market_data(self):
+        try:
+            market_data = pd.DataFrame({
+                'sp500': self._get_history('^GSPC', interval="1h")['Close'],
+                'vix': self._get_history('^VIX', interval="1h")['Close']
+            })
+        except:
+            print("Hourly market data not available. Falling back to daily data.")
+            market_data = pd.DataFrame({
+                'sp500': self._get_history('^GSPC', interval="1d")['Close'],
+                'vix': self._get_history('^VIX', interval="1d")['Close']
+            })
+        return market_data
+
+    def fetch_fundamental_data(self):
+        fundamentals = self._get_info()
+        return {
+            'pe_ratio': fundamentals.get('trailingPE', None),
+            'dividend_yield': fundamentals.get('dividendYield', None),
+            'beta': fundamentals.get('beta', None),
+        }
+
+    def select_expirations(self, expirations, today):
+        days_out = {exp: (datetime.strptime(exp, '%Y-%m-%d') - today).days for exp in expirations}
+        min_dte = self.expirations['min_dte'] or 0
+        max_dte = self.expirations['max_dte']
+        mode = self.expirations['mode']
+
+        if mode == 'nearest':
+            valid = [exp for exp, days in days_out.items() if days >= min_dte]
+            return [min(valid, key=lambda exp: days_out[exp])] if valid else []
+        if mode == 'all':
+            # An expiration less than a whole day out has time_to_expiry 0, leaving IV and Greeks undefined.
+            return sorted(exp for exp, days in days_out.items() if days >= 1)
+        if mode == 'window':
+            return sorted(exp for exp, days in days_out.items()
+                          if days >= min_dte and (max_dte is None or days <= max_dte))
+        raise ValueError(f"Unknown expiration mode: {mode}")
+
+    def _now(self):
+        return self.cache.now() if self.cache else datetime.now()
+
+    def _get_option_chains(self, expirations):
+        # One long frame for the whole surface: every (expiration, type) chain stacked in a fixed
+        # order and labelled, fetched concurrently since each one may be a separate request.
+        requests = [(exp, option_type) for exp in expirations for option_type in self.expirations['option_types']]
+        with ThreadPoolExecutor(max_workers=self.expirations['max_workers']) as executor:
+            chains = list(executor.map(lambda request: self._get_option_chain(*request), requests))
+        labelled = [chain.assign(expiration=exp, option_type=OPTION_TYPES[option_type])
+                    for (exp, option_type), chain in zip(requests, chains) if len(chain) > 0]
+        if not labelled:
+            return pd.DataFrame()
+        return pd.concat(labelled, ignore_index=True)
+
+    @abstractmethod
+    def _get_expirations(self):
+        pass
+
+    @abstractmethod
+    def _get_option_chain(self, expiration, option_type):
+        pass
+
+    @abstractmethod
+    def _get_history(self, symbol, interval):
+        pass
+
+    @abstractmethod
+    def _get_info(self):
+        pass
@@ -0,0 +1,139 @@
+# data/bulk_bars.py
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from .bar_store import BarStore
+from .cache import CacheMissError
+from utils.instrumentation import instrumentation
+from utils.logger import app_logger as logger
+
+BAR_FIELDS = ['Close', 'High', 'Low', 'Open', 'Volume']
+MARKET_INDICES = ['^GSPC', '^VIX']
+
+
+class BulkBarLoader:
+    """Downloads bars for every symbol of a run in batched requests, once.
+
+    All symbols end up in one float64 frame with (symbol, field) columns backed by a single
+    read-only array. ``bars`` hands out frames that are views into that array, so per-ticker
+    processing reads bar data without copying it or touching the network.
+    """
+
+    def __init__(self, symbols, start_date, end_date, batch_size=50, bar_store=None, offline=False):
+        self.symbols = list(dict.fromkeys(symbols))
+        self.start_date = start_date
+        self.end_date = end_date
+        self.batch_size = batch_size
+        self.bar_store = bar_store
+        self.offline = offline
+        self.frames = {}
+
+    @classmethod
+    def from_config(cls, config, start_date, end_date, bar_store=None):
+        bulk_config = config.get_nested('data', 'bulk_download') or {}
+        if not bulk_config.get('enabled', False):
+            return None
+        market_indices = config.get_nested('data', 'market_indices', default=MARKET_INDICES)
+        symbols = config.get_nested('data', 'tickers') + market_indices
+        return cls(symbols, start_date, end_date,
+                   batch_size=bulk_config.get('batch_size', 50),
+                   bar_store=bar_store,
+                   offline=config.get_nested('cache', 'offline', default=False))
+
+    def load(self):
+        self._load_interval('1h', self.symbols)
+        # Same fallback as OptionDataFetcher: symbols without hourly bars get daily ones.
+        missing = [symbol for symbol in self.symbols if self.bars(symbol, '1h') is None]
+        if missing:
+            logger.info(f"Hourly data not available for {missing}. Falling back to daily data.")
+            self._load_interval('1d', missing)
+
+    def bars(self, symbol, interval='1h'):
+        frame = self.frames.get(interval)
+        if frame is None or symbol not in frame.columns.get_level_values(0):
+            return None
+
+        columns = frame.columns.get_loc(symbol)
+        values = frame.to_numpy()[:, columns]
+        # Trim leading/trailing rows that belong to other symbols with a plain slice, which keeps
+        # the result a view. Only holes inside the series force a copy.
+        valid = ~np.isnan(values).all(axis=1)
+        if not valid.any():
+            return None
+        first, last = np.argmax(valid), len(valid) - np.argmax(valid[::-1])
+        bars = pd.DataFrame(values[first:last], index=frame.index[first:last],
+                            columns=frame.columns[columns].get_level_values(1), copy=False)
+        if not valid[first:last].all():
+            bars = bars[valid[first:last]]
+        return bars
+
+    def _load_interval(self, interval, symbols):
+        if self.bar_store is not None:
+            per_symbol = self._load_through_store(interval, symbols)
+        elif self.offline:
+            raise CacheMissError("Offline mode needs the bar store to serve bulk bars")
+        else:
+            per_symbol = {}
+            for batch in self._batches(symbols):
+                per_symbol.update(self._download(batch, self.start_date, self.end_date, interval))
+        per_symbol = {symbol: bars for symbol, bars in per_symbol.items() if len(bars) > 0}
+        if per_symbol:
+            self.frames[interval] = self._build_frame(per_symbol)
+            logger.info(f"Loaded {interval} bars for {len(per_symbol)} symbols, {len(self.frames[interval])} timestamps")
+
+    def _load_through_store(self, interval, symbols):
+        # Symbols refreshed on the same schedule share the same missing windows, so grouping on
+        # the windows keeps a daily refresh down to one small request per batch.
+        by_windows = defaultdict(list)
+        for symbol in symbols:
+            windows = BarStore.missing_ranges(self.bar_store.coverage(symbol, interval), self.start_date, self.end_date)
+            by_windows[tuple(windows)].append(symbol)
+
+        if not self.offline:
+            for windows, group in by_windows.items():
+                for batch in self._batches(group):
+                    downloaded = defaultdict(list)
+                    for window_start, window_end in windows:
+                        for symbol, bars in self._download(batch, window_start, window_end, interval).items():
+                            downloaded[symbol].append(bars)
+                    for symbol, fetched in downloaded.items():
+                        # Symbols the batch returned nothing for stay uncovered and are retried next run.
+                        if any(len(bars) > 0 for bars in fetched):
+                            self.bar_store.add(symbol, interval, self.start_date, self.end_date, fetched)
+
+        per_symbol = {}
+        for symbol in symbols:
+            bars, _ = self.bar_store.load(symbol, interval)
+            if bars is not None and len(bars) > 0:
+                per_symbol[symbol] = BarStore._slice(bars, self.start_date, self.end_date)
+        return per_symbol
+
+    def _download(self, batch, start, end, interval):
+        instrumentation.count('network_calls', endpoint='download')
+        raw = yf.download(batch, start=start, end=end, interval=interval, group_by='ticker',
+                          auto_adjust=True, ignore_tz=False, threads=True, progress=False)
+        if raw is None or raw.empty:
+            return {}
+        if not isinstance(raw.columns, pd.MultiIndex):
+            raw = pd.concat({batch[0]: raw}, axis=1)
+        downloaded = {}
+        for symbol in batch:
+            if symbol in raw.columns.get_level_values(0):
+                downloaded[symbol] = raw[symbol].dropna(how='all')
+        return downloaded
+
+    def _batches(self, symbols):
+        for i in range(0, len(symbols), self.batch_size):
+            yield symbols[i:i + self.batch_size]
+
+    @staticmethod
+    def _build_frame(per_symbol):
+        frame = pd.concat({symbol: bars.reindex(columns=BAR_FIELDS) for symbol, bars in per_symbol.items()}, axis=1)
+        frame = frame.sort_index(axis=1)
+        # One contiguous read-only block: column slices stay views and nobody can write into
+        # bars another ticker is reading.
+        values = np.ascontiguousarray(frame.to_numpy(dtype=np.float64))
+        values.flags.writeable = False
+        return pd.DataFrame(values, index=frame.index, columns=frame.columns, copy=False)
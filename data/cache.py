@@ -0,0 +1,153 @@
+# data/cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from utils.instrumentation import instrumentation
+from utils.logger import app_logger as logger
+
+# Seconds before a cached payload is considered stale. None means it never expires.
+DEFAULT_TTLS = {
+    'options': 3600,
+    'option_chain': 900,
+    'history': 3600,
+    'history_closed': None,
+    'info': 86400,
+}
+
+
+class CacheMissError(ValueError):
+    """Raised in offline mode when a request has no recorded payload."""
+
+
+class DataCache:
+    """Read-through Parquet cache for market data requests.
+
+    Payloads live under ``<directory>/<endpoint>/<ticker>/<key>.parquet`` where the key hashes
+    every request parameter (expiration, interval, date range, ...). In offline mode nothing is
+    fetched: recorded payloads are replayed regardless of age and a miss raises CacheMissError.
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, directory, ttls=None, max_size_mb=None, offline=False):
+        self.directory = Path(directory)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._size_bytes = None
+        self._recorded_at = None
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config):
+        cache_config = config.get('cache') or {}
+        if not cache_config.get('enabled', False):
+            return None
+        return cls(cache_config.get('directory', '.cache/market_data'),
+                   ttls=cache_config.get('ttl_seconds'),
+                   max_size_mb=cache_config.get('max_size_mb'),
+                   offline=cache_config.get('offline', False))
+
+    def now(self):
+        # A replay has to see the clock of the run it recorded, otherwise 'auto' end dates and
+        # expiration selection would ask for payloads that were never stored.
+        if self.offline:
+            manifest = self._read_manifest()
+            if 'recorded_at' in manifest:
+                return datetime.fromisoformat(manifest['recorded_at'])
+        return datetime.now()
+
+    def get_frame(self, endpoint, ticker, fetch, ttl_endpoint=None, **key):
+        path = self._path(endpoint, ticker, key)
+        cached = self._load(path, ttl_endpoint or endpoint)
+        instrumentation.count('cache_requests', endpoint=endpoint, result='miss' if cached is None else 'hit')
+        if cached is not None:
+            return cached
+        frame = fetch()
+        self._store(path, frame)
+        return frame
+
+    def get_json(self, endpoint, ticker, fetch, ttl_endpoint=None, **key):
+        path = self._path(endpoint, ticker, key)
+        cached = self._load(path, ttl_endpoint or endpoint)
+        instrumentation.count('cache_requests', endpoint=endpoint, result='miss' if cached is None else 'hit')
+        if cached is not None:
+            return json.loads(cached['payload'].iloc[0])
+        payload = fetch()
+        self._store(path, pd.DataFrame({'payload': [json.dumps(payload, default=str)]}))
+        return payload
+
+    def _path(self, endpoint, ticker, key):
+        digest = hashlib.sha1(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()[:20]
+        safe_ticker = ticker.replace('^', '_').replace('/', '_')
+        return self.directory / endpoint / safe_ticker / f"{digest}.parquet"
+
+    def _load(self, path, ttl_endpoint):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            if self.offline:
+                raise CacheMissError(f"Offline mode: no cached payload at {path}")
+            return None
+
+        ttl = self.ttls.get(ttl_endpoint)
+        if not self.offline and ttl is not None and time.time() - stat.st_mtime > ttl:
+            logger.debug("Cache entry expired: %s", path)
+            return None
+
+        frame = pd.read_parquet(path)
+        # atime marks recency for eviction; mtime keeps meaning "fetched at" for the TTL.
+        os.utime(path, (time.time(), stat.st_mtime))
+        return frame
+
+    def _store(self, path, frame):
+        if self.offline:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        frame.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._recorded_at is None:
+                self._recorded_at = datetime.now()
+                self._write_manifest({'recorded_at': self._recorded_at.isoformat()})
+            if self.max_size_bytes is not None:
+                if self._size_bytes is None:
+                    self._size_bytes = sum(entry.stat().st_size for entry in self._entries())
+                else:
+                    self._size_bytes += path.stat().st_size
+                if self._size_bytes > self.max_size_bytes:
+                    self._evict()
+
+    def _evict(self):
+        # Rescan rather than trust the running total, overwritten entries are counted twice there.
+        entries = sorted(((entry, entry.stat()) for entry in self._entries()), key=lambda item: item[1].st_atime)
+        self._size_bytes = sum(stat.st_size for _, stat in entries)
+        for entry, stat in entries:
+            if self._size_bytes <= self.max_size_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            self._size_bytes -= stat.st_size
+            logger.debug("Evicted cache entry: %s", entry)
+
+    def _entries(self):
+        return self.directory.glob('*/*/*.parquet')
+
+    def _read_manifest(self):
+        path = self.directory / self.MANIFEST
+        if not path.exists():
+            return {}
+        with open(path) as file:
+            return json.load(file)
+
+    def _write_manifest(self, manifest):
+        with open(self.directory / self.MANIFEST, 'w') as file:
+            json.dump(manifest, file)
@@ -1,68 +1,66 @@
 # data/data_fetcher.py
 import yfinance as yf
 import pandas as pd
-from datetime import datetime
 
-class OptionDataFetcher:
-    def __init__(self, ticker, start_date, end_date):
-        self.ticker = ticker
-        self.start_date = start_date
-        self.end_date = end_date
+from .base_data_fetcher import BaseDataFetcher
+from utils.instrumentation import instrumentation
+
+
+def _network(endpoint, fetch):
+    """``fetch``, counted as a network call to ``endpoint`` each time it runs."""
+    def counted(*args, **kwargs):
+        instrumentation.count('network_calls', endpoint=endpoint)
+        return fetch(*args, **kwargs)
+    return counted
+
+
+class OptionDataFetcher(BaseDataFetcher):
+    """The yfinance provider, read through the market-data cache, bar store and bulk bars."""
+
+    def __init__(self, ticker, start_date, end_date, cache=None, bar_store=None, bulk_bars=None, expirations=None,
+                 **kwargs):
+        super().__init__(ticker, start_date, end_date, cache=cache, expirations=expirations)
+        self.bar_store = bar_store
+        self.bulk_bars = bulk_bars
         self.stock = yf.Ticker(self.ticker)
 
-    def fetch_data(self):
-        expirations = self.stock.options
-        today = datetime.now()
-        valid_expirations = [exp for exp in expirations if (datetime.strptime(exp, '%Y-%m-%d') - today).days >= 30]
-        if not valid_expirations:
-            raise ValueError("No valid expiration dates found")
-        nearest_expiration = min(valid_expirations, key=lambda x: abs(datetime.strptime(x, '%Y-%m-%d') - today))
-        print(f"Using expiration date: {nearest_expiration}")
-        options = self.stock.option_chain(nearest_expiration)
-        calls = options.calls
-        
-        try:
-            underlying = self.stock.history(start=self.start_date, end=self.end_date, interval="1h")
-            if len(underlying) == 0:
-                raise ValueError("No hourly data available")
-        except:
-            print(f"Hourly data not available for {self.ticker}. Falling back to daily data.")
-            underlying = self.stock.history(start=self.start_date, end=self.end_date)
-        
-        if len(underlying) == 0:
-            raise ValueError(f"No data available for {self.ticker}")
+    def _get_expirations(self):
+        fetch = _network('options', lambda: list(self.stock.options))
+        if self.cache is None:
+            return fetch()
+        return self.cache.get_json('options', self.ticker, fetch)
 
-        underlying_info = self.stock.info
-        underlying['volume'] = underlying_info.get('volume', 0)
-        underlying['market_cap'] = underlying_info.get('marketCap', 0)
-        underlying['sector'] = underlying_info.get('sector', 'Unknown')
-        
-        print(f"Number of call options: {len(calls)}")
-        print(f"Number of periods in underlying data: {len(underlying)}")
-        return calls, underlying, nearest_expiration
+    def _get_option_chain(self, expiration, option_type):
+        fetch = _network('option_chain', lambda: getattr(self.stock.option_chain(expiration), option_type))
+        if self.cache is None:
+            return fetch()
+        return self.cache.get_frame('option_chain', self.ticker, fetch,
+                                    expiration=expiration, option_type=option_type)
 
-    def fetch_market_data(self):
-        sp500 = yf.Ticker('^GSPC')
-        vix = yf.Ticker('^VIX')
-        try:
-            market_data = pd.DataFrame({
-                'sp500': sp500.history(start=self.start_date, end=self.end_date, interval="1h")['Close'],
-                'vix': vix.history(start=self.start_date, end=self.end_date, interval="1h")['Close']
-            })
-        except:
-            print("Hourly market data not available. Falling back to daily data.")
-            market_data = pd.DataFrame({
-                'sp500': sp500.history(start=self.start_date, end=self.end_date)['Close'],
-                'vix': vix.history(start=self.start_date, end=self.end_date)['Close']
-            })
-        return market_data
+    def _get_history(self, symbol, interval):
+        if self.bulk_bars is not None:
+            # Bars were downloaded for the whole run up front, an empty frame sends the caller
+            # down the daily fallback rather than to the network.
+            bars = self.bulk_bars.bars(symbol, interval)
+            return bars if bars is not None else pd.DataFrame()
 
+        stock = self.stock if symbol == self.ticker else yf.Ticker(symbol)
+        if self.bar_store is not None:
+            # The store already knows which bars it has, it only asks for the missing ranges.
+            fetch = _network('history', lambda start, end: stock.history(start=start, end=end, interval=interval))
+            return self.bar_store.get(symbol, interval, self.start_date, self.end_date, fetch)
 
-    def fetch_fundamental_data(self):
-        fundamentals = self.stock.info
-        return {
-            'pe_ratio': fundamentals.get('trailingPE', None),
-            'dividend_yield': fundamentals.get('dividendYield', None),
-            'beta': fundamentals.get('beta', None),
-        }
+        fetch = _network('history', lambda: stock.history(start=self.start_date, end=self.end_date, interval=interval))
+        if self.cache is None:
+            return fetch()
+        # Bars for a window that ended before today can no longer change.
+        closed = pd.Timestamp(self.end_date) < pd.Timestamp(self.cache.now().date())
+        return self.cache.get_frame('history', symbol, fetch,
+                                    ttl_endpoint='history_closed' if closed else 'history',
+                                    interval=interval, start=self.start_date, end=self.end_date)
 
+    def _get_info(self):
+        fetch = _network('info', lambda: self.stock.info)
+        if self.cache is None:
+            return fetch()
+        return self.cache.get_json('info', self.ticker, fetch)
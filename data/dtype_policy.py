@@ -0,0 +1,137 @@
+# data/dtype_policy.py
+import numpy as np
+import pandas as pd
+from pandas.api.types import (is_bool_dtype, is_datetime64_any_dtype, is_float_dtype, is_integer_dtype,
+                              is_object_dtype, is_string_dtype)
+from utils.logger import app_logger as logger
+
+# Strings repeated on every contract of a ticker, categorical whatever their cardinality.
+CATEGORICAL_COLUMNS = ['ticker', 'option_type', 'expiration', 'currency', 'contractSize', 'sector']
+INTEGER_COLUMNS = ['volume', 'openInterest']
+
+
+class DtypePolicy:
+    """Compact dtypes for an engineered options frame.
+
+    - repeated strings become categoricals: the CATEGORICAL_COLUMNS plus any other string
+      column whose unique values are at most ``categorical_max_unique_ratio`` of its rows;
+    - float64 columns become float32 unless a value would move by more than
+      ``float32_tolerance`` relative to itself. float32 keeps about 7 significant digits
+      (relative rounding error <= 6e-8), so in practice only values outside its range
+      (beyond ~3.4e38, or below ~1.2e-38) keep a column in float64;
+    - volume and open interest become nullable integers (Int32, or Int64 when needed);
+    - other integers are downcast to the smallest type that holds them;
+    - timestamps are converted to tz-naive UTC so tickers from different zones concatenate
+      into one datetime64 column instead of object.
+    """
+
+    def __init__(self, float32=True, float32_tolerance=1e-6, keep_float64=(), categorical_max_unique_ratio=0.5):
+        self.float32 = float32
+        self.float32_tolerance = float32_tolerance
+        self.keep_float64 = set(keep_float64)
+        self.categorical_max_unique_ratio = categorical_max_unique_ratio
+
+    @classmethod
+    def from_config(cls, config):
+        dtype_config = config.get('dtypes') or {}
+        if not dtype_config.get('enabled', False):
+            return None
+        return cls(float32=dtype_config.get('float32', True),
+                   float32_tolerance=dtype_config.get('float32_tolerance', 1e-6),
+                   keep_float64=dtype_config.get('keep_float64') or (),
+                   categorical_max_unique_ratio=dtype_config.get('categorical_max_unique_ratio', 0.5))
+
+    def apply(self, frame):
+        columns = {}
+        for name, column in frame.items():
+            converted = self._convert(name, column)
+            if converted is not column:
+                columns[name] = converted
+        return frame.assign(**columns) if columns else frame
+
+    def _convert(self, name, column):
+        if isinstance(column.dtype, pd.CategoricalDtype) or is_bool_dtype(column):
+            return column
+        if is_datetime64_any_dtype(column):
+            if getattr(column.dt, 'tz', None) is not None:
+                return column.dt.tz_convert('UTC').dt.tz_localize(None)
+            return column
+        if name in INTEGER_COLUMNS:
+            return self._nullable_integer(column)
+        if is_float_dtype(column):
+            return self._float32(name, column)
+        if is_integer_dtype(column):
+            return pd.to_numeric(column, downcast='integer')
+        if is_object_dtype(column) or is_string_dtype(column):
+            if name in CATEGORICAL_COLUMNS or self._repeated(column):
+                return column.astype('category')
+        return column
+
+    def _float32(self, name, column):
+        if not self.float32 or column.dtype == np.float32 or name in self.keep_float64:
+            return column
+        values = column.to_numpy()
+        with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+            narrowed = values.astype(np.float32)
+            error = np.abs(narrowed.astype(np.float64) - values) / np.abs(values)
+        finite = np.isfinite(values) & (values != 0)
+        if np.any(~np.isfinite(error[finite]) | (error[finite] > self.float32_tolerance)):
+            logger.debug("Keeping %s as float64, float32 would exceed the tolerance", name)
+            return column
+        return pd.Series(narrowed, index=column.index, name=name)
+
+    @staticmethod
+    def _nullable_integer(column):
+        values = pd.to_numeric(column, errors='coerce')
+        present = values.dropna()
+        if not (present == np.round(present)).all():
+            return column
+        fits_int32 = present.empty or (present.abs().max() < 2 ** 31)
+        return values.astype('Int32' if fits_int32 else 'Int64')
+
+    def _repeated(self, column):
+        if len(column) == 0:
+            return False
+        try:
+            return column.nunique(dropna=True) <= self.categorical_max_unique_ratio * len(column)
+        except TypeError:
+            # Unhashable values (lists, dicts) stay as objects.
+            return False
+
+
+def concat_frames(frames):
+    """Concatenate frames whose categoricals may have different categories.
+
+    pd.concat falls back to object for a categorical column whose categories differ between
+    frames, so every such column is recoded to the union of categories first.
+    """
+    frames = list(frames)
+    categorical = {name for frame in frames for name, dtype in frame.dtypes.items()
+                   if isinstance(dtype, pd.CategoricalDtype)}
+    for name in categorical:
+        categories = pd.Index([])
+        for frame in frames:
+            if name in frame.columns:
+                values = frame[name]
+                values = values.cat.categories if isinstance(values.dtype, pd.CategoricalDtype) else values.dropna().unique()
+                categories = categories.union(pd.Index(values), sort=False)
+        frames = [frame.assign(**{name: frame[name].astype(pd.CategoricalDtype(categories))}) if name in frame.columns else frame
+                  for frame in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def memory_usage(frame):
+    return int(frame.memory_usage(deep=True).sum())
+
+
+def log_memory_report(before, after, by_dtype=None):
+    saved = 1 - after / before if before else 0
+    logger.info(f"Memory: {before / 2 ** 20:.1f} MB before dtype policy, {after / 2 ** 20:.1f} MB after ({saved:.0%} saved)")
+    if by_dtype:
+        summary = ", ".join(f"{dtype}={size / 2 ** 20:.1f} MB" for dtype, size in sorted(by_dtype.items(), key=lambda item: -item[1]))
+        logger.info(f"Memory by dtype after policy: {summary}")
+
+
+def memory_by_dtype(frame):
+    usage = frame.memory_usage(deep=True, index=False)
+    return {str(dtype): int(usage[frame.dtypes == dtype].sum()) for dtype in frame.dtypes.unique()}
@@ -0,0 +1,128 @@
+# data/feature_store.py
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+from utils.logger import app_logger as logger
+
+# Bumped when the on-disk layout or manifest format changes.
+SCHEMA_VERSION = 1
+PARTITIONING = pa.schema([('ticker', pa.string()), ('snapshot_date', pa.string())])
+
+
+class FeatureStore:
+    """Engineered features and targets kept across runs as Parquet partitions.
+
+    Each run writes ``<directory>/ticker=<ticker>/snapshot_date=<YYYY-MM-DD>/part-0.parquet``;
+    rewriting a snapshot replaces it. The manifest records every partition with its row count,
+    column schema and the feature-set version it was engineered with, so reads only mix
+    snapshots built from the same feature definitions.
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config):
+        store_config = config.get('feature_store') or {}
+        if not store_config.get('enabled', False):
+            return None
+        return cls(store_config.get('directory', '.cache/feature_store'))
+
+    def write(self, data, snapshot_date, feature_set_version):
+        snapshot_date = pd.Timestamp(snapshot_date).strftime('%Y-%m-%d')
+        partitions = {}
+        for ticker, frame in data.groupby('ticker', sort=False, observed=True):
+            # ticker and snapshot_date come back from the partition path on read.
+            table = pa.Table.from_pandas(frame.drop(columns='ticker'), preserve_index=False)
+            path = self._partition_path(ticker, snapshot_date)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, path)
+            partitions[self._partition_key(ticker, snapshot_date)] = {
+                'ticker': ticker,
+                'snapshot_date': snapshot_date,
+                'path': str(path.relative_to(self.directory)),
+                'rows': table.num_rows,
+                'feature_set_version': feature_set_version,
+                'columns': {field.name: str(field.type) for field in table.schema},
+                'written_at': datetime.now().isoformat(),
+            }
+
+        with self._lock:
+            manifest = self.manifest()
+            manifest['partitions'].update(partitions)
+            self._write_manifest(manifest)
+        logger.info(f"Wrote {len(partitions)} partitions for snapshot {snapshot_date} to the feature store")
+
+    def read(self, start_date=None, end_date=None, columns=None, tickers=None, feature_set_version=None):
+        """Snapshots between ``start_date`` and ``end_date`` (inclusive) as one frame.
+
+        Only the requested ``columns`` are read, through memory-mapped files. Partitions built
+        with a different ``feature_set_version`` are skipped.
+        """
+        partitions = self.partitions(start_date, end_date, tickers)
+        if feature_set_version is not None:
+            stale = [entry for entry in partitions if entry['feature_set_version'] != feature_set_version]
+            if stale:
+                logger.warning(f"Skipping {len(stale)} feature store partitions built with another feature set version")
+            partitions = [entry for entry in partitions if entry['feature_set_version'] == feature_set_version]
+        if not partitions:
+            return pd.DataFrame(columns=columns)
+
+        files = [str(self.directory / entry['path']) for entry in partitions]
+        filesystem = fs.LocalFileSystem(use_mmap=True)
+        # Snapshots can gain columns over time; missing ones read as nulls.
+        schema = pa.unify_schemas([pq.read_schema(path, memory_map=True) for path in files] + [PARTITIONING])
+        dataset = ds.dataset(files, schema=schema, format='parquet', filesystem=filesystem,
+                             partitioning=ds.partitioning(PARTITIONING, flavor='hive'),
+                             partition_base_dir=str(self.directory))
+        if columns is not None:
+            columns = [column for column in columns if column in schema.names]
+        return dataset.to_table(columns=columns).to_pandas()
+
+    def partitions(self, start_date=None, end_date=None, tickers=None):
+        start_date = pd.Timestamp(start_date).strftime('%Y-%m-%d') if start_date else None
+        end_date = pd.Timestamp(end_date).strftime('%Y-%m-%d') if end_date else None
+        entries = sorted(self.manifest()['partitions'].values(), key=lambda entry: (entry['snapshot_date'], entry['ticker']))
+        return [entry for entry in entries
+                if (start_date is None or entry['snapshot_date'] >= start_date)
+                and (end_date is None or entry['snapshot_date'] <= end_date)
+                and (tickers is None or entry['ticker'] in tickers)]
+
+    def manifest(self):
+        path = self.directory / self.MANIFEST
+        if not path.exists():
+            return {'schema_version': SCHEMA_VERSION, 'partitions': {}}
+        with open(path) as file:
+            manifest = json.load(file)
+        if manifest.get('schema_version') != SCHEMA_VERSION:
+            raise ValueError(f"Feature store at {self.directory} has schema version "
+                             f"{manifest.get('schema_version')}, expected {SCHEMA_VERSION}")
+        return manifest
+
+    def _write_manifest(self, manifest):
+        path = self.directory / self.MANIFEST
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as file:
+            json.dump(manifest, file, indent=2)
+        os.replace(tmp_path, path)
+
+    def _partition_path(self, ticker, snapshot_date):
+        return self.directory / f"ticker={ticker}" / f"snapshot_date={snapshot_date}" / 'part-0.parquet'
+
+    @staticmethod
+    def _partition_key(ticker, snapshot_date):
+        return f"{ticker}/{snapshot_date}"
@@ -0,0 +1,73 @@
+# data/local_data_fetcher.py
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from .base_data_fetcher import BaseDataFetcher
+
+MARKET_INDICES = ['^GSPC', '^VIX']
+
+
+class LocalDataFetcher(BaseDataFetcher):
+    """Market data read from files, for runs without network access.
+
+    Layout under ``directory``, one folder per symbol::
+
+        <symbol>/bars_<interval>.parquet           OHLCV bars, tickers and market indices alike
+        <ticker>/info.json                         the info dict (volume, marketCap, sector, ...)
+        <ticker>/chains/<expiration>_<calls|puts>.parquet
+
+    ``record`` writes this layout from any other provider. Bars are clipped to the fetcher's
+    date range; anything missing reads as empty, which sends the caller down the same
+    fallbacks as an empty response from yfinance.
+    """
+
+    def __init__(self, ticker, start_date, end_date, cache=None, expirations=None, directory='data/market', **kwargs):
+        super().__init__(ticker, start_date, end_date, cache=cache, expirations=expirations)
+        self.directory = Path(directory)
+
+    def _get_expirations(self):
+        chain_directory = self.directory / self.ticker / 'chains'
+        if not chain_directory.exists():
+            return []
+        return sorted({path.stem.rsplit('_', 1)[0] for path in chain_directory.glob('*.parquet')})
+
+    def _get_option_chain(self, expiration, option_type):
+        path = self.directory / self.ticker / 'chains' / f"{expiration}_{option_type}.parquet"
+        return pd.read_parquet(path) if path.exists() else pd.DataFrame()
+
+    def _get_history(self, symbol, interval):
+        path = self.directory / symbol / f"bars_{interval}.parquet"
+        if not path.exists():
+            return pd.DataFrame()
+        bars = pd.read_parquet(path)
+        # Like yfinance's history, start is inclusive and end exclusive.
+        if self.start_date:
+            bars = bars[bars.index >= pd.Timestamp(self.start_date, tz=bars.index.tz)]
+        if self.end_date:
+            bars = bars[bars.index < pd.Timestamp(self.end_date, tz=bars.index.tz)]
+        return bars
+
+    def _get_info(self):
+        path = self.directory / self.ticker / 'info.json'
+        return json.loads(path.read_text()) if path.exists() else {}
+
+
+def record(fetcher, directory, option_types=('calls', 'puts'), intervals=('1h', '1d'), market_indices=MARKET_INDICES):
+    """Write everything ``fetcher`` serves for its ticker, and the market indices, in LocalDataFetcher's layout."""
+    root = Path(directory)
+    chain_directory = root / fetcher.ticker / 'chains'
+    chain_directory.mkdir(parents=True, exist_ok=True)
+    for expiration in fetcher._get_expirations():
+        for option_type in option_types:
+            chain = fetcher._get_option_chain(expiration, option_type)
+            if len(chain) > 0:
+                chain.to_parquet(chain_directory / f"{expiration}_{option_type}.parquet")
+    for symbol in [fetcher.ticker, *market_indices]:
+        (root / symbol).mkdir(parents=True, exist_ok=True)
+        for interval in intervals:
+            bars = fetcher._get_history(symbol, interval)
+            if len(bars) > 0:
+                bars.to_parquet(root / symbol / f"bars_{interval}.parquet")
+    (root / fetcher.ticker / 'info.json').write_text(json.dumps(fetcher._get_info(), default=str))
@@ -0,0 +1,144 @@
+# data/preprocessor.py
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from utils.logger import app_logger as logger
+
+
+class StreamingPreprocessor:
+    """Mean imputation followed by standard scaling, fitted one chunk at a time.
+
+    Per-column counts, means and sums of squared deviations are merged chunk by chunk with
+    Chan's parallel update, skipping NaN, so the fit never needs the whole dataset in memory.
+    The result matches SimpleImputer(strategy='mean') followed by StandardScaler on the full
+    data: an imputed value sits at the mean, so it adds a row to the variance denominator but
+    nothing to the sum of squares. Columns that are entirely NaN are dropped, like the old
+    preprocessing did. Statistics are accumulated in float64; transforms produce float32.
+    """
+
+    STRATEGIES = ('mean', 'constant')
+
+    def __init__(self, imputer_strategy='mean', fill_value=0.0, dtype=np.float32):
+        if imputer_strategy not in self.STRATEGIES:
+            raise ValueError(f"Streaming imputation supports {self.STRATEGIES}, not '{imputer_strategy}'")
+        self.imputer_strategy = imputer_strategy
+        self.fill_value = fill_value
+        self.dtype = np.dtype(dtype)
+        self.feature_names_in_ = None
+        self.n_rows_ = 0
+        self.count_ = None
+        self.mean_ = None
+        self.m2_ = None
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(imputer_strategy=config.get_nested('preprocessing', 'imputer_strategy', default='mean'))
+
+    def partial_fit(self, X):
+        if self.feature_names_in_ is None:
+            self.feature_names_in_ = list(X.columns)
+            width = len(self.feature_names_in_)
+            self.count_, self.mean_, self.m2_ = np.zeros(width), np.zeros(width), np.zeros(width)
+        values = self._values(X, np.float64)
+        if len(values) == 0:
+            return self
+
+        present = ~np.isnan(values)
+        count = present.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, np.nansum(values, axis=0) / count, 0.0)
+        m2 = np.nansum((values - mean) ** 2, axis=0)
+
+        total = self.count_ + count
+        delta = mean - self.mean_
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(total > 0, count / total, 0.0)
+            self.m2_ += m2 + delta ** 2 * np.where(total > 0, self.count_ * count / total, 0.0)
+        self.mean_ += delta * weight
+        self.count_ = total
+        self.n_rows_ += len(values)
+        return self
+
+    def fit(self, X, chunk_size=None):
+        self._reset()
+        chunk_size = chunk_size or max(len(X), 1)
+        for start in range(0, max(len(X), 1), chunk_size):
+            self.partial_fit(X.iloc[start:start + chunk_size])
+        return self
+
+    @property
+    def columns_(self):
+        return [name for name, count in zip(self.feature_names_in_, self.count_) if count > 0]
+
+    def transform(self, X, copy=True):
+        """Impute and scale to a float32 DataFrame with the fitted columns.
+
+        Columns missing from ``X`` are treated as all-NaN. With ``copy=False`` a writeable
+        float32 ndarray laid out in the fitted columns is transformed in place.
+        """
+        if self.feature_names_in_ is None:
+            raise ValueError("Preprocessor has not been fitted yet. Call fit() first.")
+        kept = self.count_ > 0
+        if isinstance(X, np.ndarray) and not copy and X.dtype == self.dtype and X.flags.writeable:
+            values = X
+        else:
+            values = self._values(X, self.dtype, self.columns_)
+
+        mean, scale, fill = (array.astype(self.dtype) for array in self._statistics(kept))
+        missing = np.isnan(values)
+        values -= mean
+        values /= scale
+        np.copyto(values, np.broadcast_to(fill, values.shape), where=missing)
+
+        if isinstance(X, np.ndarray):
+            return values
+        return pd.DataFrame(values, columns=self.columns_, index=X.index, copy=False)
+
+    def fit_transform(self, X, chunk_size=None):
+        return self.fit(X, chunk_size).transform(X)
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(self, path)
+        logger.info(f"Saved preprocessor to {path}")
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
+
+    def _statistics(self, kept):
+        mean = self.mean_[kept]
+        # Imputed rows count towards the variance denominator, as in impute-then-scale.
+        variance = self.m2_[kept] / self.n_rows_ if self.imputer_strategy == 'mean' else self._constant_variance(kept)
+        scale = np.sqrt(variance)
+        scale[scale == 0] = 1.0
+        if self.imputer_strategy == 'mean':
+            return mean, scale, np.zeros_like(mean)
+        center = self._constant_mean(kept)
+        return center, scale, (self.fill_value - center) / scale
+
+    def _constant_mean(self, kept):
+        count = self.count_[kept]
+        return (self.mean_[kept] * count + self.fill_value * (self.n_rows_ - count)) / self.n_rows_
+
+    def _constant_variance(self, kept):
+        # Filled rows shift the mean, so their deviation from the combined mean adds to the sum of squares.
+        count = self.count_[kept]
+        center = self._constant_mean(kept)
+        m2 = (self.m2_[kept] + count * (self.mean_[kept] - center) ** 2
+              + (self.n_rows_ - count) * (self.fill_value - center) ** 2)
+        return m2 / self.n_rows_
+
+    def _values(self, X, dtype, columns=None):
+        if isinstance(X, np.ndarray):
+            return np.array(X, dtype=dtype, order='C')
+        columns = columns if columns is not None else self.feature_names_in_
+        return X.reindex(columns=columns).to_numpy(dtype=dtype, na_value=np.nan)
+
+    def _reset(self):
+        self.feature_names_in_ = None
+        self.n_rows_ = 0
+        self.count_ = self.mean_ = self.m2_ = None
@@ -0,0 +1,22 @@
+# data/provider_factory.py
+from utils.plugins import PluginRegistry
+
+
+class ProviderFactory:
+    PROVIDERS = PluginRegistry('data provider', 'optimal_options.providers', {
+        'yfinance': 'data.data_fetcher:OptionDataFetcher',
+        'local': 'data.local_data_fetcher:LocalDataFetcher',
+        'simulated': 'data.simulated_data_fetcher:SimulatedDataFetcher',
+    })
+
+    @staticmethod
+    def provider_type(config):
+        return config.get_nested('data', 'provider', 'type', default='yfinance')
+
+    @staticmethod
+    def create_fetcher(config, ticker, start_date, end_date, **resources):
+        """A fetcher of the configured provider, built with that provider's section of data.provider."""
+        provider_type = ProviderFactory.provider_type(config)
+        options = config.get_nested('data', 'provider', provider_type, default=None) or {}
+        return ProviderFactory.PROVIDERS.get(provider_type)(
+            ticker, start_date, end_date, expirations=config.get_nested('data', 'expirations'), **resources, **options)
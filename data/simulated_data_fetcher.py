@@ -0,0 +1,298 @@
+# data/simulated_data_fetcher.py
+import math
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from features.implied_volatility import black_scholes_price
+from .base_data_fetcher import OPTION_TYPES, BaseDataFetcher
+
+BARS_PER_DAY = 7  # Hourly bars from 09:30 to 15:30
+TRADING_DAYS = 252
+RISK_FREE_RATE = 0.05
+DEFAULT_BARS = 2000  # Without a start date
+DEFAULT_HESTON = {'kappa': 3.0, 'xi': 0.6, 'rho': -0.7}
+SECTORS = ['Technology', 'Healthcare', 'Financial Services', 'Energy', 'Consumer Cyclical']
+BAR_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits']
+CHAIN_COLUMNS = ['contractSymbol', 'lastTradeDate', 'strike', 'lastPrice', 'bid', 'ask', 'change', 'percentChange',
+                 'volume', 'openInterest', 'impliedVolatility', 'inTheMoney', 'contractSize', 'currency']
+# The simulated index is the market the VIX is read from.
+INDEX_PARAMETERS = {'spot': 5000.0, 'vol': 0.16, 'drift': 0.07}
+
+
+@lru_cache(maxsize=16)
+def trading_hours(start_date, end_date, n_bars=None):
+    """Hourly bar timestamps on business days before ``end_date``, the last ``n_bars`` or all from ``start_date``."""
+    end = pd.Timestamp(end_date).normalize() - timedelta(days=1)
+    if n_bars is None:
+        days = pd.bdate_range(start=start_date, end=end)
+    else:
+        days = pd.bdate_range(end=end, periods=-(-n_bars // BARS_PER_DAY))
+    index = days.repeat(BARS_PER_DAY) + pd.to_timedelta(np.tile(np.arange(BARS_PER_DAY) * 60 + 570, len(days)), unit='min')
+    return index[-n_bars if n_bars else 0:].tz_localize('America/New_York')
+
+
+def heston_smile(variance, theta, kappa, xi, rho, T, log_moneyness):
+    """Black-Scholes volatilities of the Heston model to first order in vol of vol.
+
+    The at-the-money level is the expected average variance to expiry; the skew is
+    rho * xi / (4 * sigma) at short expiries and flattens as kappa * T grows.
+    """
+    kT = kappa * T
+    decay = (1 - np.exp(-kT)) / kT
+    atm = np.sqrt(theta + (variance - theta) * decay)
+    skew = rho * xi / (2 * kT * atm) * (1 - decay)
+    return np.maximum(atm + skew * log_moneyness, 0.05)
+
+
+class SimulatedMarket:
+    """GBM or Heston paths and option surfaces generated for a block of tickers at once.
+
+    Each ticker draws from its own generator seeded by its name, so it is the same whichever
+    block it lands in; everything after the draws, including the Heston variance recursion
+    (daily Euler steps) and Black-Scholes pricing of every contract, runs on whole-block arrays.
+    A few recent blocks are kept so the fetchers of one block share a single generation.
+    """
+
+    def __init__(self, index, today, model='heston', n_expirations=8, n_strikes=40, seed=0, heston=None,
+                 block_size=256, max_blocks=2):
+        if model not in ('gbm', 'heston'):
+            raise ValueError(f"Unknown simulation model: {model}")
+        self.index = index
+        self.today = pd.Timestamp(today).normalize()
+        self.model = model
+        self.n_expirations = n_expirations
+        self.n_strikes = n_strikes
+        self.seed = seed
+        self.heston = {**DEFAULT_HESTON, **(heston or {})}
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.expirations = self._expirations()
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expirations(self):
+        friday = self.today + timedelta(days=(4 - self.today.weekday()) % 7 or 7)
+        weeks = [week if week < 4 else 4 + (week - 4) * 4 for week in range(self.n_expirations)]
+        return [(friday + timedelta(weeks=week)).strftime('%Y-%m-%d') for week in weeks]
+
+    def _rng(self, symbol, *salt):
+        return np.random.default_rng([self.seed, zlib.crc32(symbol.encode()), *salt])
+
+    def parameters(self, symbol):
+        if symbol.startswith('^'):
+            return INDEX_PARAMETERS
+        rng = self._rng(symbol)
+        return {'spot': float(rng.uniform(20, 500)), 'vol': float(rng.uniform(0.15, 0.6)),
+                'drift': float(rng.normal(0.05, 0.1))}
+
+    def info(self, symbol):
+        rng = self._rng(symbol, 2)
+        return {'volume': int(rng.integers(1e6, 1e8)), 'marketCap': int(rng.integers(1e9, 3e12)),
+                'sector': SECTORS[int(rng.integers(len(SECTORS)))], 'trailingPE': float(rng.uniform(8, 60)),
+                'dividendYield': float(rng.uniform(0, 0.04)), 'beta': float(rng.uniform(0.5, 2.0))}
+
+    def lookup(self, symbol, universe=None):
+        """(block, row) of ``symbol``, generating its block of ``universe`` if it is not held."""
+        universe = list(universe or [])
+        if symbol in universe:
+            position = universe.index(symbol) // self.block_size * self.block_size
+            symbols = tuple(universe[position:position + self.block_size])
+        else:
+            symbols = (symbol,)
+        with self._lock:
+            block = self._blocks.get(symbols)
+            if block is None:
+                block = self._blocks[symbols] = self.generate(symbols)
+                while len(self._blocks) > self.max_blocks:
+                    self._blocks.popitem(last=False)
+            self._blocks.move_to_end(symbols)
+        return block, symbols.index(symbol)
+
+    def clear(self):
+        with self._lock:
+            self._blocks.clear()
+
+    def generate(self, symbols):
+        block = self.simulate(symbols)
+        block.update(self.price(symbols, block))
+        return block
+
+    def simulate(self, symbols):
+        n_bars = len(self.index)
+        n_days = -(-n_bars // BARS_PER_DAY)
+        rngs = [self._rng(symbol, 1) for symbol in symbols]
+        params = [self.parameters(symbol) for symbol in symbols]
+        spot, vol, drift = (np.array([p[key] for p in params])[:, None] for key in ('spot', 'vol', 'drift'))
+        shocks = np.stack([rng.standard_normal(n_days * BARS_PER_DAY) for rng in rngs])
+
+        theta = vol ** 2
+        if self.model == 'heston':
+            kappa, xi, rho = self.heston['kappa'], self.heston['xi'], self.heston['rho']
+            # Each day's variance shock is correlated with that day's price shocks.
+            day_shocks = rho * shocks.reshape(len(symbols), n_days, BARS_PER_DAY).sum(axis=2) / math.sqrt(BARS_PER_DAY)
+            day_shocks += math.sqrt(1 - rho ** 2) * np.stack([rng.standard_normal(n_days) for rng in rngs])
+            variance = theta[:, 0] * np.array([rng.lognormal(0, 0.3) for rng in rngs])
+            daily = np.empty((len(symbols), n_days))
+            dt = 1 / TRADING_DAYS
+            for day in range(n_days):
+                daily[:, day] = variance
+                variance = np.maximum(variance + kappa * (theta[:, 0] - variance) * dt
+                                      + xi * np.sqrt(variance * dt) * day_shocks[:, day], 1e-6)
+            bar_variance = np.repeat(daily, BARS_PER_DAY, axis=1)[:, -n_bars:]
+        else:
+            variance = theta[:, 0]
+            bar_variance = np.broadcast_to(theta, (len(symbols), n_bars))
+
+        dt = 1 / (TRADING_DAYS * BARS_PER_DAY)
+        returns = (drift - 0.5 * bar_variance) * dt + np.sqrt(bar_variance * dt) * shocks[:, -n_bars:]
+        cumulative = np.cumsum(returns, axis=1)
+        close = spot * np.exp(cumulative - cumulative[:, -1:])
+        open_ = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+        wick = np.abs(np.stack([rng.standard_normal(n_bars) for rng in rngs])) * np.sqrt(bar_variance * dt)
+        volume = np.floor(np.stack([rng.pareto(1.5, n_bars) for rng in rngs]) * 1e5 + 1e4)
+        return {'bars': np.stack([open_, np.maximum(open_, close) * (1 + wick), np.minimum(open_, close) * (1 - wick),
+                                  close, volume], axis=2),
+                'bar_variance': bar_variance, 'variance': variance, 'theta': theta[:, 0]}
+
+    def price(self, symbols, paths):
+        # Every expiration and both types are priced, so which chains a fetcher asks for never
+        # changes the random draws behind any one of them.
+        m = len(symbols)
+        close = paths['bars'][:, :, 3]
+        spot = close[:, -1]
+        days = np.array([max((pd.Timestamp(exp) - self.today).days, 1) for exp in self.expirations])
+        shape = (m, len(self.expirations), len(OPTION_TYPES), self.n_strikes)
+        n = math.prod(shape[1:])
+
+        strikes = np.round(spot[:, None] * np.linspace(0.7, 1.3, self.n_strikes), 2)
+        strike = np.broadcast_to(strikes[:, None, None, :], shape).reshape(m, n)
+        T = np.broadcast_to((days / 365)[None, :, None, None], shape).reshape(m, n)
+        is_call = np.broadcast_to(np.array([True, False])[None, None, :, None], shape).reshape(m, n)
+        log_moneyness = np.log(strike / (spot[:, None] * np.exp(RISK_FREE_RATE * T)))
+        if self.model == 'heston':
+            sigma = heston_smile(paths['variance'][:, None], paths['theta'][:, None], self.heston['kappa'],
+                                 self.heston['xi'], self.heston['rho'], T, log_moneyness)
+        else:
+            sigma = np.broadcast_to(np.sqrt(paths['variance'])[:, None], (m, n))
+
+        rngs = [self._rng(symbol, 3) for symbol in symbols]
+        draw = lambda method, *args: np.stack([getattr(rng, method)(*args, n) for rng in rngs])
+        # Last trades happened up to two days of bars ago, at the spot of that bar.
+        trade_bars = draw('integers', max(close.shape[1] - 2 * BARS_PER_DAY, 0), close.shape[1])
+        last_price = np.maximum(black_scholes_price(np.take_along_axis(close, trade_bars, axis=1), strike, T,
+                                                    RISK_FREE_RATE, sigma, is_call)
+                                * draw('lognormal', 0, 0.05), 0.01).round(2)
+        fair = black_scholes_price(spot[:, None], strike, T, RISK_FREE_RATE, sigma, is_call)
+        spread = np.maximum(fair * draw('uniform', 0.02, 0.1), 0.01)
+        previous = last_price * draw('lognormal', 0, 0.1)
+        liquidity = np.exp(-4 * log_moneyness ** 2)
+        return {
+            'strikes': strikes,
+            'trade_bars': trade_bars,
+            'strike': strike,
+            'lastPrice': last_price,
+            'bid': np.maximum(fair - spread / 2, 0).round(2),
+            'ask': (fair + spread / 2).round(2),
+            'change': (last_price - previous).round(2),
+            'percentChange': (last_price / previous - 1) * 100,
+            'volume': np.floor(draw('pareto', 1.2) * 50 * liquidity),
+            'openInterest': np.floor(draw('pareto', 1.0) * 500 * liquidity),
+            'impliedVolatility': sigma * draw('lognormal', 0, 0.02),
+            'inTheMoney': np.where(is_call, strike < spot[:, None], strike > spot[:, None]),
+        }
+
+
+_markets = {}
+_markets_lock = threading.Lock()
+
+
+def shared_market(index, today, **options):
+    """The SimulatedMarket for this bar index, date and options, shared by every fetcher of a run."""
+    key = (index[0], index[-1], len(index), pd.Timestamp(today).normalize(), repr(sorted(options.items())))
+    with _markets_lock:
+        if key not in _markets:
+            _markets.clear()
+            _markets[key] = SimulatedMarket(index, today, **options)
+        return _markets[key]
+
+
+class SimulatedDataFetcher(BaseDataFetcher):
+    """An offline market: bars from GBM or Heston paths and chains priced off them.
+
+    Hourly bars cover the configured date range (or the last ``n_bars``) and end at each
+    ticker's spot; ``^GSPC`` is one more simulated symbol and ``^VIX`` is its volatility.
+    Chains quote ``n_strikes`` strikes from 70% to 130% of spot for weekly, then four-weekly,
+    expirations, with last prices from a stale trade, bid/ask spreads and power-law volume and
+    open interest. Under Heston the smile and term structure follow the current variance; under
+    GBM the volatility is flat. ``universe`` (the run's tickers) lets a fetcher generate its
+    whole block of tickers at once, see SimulatedMarket.
+    """
+
+    def __init__(self, ticker, start_date, end_date, cache=None, expirations=None, model='heston', n_expirations=8,
+                 n_strikes=40, n_bars=None, seed=0, heston=None, block_size=256, universe=None, **kwargs):
+        super().__init__(ticker, start_date, end_date, cache=cache, expirations=expirations)
+        today = self._now()
+        n_bars = n_bars or (None if start_date else DEFAULT_BARS)
+        index = trading_hours(start_date if n_bars is None else None, end_date or today.strftime('%Y-%m-%d'), n_bars)
+        self.market = shared_market(index, today, model=model, n_expirations=n_expirations, n_strikes=n_strikes,
+                                    seed=seed, heston=heston, block_size=block_size)
+        self.universe = universe
+
+    def _get_expirations(self):
+        return self.market.expirations
+
+    def _get_history(self, symbol, interval):
+        block, row = self.market.lookup('^GSPC' if symbol == '^VIX' else symbol, self.universe)
+        if symbol == '^VIX':
+            level = 100 * np.sqrt(block['bar_variance'][row])
+            values = np.column_stack([level, level, level, level, np.zeros(len(level))])
+        else:
+            values = block['bars'][row]
+        bars = pd.DataFrame(np.column_stack([values, np.zeros((len(values), 2))]),
+                            index=self.market.index, columns=BAR_COLUMNS)
+        if interval == '1h':
+            return bars
+        if interval == '1d':
+            return bars.groupby(bars.index.normalize()).agg({'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last',
+                                                             'Volume': 'sum', 'Dividends': 'sum', 'Stock Splits': 'sum'})
+        raise ValueError(f"Unsupported interval: {interval}")
+
+    def _get_info(self):
+        return self.market.info(self.ticker)
+
+    def _get_option_chain(self, expiration, option_type):
+        return self._chains([expiration], [option_type], labelled=False)
+
+    def _get_option_chains(self, expirations):
+        return self._chains(expirations, self.expirations['option_types'], labelled=True)
+
+    def _chains(self, expirations, option_types, labelled):
+        # The surface is laid out expiration-major, then calls before puts, then by strike.
+        block, row = self.market.lookup(self.ticker, self.universe)
+        all_expirations, types, n_strikes = self.market.expirations, list(OPTION_TYPES), self.market.n_strikes
+        requests = [(exp, option_type) for exp in expirations for option_type in option_types if exp in all_expirations]
+        starts = np.array([(all_expirations.index(exp) * len(types) + types.index(option_type)) * n_strikes
+                           for exp, option_type in requests], dtype=int)
+        rows = (starts[:, None] + np.arange(n_strikes)).ravel()
+
+        strikes = block['strikes'][row]
+        prefixes = np.array([f"{self.ticker}{exp[2:4]}{exp[5:7]}{exp[8:10]}{option_type[0].upper()}"
+                             for exp, option_type in requests], dtype=object)
+        suffixes = np.array([f"{int(round(value * 1000)):08d}" for value in strikes], dtype=object)
+        columns = {
+            'contractSymbol': np.add.outer(prefixes, suffixes).ravel(),
+            'lastTradeDate': self.market.index[block['trade_bars'][row][rows]].tz_convert('UTC'),
+            **{column: block[column][row][rows] for column in CHAIN_COLUMNS[2:12]},
+            'contractSize': 'REGULAR',
+            'currency': 'USD',
+        }
+        if labelled:
+            columns['expiration'] = np.repeat([exp for exp, _ in requests], n_strikes)
+            columns['option_type'] = np.repeat([OPTION_TYPES[option_type] for _, option_type in requests], n_strikes)
+        return pd.DataFrame(columns)
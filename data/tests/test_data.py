@@ -1,4 +1,414 @@
 # Core tests for data
 
 import pytest
+import numpy as np
+import pandas as pd
+import yaml
+from datetime import datetime, timedelta
+from pathlib import Path
 
+from utils.config_manager import ConfigManager
+import data.data_pipeline as data_pipeline
+from data.data_pipeline import DataPipeline
+from data.cache import DataCache, CacheMissError
+from data.bar_store import BarStore, find_gaps
+from data.bulk_bars import BulkBarLoader
+import data.bulk_bars as bulk_bars
+from data.data_fetcher import OptionDataFetcher
+import data.data_fetcher as data_fetcher
+from data.local_data_fetcher import LocalDataFetcher, record
+from data.provider_factory import ProviderFactory
+from data.simulated_data_fetcher import SimulatedDataFetcher
+from utils.plugins import PluginRegistry
+
+CONFIG_PATH = Path(__file__).resolve().parents[2] / 'config.yaml'
+
+
+def make_underlying(n_bars=300, start_price=100.0, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2024-01-02 09:30', periods=n_bars, freq='h', tz='America/New_York')
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 0.005, n_bars)))
+    return pd.DataFrame({'Open': close, 'High': close * 1.002, 'Low': close * 0.998,
+                         'Close': close, 'Volume': rng.integers(1_000, 10_000, n_bars)}, index=index)
+
+
+def make_calls(spot=100.0, n_strikes=15, seed=0):
+    rng = np.random.default_rng(seed)
+    strikes = np.linspace(spot * 0.8, spot * 1.2, n_strikes)
+    last_price = np.maximum(spot - strikes, 0) + rng.uniform(0.5, 3.0, n_strikes)
+    return pd.DataFrame({
+        'contractSymbol': [f'TEST{int(k * 1000):08d}' for k in strikes],
+        'strike': strikes,
+        'lastPrice': last_price,
+        'bid': last_price * 0.98,
+        'ask': last_price * 1.02,
+        'volume': rng.integers(0, 500, n_strikes).astype(float),
+        'openInterest': rng.integers(0, 5_000, n_strikes).astype(float),
+    })
+
+
+def write_config(tmp_path, **data_overrides):
+    with open(CONFIG_PATH) as file:
+        config = yaml.safe_load(file)
+    config['data'].update(data_overrides)
+    config['cache']['enabled'] = False
+    config['bar_store']['enabled'] = False
+    config['data']['bulk_download']['enabled'] = False
+    config['feature_store']['enabled'] = False
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump(config))
+    return ConfigManager(str(path))
+
+
+class FakeFetcher:
+    failing = set()
+
+    def __init__(self, ticker, start_date, end_date, **kwargs):
+        self.ticker = ticker
+
+    def fetch_data(self):
+        if self.ticker in self.failing:
+            raise ValueError("network down")
+        seed = sum(map(ord, self.ticker))
+        expiration = (datetime.now() + timedelta(days=45)).strftime('%Y-%m-%d')
+        return make_calls(seed=seed), make_underlying(seed=seed), expiration
+
+
+@pytest.fixture
+def fake_fetcher(monkeypatch):
+    FakeFetcher.failing = set()
+    monkeypatch.setattr(data_pipeline.ProviderFactory, 'PROVIDERS',
+                        PluginRegistry('data provider', 'optimal_options.providers', {'yfinance': FakeFetcher}))
+    return FakeFetcher
+
+
+def test_concurrent_processing_matches_sequential(tmp_path, fake_fetcher):
+    tickers = ['AAA', 'BBB', 'CCC', 'DDD', 'EEE']
+    sequential = DataPipeline(write_config(tmp_path, tickers=tickers, concurrency={'max_workers': 1})).process_data()
+    pipeline = DataPipeline(write_config(tmp_path, tickers=tickers, concurrency={'max_workers': 3, 'prefetch': 1}))
+    concurrent = pipeline.process_data()
+
+    pd.testing.assert_frame_equal(sequential.drop(columns='time_to_expiry'), concurrent.drop(columns='time_to_expiry'))
+    assert concurrent['ticker'].unique().tolist() == tickers
+    assert {'fetch', 'features', 'target', 'wall'} <= set(pipeline.stage_timings)
+    # Each configured feature node runs once per ticker; nothing unrequested is computed.
+    assert {'greeks', 'rsi', 'historical_volatility'} <= set(pipeline.node_timings)
+    assert 'price_to_strike' not in concurrent.columns
+
+
+def test_concurrent_processing_isolates_ticker_failures(tmp_path, fake_fetcher):
+    fake_fetcher.failing = {'BBB'}
+    pipeline = DataPipeline(write_config(tmp_path, tickers=['AAA', 'BBB', 'CCC'], concurrency={'max_workers': 2}))
+    combined = pipeline.process_data()
+    assert combined['ticker'].unique().tolist() == ['AAA', 'CCC']
+
+
+def test_feature_store_round_trips_snapshots_by_date_range(tmp_path, fake_fetcher):
+    config = write_config(tmp_path, tickers=['AAA', 'BBB'], concurrency={'max_workers': 1})
+    config.config['feature_store'] = {'enabled': True, 'directory': str(tmp_path / 'store')}
+    pipeline = DataPipeline(config)
+    for day in ['2024-07-01', '2024-07-02', '2024-07-03']:
+        pipeline._now = lambda day=day: datetime.fromisoformat(day)
+        combined = pipeline.process_data()
+
+    loaded = pipeline.load_feature_store('2024-07-02', '2024-07-03')
+    assert sorted(loaded['snapshot_date'].unique()) == ['2024-07-02', '2024-07-03']
+    assert len(loaded) == 2 * len(combined)
+    # Column projection: raw chain columns stay on disk.
+    assert 'strike' not in loaded.columns and {'rsi', 'delta', 'target', 'ticker'} <= set(loaded.columns)
+    latest = loaded[loaded['snapshot_date'] == '2024-07-03'].reset_index(drop=True)
+    pd.testing.assert_series_equal(latest['rsi'], combined['rsi'], check_dtype=False)
+
+    config.config['target']['params']['profit_threshold'] = 0.01
+    assert pipeline.feature_store.read(feature_set_version=pipeline.feature_set_version()).empty
+
+
+def test_dtype_policy_compacts_frames_and_concat_keeps_categoricals():
+    from data.dtype_policy import DtypePolicy, concat_frames, memory_usage
+
+    policy = DtypePolicy()
+    frames = []
+    for ticker, tz in [('AAA', 'America/New_York'), ('BBB', 'Europe/London')]:
+        frame = make_calls(n_strikes=200).assign(
+            ticker=ticker, option_type='call', huge=1e300,
+            lastTradeDate=pd.date_range('2024-07-01', periods=200, freq='min', tz=tz))
+        frame.loc[0, 'volume'] = np.nan
+        compact = policy.apply(frame)
+        assert memory_usage(compact) < memory_usage(frame)
+        frames.append(compact)
+
+    combined = concat_frames(frames)
+    assert isinstance(combined['ticker'].dtype, pd.CategoricalDtype)
+    assert combined['ticker'].cat.categories.tolist() == ['AAA', 'BBB']
+    assert combined['strike'].dtype == np.float32 and combined['huge'].dtype == np.float64
+    assert combined['volume'].dtype == 'Int32' and combined['volume'].isna().sum() == 2
+    assert combined['lastTradeDate'].dtype == 'datetime64[ns]'
+    assert combined['lastTradeDate'].iloc[0] == pd.Timestamp('2024-07-01 04:00')
+
+
+class FakeTicker:
+    calls_made = []
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    @property
+    def options(self):
+        self.calls_made.append(('options', self.symbol))
+        return tuple((datetime.now() + timedelta(days=days)).strftime('%Y-%m-%d') for days in (10, 40, 70))
+
+    def option_chain(self, expiration):
+        self.calls_made.append(('option_chain', self.symbol))
+        return type('Chain', (), {'calls': make_calls(), 'puts': make_calls()})()
+
+    def history(self, start=None, end=None, interval='1d'):
+        self.calls_made.append(('history', self.symbol))
+        return make_underlying()
+
+    @property
+    def info(self):
+        self.calls_made.append(('info', self.symbol))
+        return {'volume': 1000, 'marketCap': 10**9, 'sector': 'Technology'}
+
+
+@pytest.fixture
+def fake_ticker(monkeypatch):
+    FakeTicker.calls_made = []
+    monkeypatch.setattr(data_fetcher.yf, 'Ticker', FakeTicker)
+    return FakeTicker
+
+
+def test_cache_reads_through_and_replays_offline(tmp_path, fake_ticker):
+    cache = DataCache(tmp_path / 'cache')
+    first = OptionDataFetcher('AAA', '2024-01-01', '2024-03-01', cache=cache).fetch_data()
+    network_calls = len(fake_ticker.calls_made)
+    second = OptionDataFetcher('AAA', '2024-01-01', '2024-03-01', cache=cache).fetch_data()
+    assert len(fake_ticker.calls_made) == network_calls
+
+    offline = DataCache(tmp_path / 'cache', offline=True)
+    replayed = OptionDataFetcher('AAA', '2024-01-01', '2024-03-01', cache=offline).fetch_data()
+    assert len(fake_ticker.calls_made) == network_calls
+    pd.testing.assert_frame_equal(first[0], replayed[0])
+    pd.testing.assert_frame_equal(second[1], replayed[1], check_freq=False)
+    with pytest.raises(CacheMissError):
+        OptionDataFetcher('BBB', '2024-01-01', '2024-03-01', cache=offline).fetch_data()
+
+
+def test_cache_ttl_and_size_eviction(tmp_path):
+    cache = DataCache(tmp_path / 'cache', ttls={'option_chain': 0}, max_size_mb=0.01)
+    fetches = []
+    fetch = lambda: fetches.append(1) or make_calls(n_strikes=200)
+    cache.get_frame('option_chain', 'AAA', fetch, expiration='2024-06-21')
+    cache.get_frame('option_chain', 'AAA', fetch, expiration='2024-06-21')
+    assert len(fetches) == 2
+
+    for expiration in ['2024-07-19', '2024-08-16', '2024-09-20']:
+        cache.get_frame('history', 'AAA', fetch, expiration=expiration)
+    total = sum(path.stat().st_size for path in (tmp_path / 'cache').glob('*/*/*.parquet'))
+    assert total <= cache.max_size_bytes
+
+
+def daily_bars(start, end):
+    index = pd.bdate_range(start, end, inclusive='left', tz='America/New_York')
+    return pd.DataFrame({'Close': np.arange(len(index), dtype=float) + index.day}, index=index)
+
+
+def test_bar_store_fetches_only_missing_ranges(tmp_path):
+    store = BarStore(tmp_path / 'bars')
+    requests = []
+    fetch = lambda start, end: requests.append((start, end)) or daily_bars(start, end)
+
+    first = store.get('AAA', '1d', '2024-01-01', '2024-03-01', fetch)
+    extended = store.get('AAA', '1d', '2024-01-01', '2024-03-15', fetch)
+    again = store.get('AAA', '1d', '2024-01-01', '2024-03-15', fetch)
+
+    assert requests == [('2024-01-01', '2024-03-01'), ('2024-03-01', '2024-03-15')]
+    assert extended.index.is_unique and extended.index.is_monotonic_increasing
+    assert extended.index[0] == first.index[0] and len(extended) == len(daily_bars('2024-01-01', '2024-03-15'))
+    pd.testing.assert_frame_equal(extended, again)
+
+    store.get('AAA', '1d', '2023-12-01', '2024-03-15', fetch)
+    assert requests[-1] == ('2023-12-01', '2024-01-01')
+
+
+def test_bar_store_does_not_cover_windows_that_returned_no_bars(tmp_path):
+    store = BarStore(tmp_path / 'bars')
+    requests = []
+    responses = iter([pd.DataFrame(), daily_bars('2024-01-01', '2024-03-01')])
+    fetch = lambda start, end: requests.append((start, end)) or next(responses)
+
+    assert len(store.get('AAA', '1d', '2024-01-01', '2024-03-01', fetch)) == 0
+    assert store.coverage('AAA', '1d') is None
+    bars = store.get('AAA', '1d', '2024-01-01', '2024-03-01', fetch)
+
+    assert requests == [('2024-01-01', '2024-03-01')] * 2
+    assert len(bars) == len(daily_bars('2024-01-01', '2024-03-01'))
+    assert store.coverage('AAA', '1d') == {'start': '2024-01-01', 'end': '2024-03-01'}
+
+
+def test_find_gaps_reports_missing_bars():
+    bars = daily_bars('2024-01-01', '2024-02-01')
+    holed = bars.drop(bars.index[5:12])
+    assert find_gaps(bars) == []
+    assert find_gaps(holed) == [(bars.index[4], bars.index[12])]
+
+
+@pytest.fixture
+def fake_download(monkeypatch):
+    requests = []
+
+    def download(tickers, start=None, end=None, interval='1d', **kwargs):
+        requests.append((tuple(tickers), start, end, interval))
+        if interval == '1h':
+            tickers = [ticker for ticker in tickers if ticker != 'DAILY']
+        frames = {}
+        for ticker in tickers:
+            bars = daily_bars(start, end)
+            # IPO inside the window: leading rows are NaN in the shared frame.
+            frames[ticker] = bars.iloc[3:] if ticker == 'LATE' else bars
+        frames = {ticker: bars.assign(Open=bars['Close'], High=bars['Close'], Low=bars['Close'], Volume=1.0)
+                  for ticker, bars in frames.items()}
+        return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+    monkeypatch.setattr(bulk_bars.yf, 'download', download)
+    return requests
+
+
+def test_bulk_loader_hands_out_views_of_one_shared_frame(fake_download):
+    loader = BulkBarLoader(['AAA', 'LATE', 'DAILY', '^GSPC'], '2024-01-01', '2024-02-01', batch_size=2)
+    loader.load()
+
+    assert [request[0] for request in fake_download] == [('AAA', 'LATE'), ('DAILY', '^GSPC'), ('DAILY',)]
+    shared = loader.frames['1h'].to_numpy()
+    for symbol in ['AAA', 'LATE', '^GSPC']:
+        bars = loader.bars(symbol)
+        assert np.shares_memory(bars.to_numpy(), shared)
+        assert not bars['Close'].isna().any()
+    assert len(loader.bars('LATE')) == len(loader.bars('AAA')) - 3
+    assert loader.bars('DAILY') is None and loader.bars('DAILY', '1d') is not None
+
+
+def test_bulk_loader_only_downloads_missing_windows_through_store(tmp_path, fake_download):
+    store = BarStore(tmp_path / 'bars')
+    BulkBarLoader(['AAA', 'BBB'], '2024-01-01', '2024-02-01', bar_store=store).load()
+    loader = BulkBarLoader(['AAA', 'BBB'], '2024-01-01', '2024-02-15', bar_store=store)
+    loader.load()
+
+    assert fake_download[-1] == (('AAA', 'BBB'), '2024-02-01', '2024-02-15', '1h')
+    assert loader.bars('BBB').index[-1] == daily_bars('2024-01-01', '2024-02-15').index[-1]
+
+
+def test_fetcher_stacks_every_expiration_and_option_type(fake_ticker):
+    from features.feature_factory import FeatureFactory
+
+    fetcher = OptionDataFetcher('AAA', '2024-01-01', '2024-03-01',
+                                expirations={'mode': 'window', 'min_dte': 5, 'max_dte': 60, 'option_types': ['calls', 'puts']})
+    chain, underlying, nearest = fetcher.fetch_data()
+
+    assert chain.groupby(['expiration', 'option_type'], sort=False).size().tolist() == [15, 15, 15, 15]
+    assert chain['option_type'].unique().tolist() == ['call', 'put']
+    assert nearest == chain['expiration'].min()
+
+    for feature_type in ['basic', 'technical', 'advanced']:
+        chain = FeatureFactory.create_feature_engineer(feature_type, chain, underlying, nearest).engineer_features()
+    by_expiry = chain.groupby('expiration')['time_to_expiry'].unique()
+    assert [len(days) for days in by_expiry] == [1, 1] and by_expiry.iloc[0][0] < by_expiry.iloc[1][0]
+    puts = chain['option_type'] == 'put'
+    assert (chain.loc[puts, 'delta'].dropna() < 0).all() and (chain.loc[~puts, 'delta'].dropna() > 0).all()
+
+
+def test_all_expirations_mode_skips_expirations_less_than_a_day_out():
+    fetcher = SimulatedDataFetcher('SYN1', None, None, expirations={'mode': 'all'})
+    expirations = ['2024-07-03', '2024-07-04', '2024-07-05', '2024-07-19']
+    assert fetcher.select_expirations(expirations, datetime(2024, 7, 3, 10)) == ['2024-07-05', '2024-07-19']
+
+
+def test_simulated_provider_is_seeded_per_ticker_and_shaped_like_yfinance():
+    expirations = {'mode': 'all', 'option_types': ['calls', 'puts']}
+    options = {'n_expirations': 3, 'n_strikes': 10, 'n_bars': 200, 'block_size': 2}
+    alone = SimulatedDataFetcher('SYN1', None, None, expirations=expirations, **options).fetch_data()
+    in_block = SimulatedDataFetcher('SYN1', None, None, expirations=expirations, universe=['SYN0', 'SYN1', 'SYN2'],
+                                    **options).fetch_data()
+    calls, underlying, nearest = in_block
+
+    pd.testing.assert_frame_equal(alone[0], calls)
+    pd.testing.assert_frame_equal(alone[1], underlying)
+    assert len(calls) == 3 * 10 * 2 and nearest == calls['expiration'].min()
+    assert calls.groupby(['expiration', 'option_type'], sort=False).size().index.get_level_values(1).tolist() == ['call', 'put'] * 3
+    assert len(underlying) == 200 and str(underlying.index.tz) == 'America/New_York'
+    assert (underlying['High'] >= underlying['Low']).all() and (calls['ask'] >= calls['bid']).all()
+    # Heston with rho < 0: the smile slopes down from low to high strikes.
+    chain = calls[(calls['expiration'] == nearest) & (calls['option_type'] == 'put')]
+    assert chain['impliedVolatility'].iloc[0] > chain['impliedVolatility'].iloc[-1]
+
+    fetcher = SimulatedDataFetcher('SYN1', None, None, model='gbm', **options)
+    assert list(fetcher.fetch_market_data().columns) == ['sp500', 'vix']
+    assert fetcher.fetch_fundamental_data()['beta'] is not None
+
+
+def test_local_provider_replays_a_recorded_provider(tmp_path):
+    expirations = {'mode': 'window', 'min_dte': 5, 'max_dte': 40, 'option_types': ['calls', 'puts']}
+    simulated = SimulatedDataFetcher('SYN1', '2024-01-01', '2024-03-01', expirations=expirations,
+                                     n_expirations=4, n_strikes=8)
+    record(simulated, tmp_path / 'market')
+    local = LocalDataFetcher('SYN1', '2024-01-01', '2024-03-01', expirations=expirations, directory=tmp_path / 'market')
+
+    expected, replayed = simulated.fetch_data(), local.fetch_data()
+    pd.testing.assert_frame_equal(expected[0], replayed[0])
+    pd.testing.assert_frame_equal(expected[1], replayed[1], check_freq=False)
+    assert expected[2] == replayed[2]
+    pd.testing.assert_frame_equal(simulated.fetch_market_data(), local.fetch_market_data(), check_freq=False)
+    assert LocalDataFetcher('MISSING', None, None, directory=tmp_path / 'market')._get_expirations() == []
+
+
+def test_pipeline_reads_the_configured_provider(tmp_path):
+    config = write_config(tmp_path, tickers=['AAA', 'BBB'], concurrency={'max_workers': 1},
+                          provider={'type': 'simulated', 'simulated': {'n_bars': 400, 'n_strikes': 12}})
+    combined = DataPipeline(config).process_data()
+    assert combined['ticker'].unique().tolist() == ['AAA', 'BBB'] and len(combined) > 0
+
+    with pytest.raises(ValueError, match="Unknown data provider: missing"):
+        ProviderFactory.create_fetcher(write_config(tmp_path, provider={'type': 'missing'}), 'AAA', None, None)
+
+
+def test_streaming_preprocessor_matches_batch_impute_and_scale(tmp_path):
+    from sklearn.impute import SimpleImputer
+    from sklearn.preprocessing import StandardScaler
+    from data.preprocessor import StreamingPreprocessor
+
+    rng = np.random.default_rng(3)
+    X = pd.DataFrame(rng.normal(5, 3, (1_000, 4)), columns=['a', 'b', 'c', 'empty'])
+    X = X.mask(rng.random(X.shape) < 0.1)
+    X['empty'] = np.nan
+    X['constant'] = 2.0
+
+    preprocessor = StreamingPreprocessor().fit(X, chunk_size=97)
+    expected = StandardScaler().fit_transform(SimpleImputer(strategy='mean').fit_transform(X.drop(columns='empty')))
+    transformed = preprocessor.transform(X)
+    assert transformed.columns.tolist() == ['a', 'b', 'c', 'constant']
+    assert transformed.dtypes.eq(np.float32).all()
+    np.testing.assert_allclose(transformed.to_numpy(), expected, atol=1e-5)
+
+    preprocessor.save(tmp_path / 'preprocessor.joblib')
+    values = X[preprocessor.columns_].to_numpy(dtype=np.float32)
+    result = StreamingPreprocessor.load(tmp_path / 'preprocessor.joblib').transform(values, copy=False)
+    assert result is values
+    np.testing.assert_allclose(values, expected, atol=1e-5)
+
+
+@pytest.mark.parametrize('target_type', ['profit', 'delta_profit'])
+def test_panel_mode_matches_per_ticker_feature_engineering(tmp_path, fake_fetcher, target_type):
+    config = write_config(tmp_path, tickers=['AAA', 'BBB', 'CCC'], concurrency={'max_workers': 1})
+    config.config['target']['type'] = target_type
+    per_ticker = DataPipeline(config).process_data()
+    config.config['features']['panel_mode'] = True
+    pipeline = DataPipeline(config)
+    panel = pipeline.process_data()
+
+    assert list(panel.columns) == list(per_ticker.columns)
+    pd.testing.assert_frame_equal(panel, per_ticker, check_dtype=False, check_categorical=False, rtol=1e-9)
+    assert {'greeks', 'rsi', 'historical_volatility'} <= set(pipeline.node_timings)
+
+    # Panel kernels only compute last values, so other indicator modes stay per ticker.
+    config.config['features']['indicators']['mode'] = 'full'
+    assert pipeline._panel_mode() and not DataPipeline(config)._panel_mode()
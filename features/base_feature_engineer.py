@@ -1,14 +1,45 @@
 from abc import ABC, abstractmethod
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from .feature_graph import UNDERLYING, feature
+
+def call_mask(options):
+    # Frames from the full-chain fetch carry an option_type column; older single-chain frames are calls only.
+    if 'option_type' in options.columns:
+        return (options['option_type'] == 'call').to_numpy()
+    return np.ones(len(options), dtype=bool)
+
+def days_to_expiry(options, expiration_date, now=None):
+    now = now or datetime.now()
+    if 'expiration' in options.columns:
+        return (pd.to_datetime(options['expiration']) - pd.Timestamp(now)).dt.days.to_numpy()
+    return (datetime.strptime(expiration_date, '%Y-%m-%d') - now).days
 
 class BaseFeatureEngineer(ABC):
     def __init__(self, calls, underlying, expiration_date):
         self.calls = calls
         self.underlying = underlying
         self.expiration_date = expiration_date
+        self.values = {}
 
-    @abstractmethod
     def engineer_features(self):
-        pass
+        # Runs this engineer's own features through the graph; inputs owned by other feature
+        # types are computed too unless they are already columns of the frame.
+        from .feature_graph import FeatureGraph
+        graph = FeatureGraph.default()
+        owner = graph.owner_of(type(self))
+        plan = graph.plan(graph.node_names(owner), available=self.calls.columns)
+        graph.evaluate(plan, {owner: self})
+        return self.calls
+
+    @feature('spot', inputs=[UNDERLYING], kind='value')
+    def current_price(self):
+        return self.underlying['Close'].iloc[-1]
+
+    @feature('is_call', kind='value')
+    def option_types(self):
+        return call_mask(self.calls)
 
 class BaseTargetEngineer(ABC):
     def __init__(self, calls, underlying):
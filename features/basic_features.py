@@ -1,18 +1,51 @@
-from .base_feature_engineer import BaseFeatureEngineer
-from datetime import datetime
+from .base_feature_engineer import BaseFeatureEngineer, days_to_expiry
+from .feature_graph import UNDERLYING, feature
+from .indicators import IncrementalVolatility, volatility_last
 import numpy as np
 
+VOLATILITY_WINDOWS = [10, 30, 60]
+
+def volatility_state():
+    return {f'volatility_{window}': IncrementalVolatility(window) for window in VOLATILITY_WINDOWS}
+
 class BasicFeatureEngineer(BaseFeatureEngineer):
-    def engineer_features(self):
-        current_price = self.underlying['Close'].iloc[-1]
-        self.calls['moneyness'] = current_price / self.calls['strike']
-        self.calls['time_to_expiry'] = (datetime.strptime(self.expiration_date, '%Y-%m-%d') - datetime.now()).days
-        
-        self.underlying['returns'] = self.underlying['Close'].pct_change()
-        
-        for window in [10, 30, 60]:
-            self.calls[f'historical_volatility_{window}d'] = self.underlying['returns'].rolling(window=window).std() * np.sqrt(252)
-        
-        self.calls['volume_oi_ratio'] = self.calls['volume'] / self.calls['openInterest'].replace(0, 1)
-        
-        return self.calls
+    def __init__(self, calls, underlying, expiration_date, mode='full', state_store=None, ticker=None):
+        super().__init__(calls, underlying, expiration_date)
+        self.mode = mode
+        self.state_store = state_store
+        self.ticker = ticker
+
+    @feature('moneyness', inputs=['spot'])
+    def calculate_moneyness(self):
+        return self.values['spot'] / self.calls['strike']
+
+    @feature('time_to_expiry')
+    def calculate_time_to_expiry(self):
+        return days_to_expiry(self.calls, self.expiration_date)
+
+    @feature('historical_volatility', inputs=[UNDERLYING], outputs=[f'historical_volatility_{window}d' for window in VOLATILITY_WINDOWS])
+    def calculate_historical_volatility(self):
+        return tuple(self._historical_volatility().values())
+
+    @feature('volume_oi_ratio')
+    def calculate_volume_oi_ratio(self):
+        return self.calls['volume'] / self.calls['openInterest'].replace(0, 1)
+
+    def _historical_volatility(self):
+        # Contracts get the latest reading; assigning the whole time-indexed rolling series to the
+        # contract frame would only align on index labels and leave NaN.
+        if self.mode == 'full':
+            self.underlying['returns'] = self.underlying['Close'].pct_change()
+            return {window: self.underlying['returns'].rolling(window=window).std().iloc[-1] * np.sqrt(252)
+                    for window in VOLATILITY_WINDOWS}
+        if self.mode == 'last':
+            close = self.underlying['Close'].to_numpy()
+            return {window: volatility_last(close, window) for window in VOLATILITY_WINDOWS}
+        if self.mode == 'incremental':
+            if self.state_store is None or self.ticker is None:
+                raise ValueError("Incremental indicators need a state store and a ticker")
+            state = self.state_store.load(self.ticker, 'basic', volatility_state)
+            current = state.update(self.underlying['Close'])
+            self.state_store.save(self.ticker, 'basic', state)
+            return {window: current.indicators[f'volatility_{window}'].value for window in VOLATILITY_WINDOWS}
+        raise ValueError(f"Unknown indicator mode: {self.mode}")
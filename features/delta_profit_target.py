@@ -1,19 +1,45 @@
 # features/delta_profit_target.py
 
-from .base_feature_engineer import BaseTargetEngineer
+from .base_feature_engineer import BaseTargetEngineer, call_mask, days_to_expiry
+from .greeks import GREEK_NAMES, compute_greeks
+from .implied_volatility import implied_volatility
+import numpy as np
 
 class DeltaProfitTargetEngineer(BaseTargetEngineer):
-    def __init__(self, calls, underlying, profit_threshold=0.005, delta_threshold=0.5):
+    def __init__(self, calls, underlying, profit_threshold=0.005, delta_threshold=0.5,
+                 expiration_date=None, risk_free_rate=0.05):
         super().__init__(calls, underlying)
         self.profit_threshold = profit_threshold
         self.delta_threshold = delta_threshold
+        self.expiration_date = expiration_date
+        self.risk_free_rate = risk_free_rate
 
     def create_target(self):
         current_price = self.underlying['Close'].iloc[-1]
-        self.calls['potential_profit'] = (current_price - self.calls['strike']).clip(lower=0) - self.calls['lastPrice']
+        payoff = np.where(call_mask(self.calls), current_price - self.calls['strike'], self.calls['strike'] - current_price)
+        self.calls['potential_profit'] = payoff.clip(min=0) - self.calls['lastPrice']
         self.calls['profit_percentage'] = self.calls['potential_profit'] / self.calls['lastPrice']
         
-        # Assuming 'delta' is already calculated in the calls DataFrame
-        self.calls['target'] = (self.calls['profit_percentage'] > self.profit_threshold) & (self.calls['delta'] > self.delta_threshold)
+        if 'delta' not in self.calls.columns:
+            self.calls['delta'] = self._calculate_delta()
+        self.calls['target'] = (self.calls['profit_percentage'] > self.profit_threshold) & (self.calls['delta'].abs() > self.delta_threshold)
         
-        return self.calls
\ No newline at end of file
+        return self.calls
+
+    def _calculate_delta(self):
+        # Without the advanced features the target still needs delta, so it goes through the same
+        # Greeks engine rather than running the whole advanced feature pass.
+        current_price = self.underlying['Close'].iloc[-1]
+        if 'time_to_expiry' in self.calls.columns:
+            days = self.calls['time_to_expiry'].to_numpy()
+        else:
+            days = days_to_expiry(self.calls, self.expiration_date)
+        T = days / 365
+        if 'implied_volatility' in self.calls.columns:
+            sigma = self.calls['implied_volatility'].to_numpy()
+        else:
+            sigma = implied_volatility(self.calls['lastPrice'].to_numpy(), current_price, self.calls['strike'].to_numpy(),
+                                       T, self.risk_free_rate, is_call=call_mask(self.calls))
+        greeks = compute_greeks(current_price, self.calls['strike'].to_numpy(), T, self.risk_free_rate, sigma,
+                                is_call=call_mask(self.calls))
+        return greeks[GREEK_NAMES.index('delta')]
@@ -2,7 +2,7 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from utils.logger import app_logger as logger
+from utils.logger import LazyText, app_logger as logger
 
 class FeatureEngineer:
     def __init__(self, calls, underlying, expiration_date):
@@ -12,8 +12,8 @@ class FeatureEngineer:
 
     def engineer_features(self):
         logger.info("Starting feature engineering...")
-        logger.debug(f"Columns in calls data: {self.calls.columns}")
-        logger.debug(f"Underlying data shape: {self.underlying.shape}")
+        logger.debug("Columns in calls data: %s", self.calls.columns)
+        logger.debug("Underlying data shape: %s", self.underlying.shape)
         
         try:
             current_price = self.underlying['Close'].iloc[-1]
@@ -27,7 +27,7 @@ class FeatureEngineer:
             
             self.calls['volume_oi_ratio'] = self.calls['volume'] / self.calls['openInterest'].replace(0, 1)
             
-            logger.debug(f"Columns after feature engineering: {self.calls.columns}")
+            logger.debug("Columns after feature engineering: %s", self.calls.columns)
             logger.info(f"Number of rows after feature engineering: {len(self.calls)}")
         except Exception as e:
             logger.error(f"Error in engineer_features: {str(e)}")
@@ -37,7 +37,7 @@ class FeatureEngineer:
 
     def create_target(self, calls_with_features):
         logger.info("Creating target variable...")
-        logger.debug(f"Columns in calls_with_features: {calls_with_features.columns}")
+        logger.debug("Columns in calls_with_features: %s", calls_with_features.columns)
         
         try:
             current_price = self.underlying['Close'].iloc[-1]
@@ -48,10 +48,10 @@ class FeatureEngineer:
             
             calls_with_features['target'] = calls_with_features['profit_percentage'] > 0.005  # 0.5% profit threshold
             
-            logger.debug(f"Columns after creating target: {calls_with_features.columns}")
+            logger.debug("Columns after creating target: %s", calls_with_features.columns)
             logger.info(f"Number of rows after creating target: {len(calls_with_features)}")
             logger.info(f"Number of positive targets: {calls_with_features['target'].sum()}")
-            logger.info(f"Target distribution: {calls_with_features['target'].value_counts(normalize=True)}")
+            logger.info("Target distribution: %s", LazyText(lambda: calls_with_features['target'].value_counts(normalize=True)))
         except Exception as e:
             logger.error(f"Error in create_target: {str(e)}")
             raise
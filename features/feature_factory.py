@@ -1,28 +1,35 @@
-from .basic_features import BasicFeatureEngineer
-from .technical_features import TechnicalFeatureEngineer
-from .advanced_features import AdvancedFeatureEngineer
-from .profit_target import ProfitTargetEngineer
-from .delta_profit_target import DeltaProfitTargetEngineer
+from utils.plugins import PluginRegistry
 
 class FeatureFactory:
+    # Also the node providers of the feature graph, in the order their shared nodes are claimed.
+    FEATURE_ENGINEERS = PluginRegistry('feature type', 'optimal_options.features', {
+        'basic': 'features.basic_features:BasicFeatureEngineer',
+        'technical': 'features.technical_features:TechnicalFeatureEngineer',
+        'advanced': 'features.advanced_features:AdvancedFeatureEngineer',
+    })
+    TARGET_ENGINEERS = PluginRegistry('target type', 'optimal_options.targets', {
+        'profit': 'features.profit_target:ProfitTargetEngineer',
+        'delta_profit': 'features.delta_profit_target:DeltaProfitTargetEngineer',
+    })
+
+    @staticmethod
+    def feature_engineer_classes():
+        return {name: FeatureFactory.FEATURE_ENGINEERS.get(name) for name in FeatureFactory.FEATURE_ENGINEERS.names()}
+
     @staticmethod
     def create_feature_engineer(feature_type, calls, underlying, expiration_date, **kwargs):
-        if feature_type == 'basic':
-            return BasicFeatureEngineer(calls, underlying, expiration_date)
-        elif feature_type == 'technical':
-            return TechnicalFeatureEngineer(calls, underlying, expiration_date)
-        elif feature_type == 'advanced':
-            return AdvancedFeatureEngineer(calls, underlying, expiration_date, **kwargs)
-        else:
-            raise ValueError(f"Unknown feature type: {feature_type}")
+        return FeatureFactory.FEATURE_ENGINEERS.get(feature_type)(calls, underlying, expiration_date, **kwargs)
 
     @staticmethod
     def create_target_engineer(target_type, calls, underlying, **kwargs):
+        target_class = FeatureFactory.TARGET_ENGINEERS.get(target_type)
         if target_type == 'profit':
-            return ProfitTargetEngineer(calls, underlying, profit_threshold=kwargs.get('profit_threshold', 0.005))
+            return target_class(calls, underlying, profit_threshold=kwargs.get('profit_threshold', 0.005))
         elif target_type == 'delta_profit':
-            return DeltaProfitTargetEngineer(calls, underlying, 
-                                             profit_threshold=kwargs.get('profit_threshold', 0.005),
-                                             delta_threshold=kwargs.get('delta_threshold', 0.5))
-        else:
-            raise ValueError(f"Unknown target type: {target_type}")
+            return target_class(calls, underlying, 
+                                profit_threshold=kwargs.get('profit_threshold', 0.005),
+                                delta_threshold=kwargs.get('delta_threshold', 0.5),
+                                expiration_date=kwargs.get('expiration_date'),
+                                risk_free_rate=kwargs.get('risk_free_rate', 0.05))
+        # Registered target types take the target params as keyword arguments.
+        return target_class(calls, underlying, **kwargs)
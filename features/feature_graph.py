@@ -0,0 +1,173 @@
+# features/feature_graph.py
+import time
+
+from utils.instrumentation import instrumentation
+
+# Inputs that name data rather than a node: 'underlying' marks a node that reads the underlying's
+# bars, so it has to be recomputed whenever the underlying moves.
+UNDERLYING = 'underlying'
+SOURCES = {UNDERLYING}
+
+
+def feature(name=None, inputs=(), outputs=None, kind='column'):
+    """Declare a feature engineer method as a node of the feature graph.
+
+    ``inputs`` name the features or values the method reads, or a source in SOURCES. A 'column' node returns the values
+    for its ``outputs`` (one value, or a tuple in ``outputs`` order) which are written to the
+    contract frame; a 'value' node returns an intermediate (e.g. the spot price) that is shared
+    with the other engineers through ``engineer.values`` and never becomes a column.
+    """
+    def decorate(method):
+        node_name = name or method.__name__
+        method._feature_node = {
+            'name': node_name,
+            'inputs': tuple(inputs),
+            'outputs': tuple(outputs or (node_name,)),
+            'kind': kind,
+        }
+        return method
+    return decorate
+
+
+class FeatureNode:
+    def __init__(self, name, owner, method, inputs, outputs, kind):
+        self.name = name
+        self.owner = owner
+        self.method = method
+        self.inputs = inputs
+        self.outputs = outputs
+        self.kind = kind
+
+    def __repr__(self):
+        return f"FeatureNode({self.name!r}, owner={self.owner!r})"
+
+
+class FeatureGraph:
+    """Resolves requested features to the nodes that produce them and runs each node once.
+
+    Nodes are collected from feature engineer classes keyed by feature type. ``plan`` walks the
+    inputs of the requested features depth-first and returns the nodes in dependency order, so
+    anything nobody asked for (directly or through an input) is never computed.
+    """
+
+    def __init__(self, engineer_classes):
+        self.engineer_classes = dict(engineer_classes)
+        self.nodes = {}
+        self.providers = {}
+        for owner, engineer_class in self.engineer_classes.items():
+            for attr in dir(engineer_class):
+                spec = getattr(getattr(engineer_class, attr), '_feature_node', None)
+                # Shared nodes (spot, is_call) are inherited by every engineer; the first owner wins.
+                if spec is None or spec['name'] in self.nodes:
+                    continue
+                node = FeatureNode(spec['name'], owner, getattr(engineer_class, attr),
+                                   spec['inputs'], spec['outputs'], spec['kind'])
+                self.nodes[node.name] = node
+                self.providers[node.name] = node.name
+                for output in node.outputs:
+                    self.providers.setdefault(output, node.name)
+
+    @classmethod
+    def default(cls):
+        from .feature_factory import FeatureFactory
+        return cls(FeatureFactory.feature_engineer_classes())
+
+    def owner_of(self, engineer_class):
+        return next(owner for owner, klass in self.engineer_classes.items() if klass is engineer_class)
+
+    def node_names(self, owner):
+        return [node.name for node in self.nodes.values() if node.owner == owner]
+
+    def output_columns(self, names):
+        columns = []
+        for name in names:
+            node = self.nodes.get(self.providers.get(name))
+            if node is not None and node.kind == 'column' and name == node.name:
+                columns.extend(node.outputs)
+            else:
+                columns.append(name)
+        return columns
+
+    def plan(self, requested, available=()):
+        """Nodes needed for ``requested``, in dependency order.
+
+        Dependencies whose outputs are already ``available`` columns are not recomputed.
+        Unknown requested names raise KeyError.
+        """
+        available = set(available)
+        order, done, visiting = [], set(), set()
+
+        def visit(name, is_dependency):
+            if is_dependency and name in SOURCES:
+                return
+            node_name = self.providers.get(name)
+            if node_name is None:
+                if is_dependency and name in available:
+                    return
+                raise KeyError(f"No feature engineer provides '{name}'")
+            node = self.nodes[node_name]
+            if node_name in done:
+                return
+            if is_dependency and node.kind == 'column' and set(node.outputs) <= available:
+                return
+            if node_name in visiting:
+                raise ValueError(f"Feature dependency cycle through '{node_name}'")
+            visiting.add(node_name)
+            for dependency in node.inputs:
+                visit(dependency, True)
+            visiting.discard(node_name)
+            done.add(node_name)
+            order.append(node)
+
+        for name in requested:
+            visit(name, False)
+        return order
+
+    def dependents(self, plan, sources):
+        """The nodes of ``plan`` that read any of ``sources``, directly or through their inputs.
+
+        Value nodes are always kept: they are cheap, and a dependent may need one (greeks read
+        is_call) that does not itself depend on the sources.
+        """
+        affected = set(sources)
+        selected = []
+        for node in plan:
+            if affected.intersection(node.inputs):
+                affected.add(node.name)
+                affected.update(node.outputs)
+                selected.append(node)
+            elif node.kind == 'value':
+                selected.append(node)
+        return selected
+
+    def evaluate(self, plan, engineers):
+        """Run ``plan`` against engineers keyed by feature type; returns seconds per node.
+
+        All engineers share the first engineer's frames and one ``values`` dict. Owners without an
+        engineer (a dependency from a feature type that is not configured) get a default one.
+        """
+        first = next(iter(engineers.values()))
+        calls, values = first.calls, first.values
+        for engineer in engineers.values():
+            engineer.values = values
+
+        timings = {}
+        for node in plan:
+            engineer = engineers.get(node.owner)
+            if engineer is None:
+                engineer = self.engineer_classes[node.owner](calls, first.underlying, first.expiration_date)
+                engineer.values = values
+                engineers[node.owner] = engineer
+
+            start = time.perf_counter()
+            with instrumentation.span('feature', node=node.name):
+                result = node.method(engineer)
+                if node.kind == 'value':
+                    values[node.name] = result
+                elif len(node.outputs) == 1:
+                    calls[node.outputs[0]] = result
+                else:
+                    for output, column in zip(node.outputs, result):
+                        calls[output] = column
+            timings[node.name] = time.perf_counter() - start
+        return timings
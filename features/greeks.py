@@ -0,0 +1,52 @@
+# features/greeks.py
+import numpy as np
+from scipy.special import ndtr
+
+GREEK_NAMES = ('delta', 'gamma', 'theta', 'vega', 'rho', 'vanna', 'volga')
+
+
+def compute_greeks(S, K, T, r, sigma, is_call=True, dtype=np.float64, out=None):
+    """Black-Scholes Greeks for calls and puts in a single pass.
+
+    d1, d2, the normal pdf and cdf are evaluated once and shared by every Greek. Inputs are
+    broadcast to contiguous 1-d arrays of ``dtype`` (float64 or float32); the result is a
+    (len(GREEK_NAMES), n) array whose rows follow GREEK_NAMES. Theta and rho are per year,
+    vega and volga per unit of volatility. Pass ``out`` to fill a preallocated buffer.
+    """
+    dtype = np.dtype(dtype)
+    S, K, T, sigma, is_call = np.broadcast_arrays(
+        np.asarray(S, dtype=dtype), np.asarray(K, dtype=dtype), np.asarray(T, dtype=dtype),
+        np.asarray(sigma, dtype=dtype), np.asarray(is_call, dtype=bool))
+    S, K, T, sigma, is_call = (np.ascontiguousarray(a.ravel()) for a in (S, K, T, sigma, is_call))
+    r = dtype.type(r)
+
+    if out is None:
+        out = np.empty((len(GREEK_NAMES), S.size), dtype=dtype)
+    elif out.shape != (len(GREEK_NAMES), S.size) or out.dtype != dtype:
+        raise ValueError(f"out must have shape {(len(GREEK_NAMES), S.size)} and dtype {dtype}")
+
+    sqrt_T = np.sqrt(T)
+    sigma_sqrt_T = sigma * sqrt_T
+    d1 = (np.log(S / K) + (r + dtype.type(0.5) * sigma * sigma) * T) / sigma_sqrt_T
+    d2 = d1 - sigma_sqrt_T
+    pdf_d1 = np.exp(dtype.type(-0.5) * d1 * d1) * dtype.type(1 / np.sqrt(2 * np.pi))
+    cdf_d1 = ndtr(d1)
+    cdf_d2 = ndtr(d2)
+    discounted_K = K * np.exp(-r * T)
+    vega = S * pdf_d1 * sqrt_T
+
+    delta, gamma, theta, vega_out, rho, vanna, volga = out
+    # Put values follow from N(-x) = 1 - N(x).
+    np.copyto(delta, np.where(is_call, cdf_d1, cdf_d1 - 1))
+    np.divide(pdf_d1, S * sigma_sqrt_T, out=gamma)
+    np.copyto(theta, -(S * pdf_d1 * sigma) / (2 * sqrt_T)
+              - r * discounted_K * np.where(is_call, cdf_d2, cdf_d2 - 1))
+    np.copyto(vega_out, vega)
+    np.copyto(rho, discounted_K * T * np.where(is_call, cdf_d2, cdf_d2 - 1))
+    np.copyto(vanna, -pdf_d1 * d2 / sigma)
+    np.copyto(volga, vega * d1 * d2 / sigma)
+    return out
+
+
+def greeks_to_dict(greeks):
+    return dict(zip(GREEK_NAMES, greeks))
@@ -0,0 +1,93 @@
+# features/implied_volatility.py
+import numpy as np
+from scipy.special import ndtr
+
+SQRT_2PI = np.sqrt(2 * np.pi)
+
+
+def black_scholes_price(S, K, T, r, sigma, is_call=True):
+    S, K, T, sigma = (np.asarray(a, dtype=np.float64) for a in (S, K, T, sigma))
+    sqrt_T = np.sqrt(T)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * sqrt_T)
+    d2 = d1 - sigma * sqrt_T
+    discounted_K = K * np.exp(-r * T)
+    call = S * ndtr(d1) - discounted_K * ndtr(d2)
+    return np.where(is_call, call, call - S + discounted_K)
+
+
+def implied_volatility(price, S, K, T, r=0.05, is_call=True, tol=1e-8, max_iter=50,
+                       sigma_bounds=(1e-4, 5.0), full_output=False):
+    """Invert Black-Scholes for a whole chain at once.
+
+    Every contract starts from the Corrado-Miller approximation and takes Newton steps inside a
+    shrinking [low, high] bracket; a step that would leave the bracket, or a vanishing vega,
+    falls back to bisection. Contracts drop out of the working set as they converge. Prices
+    outside the no-arbitrage bounds (below intrinsic, above S for calls or K*exp(-rT) for puts)
+    and non-positive expiries get NaN. With full_output the convergence mask is returned too.
+    """
+    price, S, K, T, is_call = np.broadcast_arrays(
+        np.asarray(price, dtype=np.float64), np.asarray(S, dtype=np.float64),
+        np.asarray(K, dtype=np.float64), np.asarray(T, dtype=np.float64), np.asarray(is_call, dtype=bool))
+    shape = price.shape
+    price, S, K, T, is_call = (a.ravel() for a in (price, S, K, T, is_call))
+
+    sigma = np.full(price.shape, np.nan)
+    converged = np.zeros(price.shape, dtype=bool)
+
+    discounted_K = K * np.exp(-r * np.where(T > 0, T, 0))
+    lower = np.where(is_call, np.maximum(S - discounted_K, 0), np.maximum(discounted_K - S, 0))
+    upper = np.where(is_call, S, discounted_K)
+    valid = np.isfinite(price) & (T > 0) & (S > 0) & (K > 0) & (price > lower) & (price < upper)
+
+    idx = np.flatnonzero(valid)
+    low = np.full(idx.shape, sigma_bounds[0])
+    high = np.full(idx.shape, sigma_bounds[1])
+    p, s, k, t, c = price[idx], S[idx], K[idx], T[idx], is_call[idx]
+
+    # Prices the widest bracket cannot reach have no solution within sigma_bounds.
+    reachable = black_scholes_price(s, k, t, r, high, c) >= p
+    idx, low, high, p, s, k, t, c = (a[reachable] for a in (idx, low, high, p, s, k, t, c))
+
+    vol = np.clip(_corrado_miller_guess(p, s, k, t, r, c), low, high)
+    for _ in range(max_iter):
+        if idx.size == 0:
+            break
+        sqrt_t = np.sqrt(t)
+        d1 = (np.log(s / k) + (r + 0.5 * vol ** 2) * t) / (vol * sqrt_t)
+        d2 = d1 - vol * sqrt_t
+        call = s * ndtr(d1) - k * np.exp(-r * t) * ndtr(d2)
+        diff = np.where(c, call, call - s + k * np.exp(-r * t)) - p
+        vega = s * np.exp(-0.5 * d1 ** 2) / SQRT_2PI * sqrt_t
+
+        done = np.abs(diff) < tol
+        sigma[idx[done]] = vol[done]
+        converged[idx[done]] = True
+
+        # Price is increasing in vol, so the sign of the error says which side of the root we are on.
+        high = np.where(diff > 0, vol, high)
+        low = np.where(diff < 0, vol, low)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = vol - diff / vega
+        inside = (vega > 1e-12) & (newton > low) & (newton < high)
+        vol = np.where(inside, newton, 0.5 * (low + high))
+
+        keep = ~done & (high - low > tol)
+        # A collapsed bracket pins the root even if the price tolerance was not met.
+        pinned = ~done & ~keep
+        sigma[idx[pinned]] = vol[pinned]
+        converged[idx[pinned]] = True
+        idx, low, high, vol, p, s, k, t, c = (a[keep] for a in (idx, low, high, vol, p, s, k, t, c))
+
+    sigma = sigma.reshape(shape)
+    if full_output:
+        return sigma, converged.reshape(shape)
+    return sigma
+
+
+def _corrado_miller_guess(price, S, K, T, r, is_call):
+    discounted_K = K * np.exp(-r * T)
+    # Put-call parity turns put prices into the equivalent call price.
+    call = np.where(is_call, price, price + S - discounted_K)
+    half_intrinsic = call - (S - discounted_K) / 2
+    radicand = np.maximum(half_intrinsic ** 2 - (S - discounted_K) ** 2 / np.pi, 0)
+    return np.sqrt(2 * np.pi / T) / (S + discounted_K) * (half_intrinsic + np.sqrt(radicand))
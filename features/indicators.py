@@ -0,0 +1,297 @@
+# features/indicators.py
+import copy
+import json
+import math
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Exponential indicators (RSI, MACD) have infinite memory. In "last value" mode they are run over
+# a tail long enough for the weight of everything before it to drop below this tolerance, which
+# keeps them within ~1e-10 (relative to the price level) of a run over the full history.
+EMA_TOLERANCE = 1e-10
+ANNUALIZATION = np.sqrt(252)
+
+
+def ema_warmup(alpha, tol=EMA_TOLERANCE):
+    return int(math.ceil(math.log(tol) / math.log(1 - alpha)))
+
+
+def _ema(values, alpha):
+    # pandas ewm(adjust=False): y[0] = x[0], y[n] = (1 - alpha) * y[n-1] + alpha * x[n]
+    if len(values) == 0:
+        return values
+    from scipy.signal import lfilter  # scipy.signal costs ~0.3 s to import, only pay it when used
+
+    ema, _ = lfilter([alpha], [1, alpha - 1], values, zi=[(1 - alpha) * values[0]])
+    return ema
+
+
+def _tail(values, length):
+    values = np.asarray(values, dtype=np.float64)
+    return values[-length:] if len(values) > length else values
+
+
+def sma_last(close, window):
+    close = _tail(close, window)
+    return close.mean() if len(close) == window else np.nan
+
+
+def volatility_last(close, window):
+    """Annualized std of the last ``window`` returns, what rolling(window).std().iloc[-1] gives."""
+    close = _tail(close, window + 1)
+    if len(close) < window + 1:
+        return np.nan
+    returns = np.diff(close) / close[:-1]
+    return returns.std(ddof=1) * ANNUALIZATION
+
+
+def bollinger_last(close, window=20, window_dev=2):
+    close = _tail(close, window)
+    if len(close) < window:
+        return np.nan, np.nan
+    mean, std = close.mean(), close.std(ddof=0)
+    return mean + window_dev * std, mean - window_dev * std
+
+
+def rsi_last(close, window=14, tol=EMA_TOLERANCE):
+    length = ema_warmup(1 / window, tol) + window
+    close = np.asarray(close, dtype=np.float64)
+    if len(close) < window:
+        return np.nan
+    if len(close) > length:
+        # One extra bar so the first diff of the tail is a real price change.
+        diff = np.diff(close[-(length + 1):])
+    else:
+        diff = np.concatenate([[0.0], np.diff(close)])
+    up = _ema(np.clip(diff, 0, None), 1 / window)[-1]
+    down = _ema(np.clip(-diff, 0, None), 1 / window)[-1]
+    return 100.0 if down == 0 else 100 - 100 / (1 + up / down)
+
+
+def macd_last(close, window_fast=12, window_slow=26, window_sign=9, tol=EMA_TOLERANCE):
+    alpha_fast, alpha_slow, alpha_sign = (2 / (window + 1) for window in (window_fast, window_slow, window_sign))
+    close = _tail(close, ema_warmup(alpha_slow, tol) + ema_warmup(alpha_sign, tol) + window_slow + window_sign)
+    if len(close) < window_slow:
+        return np.nan, np.nan
+    macd = _ema(close, alpha_fast) - _ema(close, alpha_slow)
+    # Like ta, the signal line only starts once the slow EMA has its minimum number of periods.
+    valid_macd = macd[window_slow - 1:]
+    signal = _ema(valid_macd, alpha_sign)[-1] if len(valid_macd) >= window_sign else np.nan
+    return macd[-1], signal
+
+
+class IncrementalEMA:
+    def __init__(self, alpha, min_periods=1, value=None, count=0):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value_ = value
+        self.count = count
+
+    def update(self, x):
+        self.value_ = x if self.value_ is None else (1 - self.alpha) * self.value_ + self.alpha * x
+        self.count += 1
+        return self.value
+
+    @property
+    def value(self):
+        return self.value_ if self.count >= self.min_periods else np.nan
+
+    def to_dict(self):
+        return {'alpha': self.alpha, 'min_periods': self.min_periods, 'value': self.value_, 'count': self.count}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['alpha'], state['min_periods'], state['value'], state['count'])
+
+
+class IncrementalRollingStats:
+    """Sliding-window mean and std with add/remove Welford updates, O(1) per bar."""
+
+    def __init__(self, window, ddof=0, values=(), mean=0.0, m2=0.0):
+        self.window = window
+        self.ddof = ddof
+        self.values = deque(values, maxlen=window)
+        self.mean_ = mean
+        self.m2 = m2
+
+    def update(self, x):
+        if len(self.values) == self.window:
+            removed = self.values[0]
+            n = len(self.values) - 1
+            if n == 0:
+                self.mean_, self.m2 = 0.0, 0.0
+            else:
+                delta = removed - self.mean_
+                self.mean_ -= delta / n
+                self.m2 -= delta * (removed - self.mean_)
+        self.values.append(x)
+        delta = x - self.mean_
+        self.mean_ += delta / len(self.values)
+        self.m2 += delta * (x - self.mean_)
+
+    @property
+    def full(self):
+        return len(self.values) == self.window
+
+    @property
+    def mean(self):
+        return self.mean_ if self.full else np.nan
+
+    @property
+    def std(self):
+        return math.sqrt(max(self.m2, 0.0) / (self.window - self.ddof)) if self.full else np.nan
+
+    def to_dict(self):
+        return {'window': self.window, 'ddof': self.ddof, 'values': list(self.values), 'mean': self.mean_, 'm2': self.m2}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['window'], state['ddof'], state['values'], state['mean'], state['m2'])
+
+
+class IncrementalRSI:
+    def __init__(self, window=14, previous=None, up=None, down=None):
+        self.window = window
+        self.previous = previous
+        self.up = up or IncrementalEMA(1 / window, min_periods=window)
+        self.down = down or IncrementalEMA(1 / window, min_periods=window)
+
+    def update(self, close):
+        diff = 0.0 if self.previous is None else close - self.previous
+        self.previous = close
+        self.up.update(max(diff, 0.0))
+        self.down.update(max(-diff, 0.0))
+
+    @property
+    def value(self):
+        up, down = self.up.value, self.down.value
+        if np.isnan(down):
+            return np.nan
+        return 100.0 if down == 0 else 100 - 100 / (1 + up / down)
+
+    def to_dict(self):
+        return {'window': self.window, 'previous': self.previous, 'up': self.up.to_dict(), 'down': self.down.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['window'], state['previous'],
+                   IncrementalEMA.from_dict(state['up']), IncrementalEMA.from_dict(state['down']))
+
+
+class IncrementalMACD:
+    def __init__(self, window_fast=12, window_slow=26, window_sign=9, fast=None, slow=None, signal=None):
+        self.fast = fast or IncrementalEMA(2 / (window_fast + 1), min_periods=window_fast)
+        self.slow = slow or IncrementalEMA(2 / (window_slow + 1), min_periods=window_slow)
+        self.signal = signal or IncrementalEMA(2 / (window_sign + 1), min_periods=window_sign)
+
+    def update(self, close):
+        self.fast.update(close)
+        self.slow.update(close)
+        if not np.isnan(self.macd):
+            self.signal.update(self.macd)
+
+    @property
+    def macd(self):
+        return self.fast.value - self.slow.value
+
+    def to_dict(self):
+        return {'fast': self.fast.to_dict(), 'slow': self.slow.to_dict(), 'signal': self.signal.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(fast=IncrementalEMA.from_dict(state['fast']), slow=IncrementalEMA.from_dict(state['slow']),
+                   signal=IncrementalEMA.from_dict(state['signal']))
+
+
+class IncrementalVolatility:
+    def __init__(self, window, previous=None, returns=None):
+        self.previous = previous
+        self.returns = returns or IncrementalRollingStats(window, ddof=1)
+
+    def update(self, close):
+        if self.previous is not None:
+            self.returns.update(close / self.previous - 1)
+        self.previous = close
+
+    @property
+    def value(self):
+        return self.returns.std * ANNUALIZATION
+
+    def to_dict(self):
+        return {'previous': self.previous, 'returns': self.returns.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state):
+        returns = IncrementalRollingStats.from_dict(state['returns'])
+        return cls(returns.window, state['previous'], returns)
+
+
+INDICATOR_TYPES = {cls.__name__: cls for cls in
+                   (IncrementalEMA, IncrementalRollingStats, IncrementalRSI, IncrementalMACD, IncrementalVolatility)}
+
+
+class IndicatorState:
+    """A named set of incremental indicators plus the timestamp of the last bar they have seen."""
+
+    def __init__(self, indicators, last_timestamp=None):
+        self.indicators = indicators
+        self.last_timestamp = last_timestamp
+
+    def update(self, close):
+        """Feed the bars of ``close`` (a time-indexed Series) newer than the last one seen.
+
+        The newest bar may still be forming and get revised by the next fetch, so this state only
+        advances through the bar before it. Returns a copy that also includes the newest bar.
+        """
+        new_bars = close if self.last_timestamp is None else close[close.index > self.last_timestamp]
+        self._feed(new_bars.iloc[:-1])
+        current = copy.deepcopy(self)
+        current._feed(new_bars.iloc[-1:])
+        return current
+
+    def _feed(self, bars):
+        for value in bars.to_numpy(dtype=np.float64):
+            for indicator in self.indicators.values():
+                indicator.update(value)
+        if len(bars) > 0:
+            self.last_timestamp = bars.index[-1]
+
+    def to_dict(self):
+        return {
+            'last_timestamp': None if self.last_timestamp is None else self.last_timestamp.isoformat(),
+            'indicators': {name: {'type': type(indicator).__name__, 'state': indicator.to_dict()}
+                           for name, indicator in self.indicators.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        indicators = {name: INDICATOR_TYPES[entry['type']].from_dict(entry['state'])
+                      for name, entry in state['indicators'].items()}
+        last_timestamp = None if state['last_timestamp'] is None else pd.Timestamp(state['last_timestamp'])
+        return cls(indicators, last_timestamp)
+
+
+class IndicatorStateStore:
+    """Persists IndicatorState per ticker as JSON under ``<directory>/<ticker>/<name>.json``."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def load(self, ticker, name, factory):
+        path = self._path(ticker, name)
+        if not path.exists():
+            return IndicatorState(factory())
+        with open(path) as file:
+            return IndicatorState.from_dict(json.load(file))
+
+    def save(self, ticker, name, state):
+        path = self._path(ticker, name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump(state.to_dict(), file)
+
+    def _path(self, ticker, name):
+        return self.directory / ticker.replace('^', '_').replace('/', '_') / f"{name}.json"
@@ -0,0 +1,305 @@
+# features/panel.py
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .base_feature_engineer import call_mask
+from .basic_features import VOLATILITY_WINDOWS
+from .greeks import GREEK_NAMES, compute_greeks
+from .implied_volatility import implied_volatility
+from .indicators import ANNUALIZATION, ema_warmup
+from utils.instrumentation import instrumentation
+
+TARGET_TYPES = ('profit', 'delta_profit')
+TARGET_COLUMNS = ['potential_profit', 'profit_percentage']
+
+
+def segment_tails(values, offsets, length):
+    """(segments, length) matrix of the last ``length`` values of every segment, and their counts.
+
+    Rows are right-aligned. A segment shorter than ``length`` is left-padded with its first
+    value, which an EMA started at that value passes through unchanged and a diff turns into
+    zeros. Segments must not be empty.
+    """
+    starts, ends = offsets[:-1], offsets[1:]
+    counts = np.minimum(ends - starts, length)
+    index = np.maximum(ends[:, None] - length + np.arange(length), (ends - counts)[:, None])
+    return values[index], counts
+
+
+def segment_ema(matrix, alpha):
+    """pandas ewm(adjust=False) along every row, each row starting at its own first value."""
+    from scipy.signal import lfilter  # scipy.signal costs ~0.3 s to import, only pay it when used
+
+    ema, _ = lfilter([alpha], [1, alpha - 1], matrix, axis=1, zi=(1 - alpha) * matrix[:, :1])
+    return ema
+
+
+def sma_last(close, offsets, window):
+    tails, counts = segment_tails(close, offsets, window)
+    return np.where(counts == window, tails.mean(axis=1), np.nan)
+
+
+def volatility_last(close, offsets, window):
+    tails, counts = segment_tails(close, offsets, window + 1)
+    returns = np.diff(tails, axis=1) / tails[:, :-1]
+    return np.where(counts == window + 1, returns.std(axis=1, ddof=1) * ANNUALIZATION, np.nan)
+
+
+def bollinger_last(close, offsets, window=20, window_dev=2):
+    tails, counts = segment_tails(close, offsets, window)
+    mean, std = tails.mean(axis=1), tails.std(axis=1, ddof=0)
+    full = counts == window
+    return np.where(full, mean + window_dev * std, np.nan), np.where(full, mean - window_dev * std, np.nan)
+
+
+def rsi_last(close, offsets, window=14):
+    length = ema_warmup(1 / window) + window
+    tails, counts = segment_tails(close, offsets, length + 1)
+    # The padding diffs to zeros, which is the leading 0 a short series gets in indicators.rsi_last.
+    diff = np.diff(tails, axis=1)
+    up = segment_ema(np.clip(diff, 0, None), 1 / window)[:, -1]
+    down = segment_ema(np.clip(-diff, 0, None), 1 / window)[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = np.where(down == 0, 100.0, 100 - 100 / (1 + up / down))
+    return np.where(counts >= window, rsi, np.nan)
+
+
+def macd_last(close, offsets, window_fast=12, window_slow=26, window_sign=9):
+    alpha_fast, alpha_slow, alpha_sign = (2 / (window + 1) for window in (window_fast, window_slow, window_sign))
+    length = ema_warmup(alpha_slow) + ema_warmup(alpha_sign) + window_slow + window_sign
+    tails, counts = segment_tails(close, offsets, length)
+    macd = segment_ema(tails, alpha_fast) - segment_ema(tails, alpha_slow)
+    # The signal line starts once the slow EMA has window_slow real bars, a different column per
+    # row; everything before that column is padded with its value so one EMA serves every row.
+    start = np.minimum(length - counts + window_slow - 1, length - 1)
+    valid = np.take_along_axis(macd, np.maximum(np.arange(length), start[:, None]), axis=1)
+    signal = segment_ema(valid, alpha_sign)[:, -1]
+    return (np.where(counts >= window_slow, macd[:, -1], np.nan),
+            np.where(counts - window_slow + 1 >= window_sign, signal, np.nan))
+
+
+class Panel:
+    """Every ticker's contracts and underlying closes stacked into contiguous arrays.
+
+    Ticker ``i`` owns contracts ``contract_offsets[i]:contract_offsets[i + 1]`` and closes
+    ``bar_offsets[i]:bar_offsets[i + 1]``; ``segment`` maps each contract to its ticker, so a
+    per-ticker value ``v`` broadcasts to the contracts as ``v[panel.segment]``.
+    """
+
+    def __init__(self, tickers, contracts, contract_offsets, close, bar_offsets, expiration_dates):
+        self.tickers = list(tickers)
+        self.contracts = contracts
+        self.contract_offsets = contract_offsets
+        self.close = close
+        self.bar_offsets = bar_offsets
+        self.expiration_dates = list(expiration_dates)
+        self.segment = np.repeat(np.arange(len(self.tickers)), np.diff(contract_offsets))
+
+    @classmethod
+    def stack(cls, fetched):
+        """A panel of (ticker, calls, underlying, expiration_date) tuples."""
+        fetched = [item for item in fetched if len(item[1]) > 0 and len(item[2]) > 0]
+        tickers = [ticker for ticker, _, _, _ in fetched]
+        contracts = pd.concat([calls for _, calls, _, _ in fetched], ignore_index=True) if fetched else pd.DataFrame()
+        contract_offsets = np.concatenate([[0], np.cumsum([len(calls) for _, calls, _, _ in fetched])]).astype(np.int64)
+        closes = [underlying['Close'].to_numpy(dtype=np.float64) for _, _, underlying, _ in fetched]
+        close = np.concatenate(closes) if closes else np.empty(0)
+        bar_offsets = np.concatenate([[0], np.cumsum([len(values) for values in closes])]).astype(np.int64)
+        return cls(tickers, contracts, contract_offsets, close, bar_offsets,
+                   [expiration for _, _, _, expiration in fetched])
+
+    def __len__(self):
+        return len(self.contracts)
+
+    def column(self, name):
+        return self.contracts[name].to_numpy(dtype=np.float64)
+
+
+class PanelFeatureEngine:
+    """Computes a feature plan for a whole Panel at once.
+
+    Each node of the plan has a kernel here that works on the stacked arrays: spot and the
+    indicators are computed per segment from the closes (with the semantics of the 'last'
+    indicator mode) and broadcast to the contracts, and the contract-level features, implied
+    volatility and Greeks run once over every contract. The feature and target columns are
+    written into one preallocated (columns, contracts) float64 matrix, which becomes the
+    DataFrame's float block without another copy.
+    """
+
+    def __init__(self, plan, target_type=None, target_params=None, risk_free_rate=0.05, now=None):
+        self.plan = plan
+        self.target_type = target_type
+        self.target_params = dict(target_params or {})
+        self.risk_free_rate = risk_free_rate
+        self.now = now
+        self.node_timings = {}
+
+    @classmethod
+    def unsupported(cls, plan, target_type=None):
+        """Nodes of ``plan`` (and the target type) without a panel kernel."""
+        missing = [node.name for node in plan if not hasattr(cls, f"_kernel_{node.name}")]
+        if target_type is not None and target_type not in TARGET_TYPES:
+            missing.append(f"target:{target_type}")
+        return missing
+
+    def run(self, panel):
+        """The engineered frame: contract columns, features, target columns and ticker."""
+        columns = [output for node in self.plan if node.kind == 'column' for output in node.outputs]
+        target_columns = []
+        if self.target_type is not None:
+            target_columns = TARGET_COLUMNS + (['delta'] if self.target_type == 'delta_profit' and 'delta' not in columns
+                                               and 'delta' not in panel.contracts.columns else [])
+        matrix = np.empty((len(columns) + len(target_columns), len(panel)), dtype=np.float64)
+        self.rows = {name: matrix[row] for row, name in enumerate(columns + target_columns)}
+        self.panel = panel
+        self.values = {}
+        self.node_timings = {}
+
+        row = 0
+        for node in self.plan:
+            start = time.perf_counter()
+            with instrumentation.span('feature', node=node.name):
+                if node.kind == 'value':
+                    self.values[node.name] = getattr(self, f"_kernel_{node.name}")()
+                else:
+                    getattr(self, f"_kernel_{node.name}")(matrix[row:row + len(node.outputs)])
+                    row += len(node.outputs)
+            self.node_timings[node.name] = time.perf_counter() - start
+
+        # Like assigning a feature column, a computed column replaces a contract column of that name.
+        contracts = panel.contracts.drop(columns=[name for name in [*self.rows, 'target', 'ticker']
+                                                  if name in panel.contracts.columns])
+        frames = [contracts, pd.DataFrame(matrix.T, columns=columns + target_columns, copy=False)]
+        if self.target_type is not None:
+            start = time.perf_counter()
+            frames.append(pd.DataFrame({'target': self._target()}))
+            self.node_timings['target'] = time.perf_counter() - start
+        engineered = pd.concat(frames, axis=1, copy=False)
+        engineered['ticker'] = np.repeat(np.array(panel.tickers, dtype=object), np.diff(panel.contract_offsets))
+        return engineered
+
+    def column(self, name):
+        return self.rows[name] if name in self.rows else self.panel.column(name)
+
+    def _spot(self):
+        if 'spot' not in self.values:
+            self.values['spot'] = self._kernel_spot()
+        return self.values['spot']
+
+    def _per_segment(self, values, out):
+        out[:] = values[self.panel.segment]
+
+    # Values
+
+    def _kernel_spot(self):
+        panel = self.panel
+        return panel.close[panel.bar_offsets[1:] - 1][panel.segment]
+
+    def _kernel_is_call(self):
+        return call_mask(self.panel.contracts)
+
+    # Contract columns
+
+    def _kernel_moneyness(self, out):
+        np.divide(self._spot(), self.panel.column('strike'), out=out[0])
+
+    def _kernel_time_to_expiry(self, out):
+        now = pd.Timestamp(self.now or datetime.now())
+        expirations = pd.to_datetime(pd.Series(self.panel.expiration_dates)).to_numpy()[self.panel.segment]
+        if 'expiration' in self.panel.contracts.columns:
+            stacked = pd.to_datetime(self.panel.contracts['expiration']).to_numpy()
+            expirations = np.where(pd.isna(stacked), expirations, stacked)
+        out[0] = (pd.Series(expirations) - now).dt.days.to_numpy(dtype=np.float64)
+
+    def _kernel_volume_oi_ratio(self, out):
+        open_interest = self.panel.column('openInterest')
+        np.divide(self.panel.column('volume'), np.where(open_interest == 0, 1, open_interest), out=out[0])
+
+    def _kernel_price_to_strike(self, out):
+        np.divide(self.panel.column('lastPrice'), self.panel.column('strike'), out=out[0])
+
+    def _kernel_price_to_underlying(self, out):
+        np.divide(self.panel.column('lastPrice'), self._spot(), out=out[0])
+
+    def _kernel_log_moneyness(self, out):
+        np.log(self._spot() / self.panel.column('strike'), out=out[0])
+
+    def _kernel_iv_to_hv_ratio(self, out):
+        np.divide(self.column('implied_volatility'), self.column('historical_volatility_30d'), out=out[0])
+
+    def _kernel_oi_to_volume_ratio(self, out):
+        volume = self.panel.column('volume')
+        np.divide(self.panel.column('openInterest'), np.where(volume == 0, 1, volume), out=out[0])
+
+    def _kernel_implied_volatility(self, out):
+        iv = implied_volatility(self.panel.column('lastPrice'), self._spot(), self.panel.column('strike'),
+                                self.column('time_to_expiry') / 365, self.risk_free_rate,
+                                is_call=self.values['is_call'])
+        if 'impliedVolatility' in self.panel.contracts.columns:
+            iv = np.where(np.isnan(iv), self.panel.column('impliedVolatility'), iv)
+        out[0] = iv
+
+    def _kernel_greeks(self, out):
+        compute_greeks(self._spot(), self.panel.column('strike'), self.column('time_to_expiry') / 365,
+                       self.risk_free_rate, self.column('implied_volatility'), is_call=self.values['is_call'], out=out)
+
+    # Underlying indicators, one value per segment broadcast to its contracts
+
+    def _kernel_historical_volatility(self, out):
+        for row, window in enumerate(VOLATILITY_WINDOWS):
+            self._per_segment(volatility_last(self.panel.close, self.panel.bar_offsets, window), out[row])
+
+    def _kernel_rsi(self, out):
+        self._per_segment(rsi_last(self.panel.close, self.panel.bar_offsets), out[0])
+
+    def _kernel_macd(self, out):
+        for row, values in enumerate(macd_last(self.panel.close, self.panel.bar_offsets)):
+            self._per_segment(values, out[row])
+
+    def _kernel_bollinger_bands(self, out):
+        for row, values in enumerate(bollinger_last(self.panel.close, self.panel.bar_offsets)):
+            self._per_segment(values, out[row])
+
+    def _kernel_moving_average_50(self, out):
+        self._per_segment(sma_last(self.panel.close, self.panel.bar_offsets, 50), out[0])
+
+    def _kernel_moving_average_200(self, out):
+        self._per_segment(sma_last(self.panel.close, self.panel.bar_offsets, 200), out[0])
+
+    # Targets
+
+    def _target(self):
+        spot, strike = self._spot(), self.panel.column('strike')
+        is_call = call_mask(self.panel.contracts)
+        payoff = np.where(is_call, spot - strike, strike - spot)
+        potential_profit, profit_percentage = self.rows['potential_profit'], self.rows['profit_percentage']
+        np.subtract(payoff.clip(min=0), self.panel.column('lastPrice'), out=potential_profit)
+        np.divide(potential_profit, self.panel.column('lastPrice'), out=profit_percentage)
+        target = profit_percentage > self.target_params.get('profit_threshold', 0.005)
+        if self.target_type == 'delta_profit':
+            target &= np.abs(self._delta(spot, strike, is_call)) > self.target_params.get('delta_threshold', 0.5)
+        return target
+
+    def _delta(self, spot, strike, is_call):
+        if any('delta' in node.outputs for node in self.plan):
+            return self.rows['delta']
+        if 'delta' in self.panel.contracts.columns:
+            return self.panel.column('delta')
+        # Like DeltaProfitTargetEngineer: the same Greeks engine, without the advanced features.
+        risk_free_rate = self.target_params.get('risk_free_rate', 0.05)
+        T = self.column('time_to_expiry') / 365 if 'time_to_expiry' in self.rows else self._days_to_expiry() / 365
+        if 'implied_volatility' in self.rows:
+            sigma = self.rows['implied_volatility']
+        else:
+            sigma = implied_volatility(self.panel.column('lastPrice'), spot, strike, T, risk_free_rate, is_call=is_call)
+        delta = self.rows['delta']
+        delta[:] = compute_greeks(spot, strike, T, risk_free_rate, sigma, is_call=is_call)[GREEK_NAMES.index('delta')]
+        return delta
+
+    def _days_to_expiry(self):
+        days = np.empty(len(self.panel))
+        self._kernel_time_to_expiry(days[None, :])
+        return days
@@ -1,4 +1,5 @@
-from .base_feature_engineer import BaseTargetEngineer
+from .base_feature_engineer import BaseTargetEngineer, call_mask
+import numpy as np
 
 class ProfitTargetEngineer(BaseTargetEngineer):
     def __init__(self, calls, underlying, profit_threshold=0.005):
@@ -7,7 +8,8 @@ class ProfitTargetEngineer(BaseTargetEngineer):
 
     def create_target(self):
         current_price = self.underlying['Close'].iloc[-1]
-        self.calls['potential_profit'] = (current_price - self.calls['strike']).clip(lower=0) - self.calls['lastPrice']
+        payoff = np.where(call_mask(self.calls), current_price - self.calls['strike'], self.calls['strike'] - current_price)
+        self.calls['potential_profit'] = payoff.clip(min=0) - self.calls['lastPrice']
         self.calls['profit_percentage'] = self.calls['potential_profit'] / self.calls['lastPrice']
         self.calls['target'] = self.calls['profit_percentage'] > self.profit_threshold
         return self.calls
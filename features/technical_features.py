@@ -1,19 +1,90 @@
 from .base_feature_engineer import BaseFeatureEngineer
+from .feature_graph import UNDERLYING, feature
+from .indicators import (IncrementalMACD, IncrementalRollingStats, IncrementalRSI, bollinger_last, macd_last,
+                         rsi_last, sma_last)
 import ta
 
+def technical_indicator_state():
+    return {
+        'rsi': IncrementalRSI(14),
+        'macd': IncrementalMACD(12, 26, 9),
+        'bollinger': IncrementalRollingStats(20, ddof=0),
+        'sma_50': IncrementalRollingStats(50),
+        'sma_200': IncrementalRollingStats(200),
+    }
+
 class TechnicalFeatureEngineer(BaseFeatureEngineer):
-    def engineer_features(self):
-        self.calls['rsi'] = ta.momentum.RSIIndicator(self.underlying['Close']).rsi().iloc[-1]
-        
-        macd = ta.trend.MACD(self.underlying['Close'])
-        self.calls['macd'] = macd.macd().iloc[-1]
-        self.calls['macd_signal'] = macd.macd_signal().iloc[-1]
-        
-        bollinger = ta.volatility.BollingerBands(self.underlying['Close'])
-        self.calls['bollinger_high'] = bollinger.bollinger_hband().iloc[-1]
-        self.calls['bollinger_low'] = bollinger.bollinger_lband().iloc[-1]
-        
-        self.calls['moving_average_50'] = ta.trend.SMAIndicator(self.underlying['Close'], window=50).sma_indicator().iloc[-1]
-        self.calls['moving_average_200'] = ta.trend.SMAIndicator(self.underlying['Close'], window=200).sma_indicator().iloc[-1]
-        
-        return self.calls
+    """Underlying indicators broadcast to every contract.
+
+    mode 'full' runs the ta indicators over the whole history, 'last' computes only the final
+    value from the shortest tail that reproduces it (see features.indicators.EMA_TOLERANCE), and
+    'incremental' advances persisted per-ticker state by the bars it has not seen yet.
+    """
+
+    def __init__(self, calls, underlying, expiration_date, mode='full', state_store=None, ticker=None):
+        super().__init__(calls, underlying, expiration_date)
+        self.mode = mode
+        self.state_store = state_store
+        self.ticker = ticker
+        self._state = None
+
+    @feature('rsi', inputs=[UNDERLYING])
+    def calculate_rsi(self):
+        if self.mode == 'full':
+            return ta.momentum.RSIIndicator(self.underlying['Close']).rsi().iloc[-1]
+        if self.mode == 'last':
+            return rsi_last(self._close())
+        return self._incremental_state()['rsi'].value
+
+    @feature('macd', inputs=[UNDERLYING], outputs=['macd', 'macd_signal'])
+    def calculate_macd(self):
+        if self.mode == 'full':
+            macd = ta.trend.MACD(self.underlying['Close'])
+            return macd.macd().iloc[-1], macd.macd_signal().iloc[-1]
+        if self.mode == 'last':
+            return macd_last(self._close())
+        macd = self._incremental_state()['macd']
+        return macd.macd, macd.signal.value
+
+    @feature('bollinger_bands', inputs=[UNDERLYING], outputs=['bollinger_high', 'bollinger_low'])
+    def calculate_bollinger_bands(self):
+        if self.mode == 'full':
+            bollinger = ta.volatility.BollingerBands(self.underlying['Close'])
+            return bollinger.bollinger_hband().iloc[-1], bollinger.bollinger_lband().iloc[-1]
+        if self.mode == 'last':
+            return bollinger_last(self._close())
+        bollinger = self._incremental_state()['bollinger']
+        return bollinger.mean + 2 * bollinger.std, bollinger.mean - 2 * bollinger.std
+
+    @feature('moving_average_50', inputs=[UNDERLYING])
+    def calculate_moving_average_50(self):
+        return self._moving_average(50)
+
+    @feature('moving_average_200', inputs=[UNDERLYING])
+    def calculate_moving_average_200(self):
+        return self._moving_average(200)
+
+    def _moving_average(self, window):
+        if self.mode == 'full':
+            return ta.trend.SMAIndicator(self.underlying['Close'], window=window).sma_indicator().iloc[-1]
+        if self.mode == 'last':
+            return sma_last(self._close(), window)
+        return self._incremental_state()[f'sma_{window}'].mean
+
+    def _close(self):
+        if self.mode != 'last':
+            raise ValueError(f"Unknown indicator mode: {self.mode}")
+        return self.underlying['Close'].to_numpy()
+
+    def _incremental_state(self):
+        # Every indicator node reads the same state, which is advanced and saved once per run.
+        if self.mode != 'incremental':
+            raise ValueError(f"Unknown indicator mode: {self.mode}")
+        if self._state is None:
+            if self.state_store is None or self.ticker is None:
+                raise ValueError("Incremental indicators need a state store and a ticker")
+            state = self.state_store.load(self.ticker, 'technical', technical_indicator_state)
+            current = state.update(self.underlying['Close'])
+            self.state_store.save(self.ticker, 'technical', state)
+            self._state = current.indicators
+        return self._state
@@ -1,4 +1,173 @@
 # Core tests for features
 
 import pytest
+import numpy as np
+import pandas as pd
 
+from features.implied_volatility import black_scholes_price, implied_volatility
+from features.greeks import GREEK_NAMES, compute_greeks, greeks_to_dict
+
+
+def test_implied_volatility_recovers_black_scholes_vol():
+    rng = np.random.default_rng(0)
+    K = rng.uniform(60, 140, 5_000)
+    T = rng.uniform(7, 365, 5_000) / 365
+    sigma = rng.uniform(0.1, 1.0, 5_000)
+    is_call = rng.random(5_000) < 0.5
+    price = black_scholes_price(100.0, K, T, 0.05, sigma, is_call)
+    intrinsic = black_scholes_price(100.0, K, T, 0.05, 1e-9, is_call)
+    liquid = price - intrinsic >= 0.01
+
+    iv, converged = implied_volatility(price[liquid], 100.0, K[liquid], T[liquid], 0.05, is_call[liquid], full_output=True)
+    assert converged.all()
+    np.testing.assert_allclose(iv, sigma[liquid], atol=1e-6)
+
+
+def test_implied_volatility_rejects_arbitrage_violations():
+    # below intrinsic, above the underlying, expired, and a regular quote
+    iv = implied_volatility([5.0, 120.0, 3.0, 3.0], 100.0, [90.0, 100.0, 100.0, 100.0], [0.5, 0.5, 0.0, 0.5])
+    assert np.isnan(iv[:3]).all()
+    assert 0.01 < iv[3] < 1.0
+
+
+@pytest.mark.parametrize('is_call', [True, False])
+def test_greeks_match_finite_differences(is_call):
+    S, K, T, r, sigma = 100.0, np.array([80.0, 100.0, 125.0]), np.array([0.1, 0.5, 1.5]), 0.05, np.array([0.2, 0.35, 0.6])
+    greeks = greeks_to_dict(compute_greeks(S, K, T, r, sigma, is_call=is_call))
+    price = lambda **bump: black_scholes_price(bump.get('S', S), K, bump.get('T', T), bump.get('r', r),
+                                               bump.get('sigma', sigma), is_call)
+    h, h2 = 1e-4, 1e-3  # second differences need a wider step to stay clear of rounding
+    dS = lambda sigma_: (black_scholes_price(S + h, K, T, r, sigma_, is_call) - black_scholes_price(S - h, K, T, r, sigma_, is_call)) / (2 * h)
+
+    np.testing.assert_allclose(greeks['delta'], (price(S=S + h) - price(S=S - h)) / (2 * h), rtol=1e-5)
+    np.testing.assert_allclose(greeks['gamma'], (price(S=S + h2) - 2 * price() + price(S=S - h2)) / h2 ** 2, rtol=1e-3)
+    np.testing.assert_allclose(greeks['theta'], -(price(T=T + h) - price(T=T - h)) / (2 * h), rtol=1e-5)
+    np.testing.assert_allclose(greeks['vega'], (price(sigma=sigma + h) - price(sigma=sigma - h)) / (2 * h), rtol=1e-5)
+    np.testing.assert_allclose(greeks['rho'], (price(r=r + h) - price(r=r - h)) / (2 * h), rtol=1e-5)
+    np.testing.assert_allclose(greeks['vanna'], (dS(sigma + h2) - dS(sigma - h2)) / (2 * h2), rtol=1e-3)
+    np.testing.assert_allclose(greeks['volga'], (price(sigma=sigma + h2) - 2 * price() + price(sigma=sigma - h2)) / h2 ** 2, rtol=1e-3, atol=1e-4)
+
+
+def test_greeks_fill_preallocated_float32_buffer():
+    out = np.empty((len(GREEK_NAMES), 3), dtype=np.float32)
+    result = compute_greeks(100.0, [90.0, 100.0, 110.0], 0.25, 0.05, 0.3, is_call=[True, False, True], dtype=np.float32, out=out)
+    reference = compute_greeks(100.0, [90.0, 100.0, 110.0], 0.25, 0.05, 0.3, is_call=[True, False, True])
+    assert result is out
+    np.testing.assert_allclose(out, reference, rtol=1e-4, atol=1e-5)
+    with pytest.raises(ValueError):
+        compute_greeks(100.0, [90.0, 100.0], 0.25, 0.05, 0.3, dtype=np.float32, out=out)
+
+
+def test_delta_profit_target_computes_delta_without_advanced_features():
+    from datetime import datetime, timedelta
+    from features.delta_profit_target import DeltaProfitTargetEngineer
+
+    underlying = pd.DataFrame({'Close': [98.0, 100.0]})
+    strikes = np.array([80.0, 100.0, 120.0])
+    expiration = (datetime.now() + timedelta(days=60)).strftime('%Y-%m-%d')
+    T = (datetime.strptime(expiration, '%Y-%m-%d') - datetime.now()).days / 365
+    calls = pd.DataFrame({'strike': strikes, 'lastPrice': black_scholes_price(100.0, strikes, T, 0.05, 0.3)})
+
+    result = DeltaProfitTargetEngineer(calls, underlying, expiration_date=expiration).create_target()
+    expected = compute_greeks(100.0, strikes, T, 0.05, 0.3)[GREEK_NAMES.index('delta')]
+    np.testing.assert_allclose(result['delta'], expected, rtol=1e-6)
+    expected_target = (result['profit_percentage'] > 0.005) & (result['delta'] > 0.5)
+    assert result['target'].tolist() == expected_target.tolist()
+
+
+def make_bars(n_bars=2_000, seed=1):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2023-01-02 09:30', periods=n_bars, freq='h', tz='America/New_York')
+    return pd.DataFrame({'Close': 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))}, index=index)
+
+
+def engineer(feature_type, underlying, **kwargs):
+    from features.feature_factory import FeatureFactory
+    calls = pd.DataFrame({'strike': [90.0, 100.0], 'lastPrice': [12.0, 5.0], 'volume': [10.0, 20.0], 'openInterest': [100.0, 0.0]})
+    return FeatureFactory.create_feature_engineer(feature_type, calls, underlying.copy(), '2030-01-18', **kwargs).engineer_features()
+
+
+@pytest.mark.parametrize('feature_type', ['basic', 'technical'])
+def test_last_value_and_incremental_indicators_match_full_history(tmp_path, feature_type):
+    from features.indicators import IndicatorStateStore
+
+    bars = make_bars()
+    full = engineer(feature_type, bars, mode='full')
+    last = engineer(feature_type, bars, mode='last')
+    store = IndicatorStateStore(tmp_path)
+    engineer(feature_type, bars.iloc[:1_500], mode='incremental', state_store=store, ticker='AAA')
+    incremental = engineer(feature_type, bars, mode='incremental', state_store=store, ticker='AAA')
+
+    columns = [column for column in full.columns if column not in ('strike', 'lastPrice', 'volume', 'openInterest')]
+    assert full[columns].notna().all().all()
+    pd.testing.assert_frame_equal(last[columns], full[columns], rtol=1e-8)
+    pd.testing.assert_frame_equal(incremental[columns], full[columns], rtol=1e-8)
+
+
+@pytest.mark.parametrize('feature_type', ['basic', 'technical'])
+def test_incremental_indicators_apply_revisions_to_the_newest_bar(tmp_path, feature_type):
+    from features.indicators import IndicatorStateStore
+
+    bars = make_bars()
+    # The newest bar is still forming on the first refresh and has its final close on the next.
+    partial = bars.copy()
+    partial.iloc[-1, 0] *= 0.9
+    store = IndicatorStateStore(tmp_path)
+    engineer(feature_type, bars.iloc[:1_500], mode='incremental', state_store=store, ticker='AAA')
+    engineer(feature_type, partial, mode='incremental', state_store=store, ticker='AAA')
+    revised = engineer(feature_type, bars, mode='incremental', state_store=store, ticker='AAA')
+    last = engineer(feature_type, bars, mode='last')
+
+    columns = [column for column in last.columns if column not in ('strike', 'lastPrice', 'volume', 'openInterest')]
+    pd.testing.assert_frame_equal(revised[columns], last[columns], rtol=1e-8)
+
+
+def test_feature_graph_computes_only_requested_features_and_their_inputs():
+    from features.feature_graph import FeatureGraph
+
+    graph = FeatureGraph.default()
+    plan = graph.plan(['iv_to_hv_ratio'])
+    names = [node.name for node in plan]
+    assert names.index('time_to_expiry') < names.index('implied_volatility') < names.index('iv_to_hv_ratio')
+    assert 'historical_volatility' in names
+    assert not {'greeks', 'rsi', 'moneyness'} & set(names)
+    assert graph.output_columns(['macd', 'delta']) == ['macd', 'macd_signal', 'delta']
+    with pytest.raises(KeyError):
+        graph.plan(['not_a_feature'])
+
+
+def test_advanced_features_resolve_basic_inputs_on_their_own():
+    from features.feature_factory import FeatureFactory
+
+    bars = make_bars(300)
+    advanced = engineer('advanced', bars)
+    basic = engineer('basic', bars)
+    after_basic = FeatureFactory.create_feature_engineer('advanced', basic, bars, '2030-01-18').engineer_features()
+
+    assert {'time_to_expiry', 'historical_volatility_30d', 'log_moneyness', *GREEK_NAMES} <= set(advanced.columns)
+    assert 'rsi' not in advanced.columns
+    np.testing.assert_allclose(advanced['iv_to_hv_ratio'], after_basic['iv_to_hv_ratio'])
+    np.testing.assert_allclose(after_basic['moneyness'], bars['Close'].iloc[-1] / after_basic['strike'])
+
+
+def test_panel_indicator_kernels_match_per_series_indicators():
+    from features import indicators, panel
+
+    rng = np.random.default_rng(3)
+    # Segments shorter and longer than every window and EMA warm-up.
+    lengths = [5, 14, 15, 26, 40, 60, 250, 700]
+    series = [100 * np.exp(np.cumsum(rng.normal(0, 0.01, n))) for n in lengths]
+    close = np.concatenate(series)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+    def per_series(function, *args):
+        return np.array([function(values, *args) for values in series], dtype=np.float64)
+
+    np.testing.assert_allclose(panel.sma_last(close, offsets, 50), per_series(indicators.sma_last, 50), rtol=1e-12)
+    np.testing.assert_allclose(panel.volatility_last(close, offsets, 30), per_series(indicators.volatility_last, 30),
+                               rtol=1e-12)
+    np.testing.assert_allclose(panel.rsi_last(close, offsets), per_series(indicators.rsi_last), rtol=1e-10)
+    for actual, expected in zip(panel.macd_last(close, offsets), per_series(indicators.macd_last).T):
+        np.testing.assert_allclose(actual, expected, rtol=1e-10, atol=1e-12)
+    for actual, expected in zip(panel.bollinger_last(close, offsets), per_series(indicators.bollinger_last).T):
+        np.testing.assert_allclose(actual, expected, rtol=1e-12)
@@ -1,46 +1,71 @@
 # main.py
+import argparse
 from utils.config_manager import ConfigManager
 from data.data_pipeline import DataPipeline
-from models.model_factory import ModelFactory
+from models.hyperparameter_search import tune_models
+from models.model_registry import ModelRegistry
+from models.training_orchestrator import TrainingOrchestrator
+from utils.instrumentation import configure as configure_instrumentation, instrumentation
 from utils.results_manager import ResultsManager
-from utils.logger import app_logger as logger, toggle_debug_logging
+from utils.logger import LazyText, app_logger as logger, toggle_debug_logging
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train and evaluate options screening models.")
+    parser.add_argument('--force-retrain', action='store_true',
+                        help="Retrain every model even if the registry has a fit for the same data and config")
+    parser.add_argument('--tune', action='store_true',
+                        help="Search the tuning.search_spaces in the config instead of training, resuming any interrupted search")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
     config = ConfigManager('config.yaml')
     
     # Set debug logging based on config
     if config.get('debug_logging', False):
         toggle_debug_logging(True)
+    configure_instrumentation(config)
     
     data_pipeline = DataPipeline(config)
     results_manager = ResultsManager(config)
 
     try:
-        logger.info("Starting data processing...")
-        combined_data = data_pipeline.process_data()
+        if config.get_nested('feature_store', 'train_from_store', default=False):
+            logger.info("Loading features from the feature store...")
+            combined_data = data_pipeline.load_feature_store()
+        else:
+            logger.info("Starting data processing...")
+            combined_data = data_pipeline.process_data()
         logger.info(f"Combined data shape: {combined_data.shape}")
-        logger.info(f"Class distribution:\n{combined_data['target'].value_counts(normalize=True)}")
+        logger.info("Class distribution:\n%s", LazyText(lambda: combined_data['target'].value_counts(normalize=True)))
         
         X, y = data_pipeline.preprocess_data(combined_data)
         
         logger.info(f"Final shape of feature matrix X: {X.shape}")
         logger.info(f"Final shape of target vector y: {y.shape}")
-        logger.info(f"Features used: {X.columns.tolist()}")
+        logger.info("Features used: %s", LazyText(X.columns.tolist))
 
-        results_manager = ResultsManager(config)
+        if args.tune:
+            tune_models(config, X, y)
+            return
 
-        for model_config in config.get('models'):
-            logger.info(f"Training and cross-validating {model_config['name']} model...")
-            model = ModelFactory.create_model(model_config['type'], X, y, model_config['params'])
-            model.train()
-            results_manager.save_results(model_config['name'], model, X, y)
+        # Models train concurrently; each one is reported as soon as it finishes.
+        registry = ModelRegistry.from_config(config, force_retrain=args.force_retrain)
+        orchestrator = TrainingOrchestrator.from_config(config, registry=registry)
+        orchestrator.run(X, y, on_result=lambda name, model, cv_results:
+                         results_manager.add_results(name, model, X, y, cv_results),
+                         preprocessor=data_pipeline.preprocessor)
 
-        results_manager.plot_model_comparison()
-        results_manager.print_summary()
+        with instrumentation.span('report'):
+            results_manager.plot_model_comparison()
+            results_manager.print_summary()
+            results_manager.write_report()
 
     except Exception as e:
         logger.error(f"An error occurred: {str(e)}")
         logger.error("Please check the error message and your data processing steps.")
+    finally:
+        instrumentation.write()
 
 if __name__ == "__main__":
     main()
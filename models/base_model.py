@@ -1,10 +1,13 @@
 # models/base_model.py
 from abc import ABC, abstractmethod
-from sklearn.model_selection import cross_val_score, cross_val_predict
-from sklearn.metrics import classification_report, confusion_matrix
-import numpy as np
+import joblib
+from .cross_validation import CrossValidationEngine
 
 class BaseModel(ABC):
+    # joblib backend for fold fits and the probability cut-off for positive labels.
+    cv_backend = 'loky'
+    positive_threshold = 0.5
+
     def __init__(self, X, y):
         self.X = X
         self.y = y
@@ -22,24 +25,18 @@ class BaseModel(ABC):
     def get_feature_importance(self, feature_names):
         pass
 
-    def cross_validate(self, cv=5):
-        if self.model is None:
-            raise ValueError("Model has not been trained yet. Call train() first.")
-        
-        # Perform cross-validation
-        cv_scores = cross_val_score(self.model, self.X, self.y, cv=cv)
-        
-        # Get cross-validated predictions
-        cv_predictions = cross_val_predict(self.model, self.X, self.y, cv=cv)
-        
-        # Calculate performance metrics
-        cv_report = classification_report(self.y, cv_predictions)
-        cv_confusion_matrix = confusion_matrix(self.y, cv_predictions)
-        
-        return {
-            'cv_scores': cv_scores,
-            'cv_mean_score': np.mean(cv_scores),
-            'cv_std_score': np.std(cv_scores),
-            'cv_report': cv_report,
-            'cv_confusion_matrix': cv_confusion_matrix
-        }
+    @abstractmethod
+    def make_estimator(self):
+        """A fresh, unfitted scikit-learn compatible estimator with this model's parameters."""
+        pass
+
+    def cross_validate(self, cv=5, n_jobs=None, threads_per_fold=None):
+        # Folds fit their own estimators from make_estimator(), independent of train().
+        return CrossValidationEngine(n_folds=cv, n_jobs=n_jobs, threads_per_fold=threads_per_fold).run(self)
+
+    def save_estimator(self, directory):
+        joblib.dump(self.model, directory / 'estimator.joblib')
+
+    def load_estimator(self, directory):
+        self.model = joblib.load(directory / 'estimator.joblib')
+        return self
@@ -0,0 +1,88 @@
+# models/cross_validation.py
+import numpy as np
+from joblib import Parallel, delayed, parallel_config
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from sklearn.model_selection import StratifiedKFold
+from utils.logger import app_logger as logger
+
+
+def positive_probability(estimator, X):
+    # classes_ is sorted, so the positive class (1 / True) is the last column.
+    return estimator.predict_proba(X)[:, -1]
+
+
+def _fit_fold(estimator, X, y, train, test, threshold, keep_estimator):
+    estimator = clone(estimator).fit(X[train], y[train])
+    probabilities = positive_probability(estimator, X[test])
+    return probabilities, (probabilities > threshold), estimator if keep_estimator else None
+
+
+class CrossValidationEngine:
+    """Stratified k-fold evaluation with exactly one fit per fold.
+
+    Fold scores, out-of-fold predictions and probabilities, the classification report and the
+    confusion matrix all come from the same k fits, which run in parallel. Labels are the
+    out-of-fold probabilities above the model's positive_threshold (0.5 reproduces predict()).
+    The folds are returned so later steps (learning curves, tuning) can reuse them.
+    """
+
+    def __init__(self, n_folds=5, n_jobs=None, shuffle=True, random_state=42, keep_estimators=False,
+                 threads_per_fold=None):
+        self.n_folds = n_folds
+        self.n_jobs = n_jobs
+        self.threads_per_fold = threads_per_fold
+        self.shuffle = shuffle
+        self.random_state = random_state
+        self.keep_estimators = keep_estimators
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(n_folds=config.get_nested('cross_validation', 'n_folds', default=5),
+                   n_jobs=config.get_nested('cross_validation', 'n_jobs'),
+                   random_state=config.get_nested('cross_validation', 'random_state', default=42))
+
+    def split(self, X, y):
+        splitter = StratifiedKFold(n_splits=self.n_folds, shuffle=self.shuffle,
+                                   random_state=self.random_state if self.shuffle else None)
+        return list(splitter.split(X, y))
+
+    def run(self, model, X=None, y=None, folds=None):
+        X = np.asarray(model.X if X is None else X)
+        y = np.asarray(model.y if y is None else y)
+        folds = folds or self.split(X, y)
+        threshold = getattr(model, 'positive_threshold', 0.5)
+
+        estimator = model.make_estimator()
+        # Estimators that cannot be pickled to worker processes (Keras) run their folds in threads.
+        backend = getattr(model, 'cv_backend', 'loky')
+        # threads_per_fold caps BLAS/OpenMP threads inside worker processes.
+        inner_threads = self.threads_per_fold if backend == 'loky' else None
+        with parallel_config(backend=backend, inner_max_num_threads=inner_threads):
+            fold_results = Parallel(n_jobs=self.n_jobs)(
+                delayed(_fit_fold)(estimator, X, y, train, test, threshold, self.keep_estimators)
+                for train, test in folds)
+
+        oof_probabilities = np.empty(len(y), dtype=np.float64)
+        oof_positive = np.empty(len(y), dtype=bool)
+        for (_, test), (probabilities, positive, _) in zip(folds, fold_results):
+            oof_probabilities[test] = probabilities
+            oof_positive[test] = positive
+        # Labels come back in the target's own dtype (bool or 0/1).
+        classes = np.unique(y)
+        oof_predictions = classes[oof_positive.astype(int)] if len(classes) == 2 else oof_positive
+
+        cv_scores = np.array([accuracy_score(y[test], oof_predictions[test]) for _, test in folds])
+        logger.info(f"Cross-validation finished with {len(folds)} fits")
+        return {
+            'cv_scores': cv_scores,
+            'cv_mean_score': np.mean(cv_scores),
+            'cv_std_score': np.std(cv_scores),
+            'cv_report': classification_report(y, oof_predictions),
+            'cv_confusion_matrix': confusion_matrix(y, oof_predictions),
+            'oof_predictions': oof_predictions,
+            'oof_probabilities': oof_probabilities,
+            'folds': folds,
+            'fit_count': len(folds),
+            'fold_estimators': [estimator for _, _, estimator in fold_results] if self.keep_estimators else None,
+        }
@@ -15,7 +15,7 @@ class GradientBoostingModel(BaseModel):
         
         X_train, X_test, y_train, y_test = train_test_split(self.X, self.y, test_size=0.2, random_state=42, stratify=self.y)
         
-        self.model = GradientBoostingClassifier(**self.params)
+        self.model = self.make_estimator()
         self.model.fit(X_train, y_train)
         
         y_pred = self.model.predict(X_test)
@@ -26,6 +26,9 @@ class GradientBoostingModel(BaseModel):
         
         return self.model
 
+    def make_estimator(self):
+        return GradientBoostingClassifier(**self.params)
+
     def predict(self, X):
         if self.model is None:
             raise ValueError("Model has not been trained yet. Call train() first.")
@@ -0,0 +1,236 @@
+# models/hyperparameter_search.py
+import json
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+from joblib import Parallel, delayed, parallel_config
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from utils.logger import app_logger as logger
+
+from .cross_validation import CrossValidationEngine, positive_probability
+from .model_factory import ModelFactory
+from .model_registry import data_fingerprint, fingerprint
+
+# Budget that trains on a fraction of each fold's rows instead of setting an estimator parameter.
+SAMPLES = 'samples'
+# Searched like any other parameter, but applied when labelling probabilities, not by the estimator.
+THRESHOLD = 'positive_threshold'
+
+METRICS = {
+    'accuracy': lambda positive, probabilities, threshold: accuracy_score(positive, probabilities > threshold),
+    'f1': lambda positive, probabilities, threshold: f1_score(positive, probabilities > threshold),
+    'roc_auc': lambda positive, probabilities, threshold: roc_auc_score(positive, probabilities),
+}
+
+
+def sample_params(space, rng):
+    params = {}
+    for name, spec in space.items():
+        kind = spec.get('type', 'float')
+        if kind == 'choice':
+            params[name] = spec['values'][rng.integers(len(spec['values']))]
+        elif kind == 'int':
+            params[name] = int(rng.integers(spec['low'], spec['high'] + 1))
+        elif spec.get('log', False):
+            params[name] = float(np.exp(rng.uniform(np.log(spec['low']), np.log(spec['high']))))
+        else:
+            params[name] = float(rng.uniform(spec['low'], spec['high']))
+    return params
+
+
+def rung_budgets(min_budget, max_budget, eta, integer=True):
+    """Budgets growing by ``eta`` per rung and ending at ``max_budget``."""
+    n_rungs = int(math.floor(math.log(max_budget / min_budget, eta) + 1e-9)) + 1
+    budgets = [max_budget / eta ** (n_rungs - 1 - rung) for rung in range(n_rungs)]
+    return [int(round(budget)) for budget in budgets] if integer else budgets
+
+
+def _evaluate_fold(estimator, fold, budget_param, budget, threshold, metric):
+    X_train, y_train, X_test, positive_test = fold
+    if budget_param == SAMPLES:
+        # Training rows are shuffled once when the folds are prepared, so a prefix is a random sample.
+        n_rows = max(int(len(y_train) * budget), 1)
+        X_train, y_train = X_train[:n_rows], y_train[:n_rows]
+    else:
+        estimator = clone(estimator).set_params(**{budget_param: budget})
+    estimator = clone(estimator).fit(X_train, y_train)
+    return float(METRICS[metric](positive_test, positive_probability(estimator, X_test), threshold))
+
+
+class SuccessiveHalvingSearch:
+    """Successive halving over a search space for one configured model.
+
+    ``n_trials`` configurations are sampled from ``space`` and scored at the smallest budget
+    (an estimator parameter such as n_estimators or epochs, or ``samples``, a fraction of the
+    training rows); the best 1/eta move on to eta times the budget until ``budget['max']``.
+    The fold indices and the fold matrices are built once and shared by every trial, and
+    (trial, fold) fits run in parallel. Each fold score is written to ``checkpoint_path`` as it
+    arrives; rerunning the same search on the same data resumes where it stopped.
+    """
+
+    def __init__(self, model_config, space, budget, n_trials=27, eta=3, metric='roc_auc', n_folds=5,
+                 n_jobs=None, random_state=42, checkpoint_path=None):
+        if metric not in METRICS:
+            raise ValueError(f"Unsupported tuning metric: {metric}")
+        self.model_config = model_config
+        self.space = space
+        self.budget = budget
+        self.n_trials = n_trials
+        self.eta = eta
+        self.metric = metric
+        self.n_folds = n_folds
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+
+    @classmethod
+    def from_config(cls, config, model_config):
+        tuning = config.get('tuning') or {}
+        search_space = tuning['search_spaces'][model_config['name']]
+        directory = Path(tuning.get('directory', 'artifacts/tuning'))
+        return cls(model_config, search_space.get('params', {}), search_space['budget'],
+                   n_trials=tuning.get('n_trials', 27),
+                   eta=tuning.get('eta', 3),
+                   metric=tuning.get('metric', 'roc_auc'),
+                   n_folds=config.get_nested('cross_validation', 'n_folds', default=5),
+                   n_jobs=tuning.get('n_jobs'),
+                   random_state=tuning.get('random_state', 42),
+                   checkpoint_path=directory / f"{model_config['name']}.json")
+
+    def budgets(self):
+        integer = self.budget['param'] != SAMPLES and isinstance(self.budget['max'], int)
+        return rung_budgets(self.budget['min'], self.budget['max'], self.eta, integer)
+
+    def prepare_folds(self, X, y):
+        X, y = np.asarray(X), np.asarray(y)
+        rng = np.random.default_rng(self.random_state)
+        positive = y == np.unique(y)[-1]
+        folds = CrossValidationEngine(n_folds=self.n_folds, random_state=self.random_state).split(X, y)
+        return [(X[train], y[train], X[test], positive[test])
+                for train, test in ((rng.permutation(train), test) for train, test in folds)]
+
+    def run(self, X, y):
+        budgets = self.budgets()
+        state = self._load_checkpoint(X, y, budgets)
+        trials = state['trials']
+        folds = self.prepare_folds(X, y)
+        base_params = self.model_config['params'] or {}
+
+        survivors = list(range(len(trials)))
+        for rung, budget in enumerate(budgets):
+            pending = [(trial, fold) for trial in survivors for fold in range(self.n_folds)
+                       if str(fold) not in state['scores'].get(f"{trial}@{rung}", {})]
+            logger.info(f"{self.model_config['name']} rung {rung}: {len(survivors)} trials at "
+                        f"{self.budget['param']}={budget}, {len(pending)} fold fits to run")
+            if pending:
+                models = {trial: ModelFactory.create_model(self.model_config['type'], None, None,
+                                                           {**base_params, **self._estimator_params(trials[trial])})
+                          for trial in survivors}
+                backend = getattr(next(iter(models.values())), 'cv_backend', 'loky')
+                with parallel_config(backend=backend):
+                    results = Parallel(n_jobs=self.n_jobs, return_as='generator')(
+                        delayed(_evaluate_fold)(models[trial].make_estimator(), folds[fold], self.budget['param'],
+                                                budget, self._threshold(trials[trial], models[trial]), self.metric)
+                        for trial, fold in pending)
+                    for (trial, fold), score in zip(pending, results):
+                        state['scores'].setdefault(f"{trial}@{rung}", {})[str(fold)] = score
+                        self._save_checkpoint(state)
+
+            rung_scores = {trial: np.mean(list(state['scores'][f"{trial}@{rung}"].values())) for trial in survivors}
+            survivors.sort(key=lambda trial: rung_scores[trial], reverse=True)
+            logger.info(f"{self.model_config['name']} rung {rung} best {self.metric}: {rung_scores[survivors[0]]:.4f}")
+            if rung < len(budgets) - 1:
+                survivors = survivors[:max(1, len(survivors) // self.eta)]
+
+        best = survivors[0]
+        threshold = trials[best].get(THRESHOLD)
+        # A tuned threshold is reported on its own, without the configured one it replaces.
+        if threshold is not None:
+            base_params = self._estimator_params(base_params)
+        best_params = {**base_params, **self._estimator_params(trials[best])}
+        if self.budget['param'] != SAMPLES:
+            best_params[self.budget['param']] = budgets[-1]
+        return {
+            'best_params': best_params,
+            'best_score': float(np.mean(list(state['scores'][f"{best}@{len(budgets) - 1}"].values()))),
+            'positive_threshold': threshold,
+            'trials': self._leaderboard(state, budgets),
+        }
+
+    def _estimator_params(self, params):
+        return {name: value for name, value in params.items() if name != THRESHOLD}
+
+    def _threshold(self, params, model):
+        return params.get(THRESHOLD, model.positive_threshold)
+
+    def _leaderboard(self, state, budgets):
+        rows = []
+        for key, fold_scores in state['scores'].items():
+            trial, rung = map(int, key.split('@'))
+            rows.append({'trial': trial, 'rung': rung, self.budget['param']: budgets[rung],
+                         'score': np.mean(list(fold_scores.values())), 'folds': len(fold_scores),
+                         **state['trials'][trial]})
+        return pd.DataFrame(rows).sort_values(['rung', 'score'], ascending=False, ignore_index=True)
+
+    def _load_checkpoint(self, X, y, budgets):
+        search_fingerprint = fingerprint({
+            'data': data_fingerprint(X, y),
+            'model': self.model_config,
+            'space': self.space,
+            'budgets': budgets,
+            'n_trials': self.n_trials,
+            'metric': self.metric,
+            'n_folds': self.n_folds,
+            'random_state': self.random_state,
+        })
+        if self.checkpoint_path is not None and self.checkpoint_path.exists():
+            with open(self.checkpoint_path) as file:
+                state = json.load(file)
+            if state.get('fingerprint') == search_fingerprint:
+                logger.info(f"Resuming {self.model_config['name']} search from {self.checkpoint_path} "
+                            f"({sum(map(len, state['scores'].values()))} fold fits done)")
+                return state
+            logger.info(f"Search settings or data changed since {self.checkpoint_path}; starting over")
+
+        rng = np.random.default_rng(self.random_state)
+        return {'fingerprint': search_fingerprint,
+                'trials': [sample_params(self.space, rng) for _ in range(self.n_trials)],
+                'scores': {}}
+
+    def _save_checkpoint(self, state):
+        if self.checkpoint_path is None:
+            return
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as file:
+            json.dump(state, file)
+        os.replace(tmp_path, self.checkpoint_path)
+
+
+def tune_models(config, X, y):
+    """Search every configured model that has a search space and write the winners to best_params.yaml."""
+    search_spaces = config.get_nested('tuning', 'search_spaces', default={})
+    directory = Path(config.get_nested('tuning', 'directory', default='artifacts/tuning'))
+    directory.mkdir(parents=True, exist_ok=True)
+    tuned = {}
+    for model_config in ModelFactory.model_configs(config):
+        if model_config['name'] not in search_spaces:
+            continue
+        result = SuccessiveHalvingSearch.from_config(config, model_config).run(X, y)
+        logger.info(f"Best {model_config['name']} params: {result['best_params']} "
+                    f"({config.get_nested('tuning', 'metric', default='roc_auc')} {result['best_score']:.4f})")
+        tuned[model_config['name']] = {'params': result['best_params'], 'score': result['best_score']}
+        if result['positive_threshold'] is not None:
+            tuned[model_config['name']]['positive_threshold'] = result['positive_threshold']
+        result['trials'].to_csv(directory / f"{model_config['name']}_trials.csv", index=False)
+
+    if tuned:
+        with open(directory / 'best_params.yaml', 'w') as file:
+            yaml.safe_dump(tuned, file, sort_keys=False)
+        logger.info(f"Tuned parameters written to {directory / 'best_params.yaml'}")
+    return tuned
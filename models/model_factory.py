@@ -1,16 +1,36 @@
 # models/model_factory.py
-from .random_forest_model import RandomForestModel
-from .gradient_boosting_model import GradientBoostingModel
-from .neural_network_model import NeuralNetworkModel
+from utils.plugins import PluginRegistry
 
 class ModelFactory:
+    # Config model types. A model's module, and with it its backend (TensorFlow for the
+    # network), is imported only when a config asks for that type.
+    MODEL_TYPES = PluginRegistry('model type', 'optimal_options.models', {
+        'RandomForestClassifier': 'models.random_forest_model:RandomForestModel',
+        'GradientBoostingClassifier': 'models.gradient_boosting_model:GradientBoostingModel',
+        'NeuralNetworkModel': 'models.neural_network_model:NeuralNetworkModel',
+    })
+
+    # Sections of model_params shared by every configured model of a type.
+    MODEL_PARAMS_SECTIONS = {
+        'RandomForestClassifier': 'random_forest',
+        'GradientBoostingClassifier': 'gradient_boosting',
+        'NeuralNetworkModel': 'neural_network',
+    }
+
+    @staticmethod
+    def model_configs(config):
+        """The configured models, each with its type's model_params section under its own params."""
+        model_configs = []
+        for model_config in config.get('models'):
+            section = ModelFactory.MODEL_PARAMS_SECTIONS.get(model_config['type'])
+            shared = config.get_nested('model_params', section, default={}) if section else {}
+            model_configs.append({**model_config, 'params': {**shared, **(model_config.get('params') or {})}})
+        return model_configs
+
+    @staticmethod
+    def register(model_type, model_class=None):
+        return ModelFactory.MODEL_TYPES.register(model_type, model_class)
+
     @staticmethod
     def create_model(model_type, X, y, params):
-        if model_type == "RandomForestClassifier":
-            return RandomForestModel(X, y, params)
-        elif model_type == "GradientBoostingClassifier":
-            return GradientBoostingModel(X, y, params)
-        elif model_type == "NeuralNetworkModel":
-            return NeuralNetworkModel(X, y, params)
-        else:
-            raise ValueError(f"Unsupported model type: {model_type}")
+        return ModelFactory.MODEL_TYPES.get(model_type)(X, y, params)
@@ -0,0 +1,200 @@
+# models/model_registry.py
+import hashlib
+import json
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import pandas as pd
+from utils.logger import app_logger as logger
+
+from .model_factory import ModelFactory
+
+# Sections that change how a run is executed or reported, not what a model learns. Data
+# settings reach the key through the data hash, and each model's own entry through its params.
+IGNORED_CONFIG_KEYS = ('debug_logging', 'training', 'registry', 'visualization', 'reporting',
+                       'cache', 'bar_store', 'feature_store', 'models', 'scoring', 'tuning')
+
+
+def fingerprint(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def data_fingerprint(X, y):
+    digest = hashlib.sha256()
+    digest.update(json.dumps([list(map(str, X.columns)), [str(dtype) for dtype in X.dtypes]]).encode())
+    digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(pd.Series(y), index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """Fitted models and their CV results, addressed by what produced them.
+
+    The key hashes the training data (feature matrix and target), the resolved config minus
+    IGNORED_CONFIG_KEYS, the model type and its params; any change to one of them is a miss.
+    Each entry is ``<directory>/<key>/`` holding the estimator (saved by the model class:
+    joblib, or Keras' native format for the network), the preprocessor its features went
+    through (``preprocessor.joblib``, when given), ``cv_results.joblib`` and ``metadata.json``.
+    Entries older than ``max_age_days`` or beyond the ``max_entries`` most
+    recently used are evicted.
+    """
+
+    METADATA = 'metadata.json'
+    PREPROCESSOR = 'preprocessor.joblib'
+
+    def __init__(self, directory, config=None, max_entries=None, max_age_days=None, force_retrain=False):
+        self.directory = Path(directory)
+        self.config_fingerprint = fingerprint({key: value for key, value in (config or {}).items()
+                                               if key not in IGNORED_CONFIG_KEYS})
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.force_retrain = force_retrain
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config, force_retrain=False):
+        registry_config = config.get('registry') or {}
+        if not registry_config.get('enabled', False):
+            return None
+        return cls(registry_config.get('directory', 'artifacts/models'),
+                   config=config.config,
+                   max_entries=registry_config.get('max_entries'),
+                   max_age_days=registry_config.get('max_age_days'),
+                   force_retrain=force_retrain or registry_config.get('force_retrain', False))
+
+    def key(self, model_config, X, y):
+        return self._key(model_config, data_fingerprint(X, y))
+
+    def _key(self, model_config, data):
+        # The data is hashed on every lookup: a cached hash can go stale when X is changed in place.
+        return fingerprint({
+            'data': data,
+            'config': self.config_fingerprint,
+            'type': model_config['type'],
+            'params': model_config['params'],
+        })
+
+    def load(self, model_config, X, y):
+        """(model, cv_results) for a stored fit of ``model_config`` on X, y, else None."""
+        if self.force_retrain:
+            return None
+        path = self.directory / self.key(model_config, X, y)
+        if not (path / self.METADATA).exists():
+            return None
+
+        try:
+            model = ModelFactory.create_model(model_config['type'], X, y, model_config['params'])
+            model.load_estimator(path)
+            cv_results = joblib.load(path / 'cv_results.joblib')
+        except Exception as e:
+            logger.warning(f"Discarding unreadable registry entry {path.name}: {str(e)}")
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+
+        metadata = self._read_metadata(path)
+        metadata['last_used'] = time.time()
+        self._write_metadata(path, metadata)
+        logger.info(f"Loaded {model_config['name']} from the model registry ({path.name[:12]})")
+        return model, cv_results
+
+    def latest(self, model_config, preprocessor_fingerprint=None):
+        """The newest stored fit of ``model_config`` under the current config, on whatever data.
+
+        Only fits stored with their preprocessor count; with ``preprocessor_fingerprint``, only
+        fits behind that preprocessor.
+        """
+        entry = self._latest_entry([model_config], preprocessor_fingerprint)
+        if entry is None:
+            return None
+        path, metadata = entry
+
+        model = ModelFactory.create_model(model_config['type'], None, None, model_config['params'])
+        model.load_estimator(path)
+        logger.info(f"Loaded {model_config['name']} trained at {metadata['created_at']} ({path.name[:12]})")
+        return model
+
+    def latest_preprocessor(self, model_configs):
+        """(preprocessor, fingerprint) stored with the newest fit of any of ``model_configs``, else (None, None)."""
+        entry = self._latest_entry(model_configs)
+        if entry is None:
+            return None, None
+        path, metadata = entry
+        return joblib.load(path / self.PREPROCESSOR), metadata['preprocessor_fingerprint']
+
+    def _latest_entry(self, model_configs, preprocessor_fingerprint=None):
+        wanted = {(model_config['type'], fingerprint(model_config['params'])) for model_config in model_configs}
+        matches = [(path, metadata) for path, metadata in self.entries()
+                   if (metadata['type'], fingerprint(metadata['params'])) in wanted
+                   and metadata['config_fingerprint'] == self.config_fingerprint
+                   and metadata.get('preprocessor_fingerprint') is not None
+                   and preprocessor_fingerprint in (None, metadata['preprocessor_fingerprint'])]
+        if not matches:
+            return None
+        return max(matches, key=lambda entry: entry[1]['created'])
+
+    def save(self, model_config, X, y, model, cv_results, preprocessor=None):
+        data = data_fingerprint(X, y)
+        key = self._key(model_config, data)
+        path = self.directory / key
+        tmp_path = self.directory / f".{key}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
+        model.save_estimator(tmp_path)
+        # Fold estimators are not kept; the folds and out-of-fold results are.
+        joblib.dump({**cv_results, 'fold_estimators': None}, tmp_path / 'cv_results.joblib')
+        preprocessor_fingerprint = None
+        if preprocessor is not None:
+            joblib.dump(preprocessor, tmp_path / self.PREPROCESSOR)
+            preprocessor_fingerprint = hashlib.sha256((tmp_path / self.PREPROCESSOR).read_bytes()).hexdigest()
+        now = time.time()
+        self._write_metadata(tmp_path, {
+            'name': model_config['name'],
+            'type': model_config['type'],
+            'params': model_config['params'],
+            'config_fingerprint': self.config_fingerprint,
+            'data_fingerprint': data,
+            'preprocessor_fingerprint': preprocessor_fingerprint,
+            'cv_mean_score': float(cv_results['cv_mean_score']),
+            'created': now,
+            'created_at': datetime.fromtimestamp(now).isoformat(),
+            'last_used': now,
+        })
+        shutil.rmtree(path, ignore_errors=True)
+        tmp_path.rename(path)
+        logger.info(f"Stored {model_config['name']} in the model registry ({key[:12]})")
+        self.evict()
+
+    def entries(self):
+        entries = []
+        for path in self.directory.iterdir():
+            if path.is_dir() and not path.name.startswith('.') and (path / self.METADATA).exists():
+                entries.append((path, self._read_metadata(path)))
+        return entries
+
+    def evict(self):
+        entries = self.entries()
+        if self.max_age_days is not None:
+            cutoff = time.time() - self.max_age_days * 86400
+            for path, metadata in entries:
+                if metadata['created'] < cutoff:
+                    self._remove(path, 'expired')
+            entries = [(path, metadata) for path, metadata in entries if metadata['created'] >= cutoff]
+        if self.max_entries is not None and len(entries) > self.max_entries:
+            entries.sort(key=lambda entry: entry[1]['last_used'], reverse=True)
+            for path, _ in entries[self.max_entries:]:
+                self._remove(path, 'least recently used')
+
+    def _remove(self, path, reason):
+        shutil.rmtree(path, ignore_errors=True)
+        logger.debug("Evicted registry entry %s (%s)", path.name, reason)
+
+    def _read_metadata(self, path):
+        with open(path / self.METADATA) as file:
+            return json.load(file)
+
+    def _write_metadata(self, path, metadata):
+        with open(path / self.METADATA, 'w') as file:
+            json.dump(metadata, file, indent=2, default=str)
@@ -1,52 +1,139 @@
 from .base_model import BaseModel
+import copy
+import joblib
 import tensorflow as tf
+from tensorflow.keras.callbacks import EarlyStopping
 from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, Dropout
+from tensorflow.keras.layers import Dense, Dropout, Input
 from tensorflow.keras.optimizers import Adam
+from sklearn.base import BaseEstimator, ClassifierMixin
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import classification_report, confusion_matrix
 import pandas as pd
 import numpy as np
 
-class NeuralNetworkModel(BaseModel):
-    def __init__(self, X, y, params):
-        super().__init__(X, y)
-        self.params = params
-        self.scaler = StandardScaler()
+class KerasBinaryClassifier(BaseEstimator, ClassifierMixin):
+    """The network behind NeuralNetworkModel as a scikit-learn estimator, so it can be cloned per CV fold.
+
+    Training streams shuffled batches through a prefetching tf.data pipeline and, when
+    ``patience`` is set, stops once the validation loss stops improving and restores the
+    weights of the best epoch. Inference runs a compiled tf.function traced once for any
+    batch size, so a single contract and a whole chain take the same graph.
+    """
+
+    def __init__(self, epochs=50, batch_size=32, validation_split=0.2, learning_rate=0.001, patience=None,
+                 threshold=0.5, inference_batch_size=65536, random_state=None):
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.validation_split = validation_split
+        self.learning_rate = learning_rate
+        self.patience = patience
+        self.threshold = threshold
+        self.inference_batch_size = inference_batch_size
+        self.random_state = random_state
 
     def build_model(self, input_shape):
         model = Sequential([
-            Dense(64, activation='relu', input_shape=(input_shape,)),
+            Input(shape=(input_shape,)),
+            Dense(64, activation='relu'),
             Dropout(0.2),
             Dense(32, activation='relu'),
             Dropout(0.2),
             Dense(16, activation='relu'),
             Dense(1, activation='sigmoid')
         ])
-        model.compile(optimizer=Adam(learning_rate=0.001),
+        model.compile(optimizer=Adam(learning_rate=self.learning_rate),
                       loss='binary_crossentropy',
                       metrics=['accuracy'])
         return model
 
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=np.float32)
+        self.classes_ = np.unique(y)
+        target = (np.asarray(y) == self.classes_[-1]).astype(np.float32)
+        self.model_ = self.build_model(X.shape[1])
+        self.predict_fn_ = None
+
+        train, validation = self._split(len(X))
+        validation_data = self._dataset(X[validation], target[validation]) if len(validation) else None
+        callbacks = []
+        if validation_data is not None and self.patience is not None:
+            callbacks.append(EarlyStopping(monitor='val_loss', patience=self.patience, restore_best_weights=True))
+        # Only the metrics dict is kept; the History callback would pickle the model a second time.
+        self.history_ = self.model_.fit(self._dataset(X[train], target[train], shuffle=True),
+                                        validation_data=validation_data,
+                                        epochs=self.epochs,
+                                        callbacks=callbacks,
+                                        verbose=0).history
+        self.best_epoch_ = callbacks[0].best_epoch + 1 if callbacks else len(self.history_['loss'])
+        return self
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        predict = self._predict_function()
+        positive = np.empty(len(X), dtype=np.float32)
+        for start in range(0, len(X), self.inference_batch_size):
+            positive[start:start + self.inference_batch_size] = predict(X[start:start + self.inference_batch_size]).numpy().ravel()
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] > self.threshold).astype(int)]
+
+    def _split(self, n_rows):
+        if not self.validation_split:
+            return np.arange(n_rows), np.arange(0)
+        # Rows arrive grouped by ticker; a random hold-out keeps validation representative.
+        order = np.random.default_rng(self.random_state).permutation(n_rows)
+        n_validation = int(n_rows * self.validation_split)
+        return np.sort(order[n_validation:]), np.sort(order[:n_validation])
+
+    def _dataset(self, X, y, shuffle=False):
+        dataset = tf.data.Dataset.from_tensor_slices((X, y))
+        if shuffle:
+            dataset = dataset.shuffle(len(X), seed=self.random_state, reshuffle_each_iteration=True)
+        return dataset.batch(self.batch_size).prefetch(tf.data.AUTOTUNE)
+
+    def _predict_function(self):
+        if getattr(self, 'predict_fn_', None) is None:
+            model = self.model_
+            # The batch dimension is left open so every batch size reuses one trace.
+            self.predict_fn_ = tf.function(lambda X: model(X, training=False), reduce_retracing=True,
+                                           input_signature=[tf.TensorSpec([None, model.input_shape[-1]], tf.float32)])
+        return self.predict_fn_
+
+    def __getstate__(self):
+        # Compiled functions do not pickle; the next prediction traces a new one.
+        state = self.__dict__.copy()
+        state.pop('predict_fn_', None)
+        return state
+
+class NeuralNetworkModel(BaseModel):
+    # TensorFlow releases the GIL while it trains, so fold threads run in parallel without each
+    # fold paying for a new process that imports and initialises TensorFlow.
+    cv_backend = 'threading'
+
+    def __init__(self, X, y, params):
+        super().__init__(X, y)
+        params = dict(params)
+        # Labels and CV predictions use this cut-off; the estimator gets the rest.
+        self.positive_threshold = params.pop('positive_threshold', self.positive_threshold)
+        self.params = params
+
+    def make_estimator(self):
+        return KerasBinaryClassifier(threshold=self.positive_threshold, **self.params)
+
     def train(self):
         if len(self.X) == 0:
             raise ValueError("No data available for training. Check your data processing steps.")
         
         X_train, X_test, y_train, y_test = train_test_split(self.X, self.y, test_size=0.2, random_state=42, stratify=self.y)
         
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
-        
-        self.model = self.build_model(X_train.shape[1])
-        
-        history = self.model.fit(X_train_scaled, y_train, 
-                                 validation_split=0.2,
-                                 epochs=50, 
-                                 batch_size=32, 
-                                 verbose=0)
+        # Inputs arrive already imputed and standardized by the pipeline's preprocessor.
+        self.model = self.make_estimator().fit(X_train, y_train)
         
-        y_pred = (self.model.predict(X_test_scaled) > 0.5).astype(int)
+        y_pred = self.model.predict(X_test)
         print("\nModel Performance:")
         print(classification_report(y_test, y_pred))
         print("Confusion Matrix:")
@@ -57,14 +144,13 @@ class NeuralNetworkModel(BaseModel):
     def predict(self, X):
         if self.model is None:
             raise ValueError("Model has not been trained yet. Call train() first.")
-        X_scaled = self.scaler.transform(X)
-        return (self.model.predict(X_scaled) > 0.5).astype(int)
+        return self.model.predict(X)
 
     def get_feature_importance(self, feature_names):
         if self.model is None:
             raise ValueError("Model has not been trained yet. Call train() first.")
         
-        first_layer_weights = np.abs(self.model.layers[0].get_weights()[0])
+        first_layer_weights = np.abs(self.model.model_.layers[0].get_weights()[0])
         feature_importance = np.sum(first_layer_weights, axis=1)
         return pd.DataFrame({'feature': feature_names, 'importance': feature_importance}).sort_values('importance', ascending=False)
 
@@ -72,3 +158,15 @@ class NeuralNetworkModel(BaseModel):
         if self.model is None:
             raise ValueError("Model has not been trained yet. Call train() first.")
         return self.model.predict_proba(X)
+
+    def save_estimator(self, directory):
+        # The network goes in Keras' native format, the scikit-learn wrapper around it in joblib.
+        self.model.model_.save(directory / 'network.keras')
+        wrapper = copy.copy(self.model)
+        del wrapper.model_
+        joblib.dump(wrapper, directory / 'estimator.joblib')
+
+    def load_estimator(self, directory):
+        self.model = joblib.load(directory / 'estimator.joblib')
+        self.model.model_ = tf.keras.models.load_model(directory / 'network.keras')
+        return self
@@ -1,4 +1,202 @@
 # Core tests for models
 
+import json
 import pytest
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_classification
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import cross_val_predict, cross_val_score
 
+from models.base_model import BaseModel
+from models.cross_validation import CrossValidationEngine
+
+
+class CountingLogisticRegression(LogisticRegression):
+    fits = 0
+
+    def fit(self, X, y):
+        type(self).fits += 1
+        return super().fit(X, y)
+
+
+class LogisticModel(BaseModel):
+    def __init__(self, X, y, params=None):
+        super().__init__(X, y)
+        self.params = params or {}
+
+    def make_estimator(self):
+        return CountingLogisticRegression(**self.params)
+
+    def train(self):
+        self.model = self.make_estimator().fit(self.X, self.y)
+        return self.model
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+    def get_feature_importance(self, feature_names):
+        return pd.DataFrame({'feature': feature_names, 'importance': np.abs(self.model.coef_[0])})
+
+
+def make_dataset(n_samples=400):
+    X, y = make_classification(n_samples=n_samples, n_features=6, random_state=0)
+    return pd.DataFrame(X, columns=[f'f{i}' for i in range(6)]), pd.Series(y.astype(bool), name='target')
+
+
+def test_cross_validation_fits_each_fold_once_and_matches_sklearn():
+    X, y = make_dataset()
+    CountingLogisticRegression.fits = 0
+    engine = CrossValidationEngine(n_folds=5, n_jobs=1)
+    results = engine.run(LogisticModel(X, y))
+
+    assert CountingLogisticRegression.fits == results['fit_count'] == 5
+    folds = results['folds']
+    expected_scores = cross_val_score(LogisticRegression(), X, y, cv=folds)
+    expected_probabilities = cross_val_predict(LogisticRegression(), X, y, cv=folds, method='predict_proba')[:, 1]
+    np.testing.assert_allclose(results['cv_scores'], expected_scores)
+    np.testing.assert_allclose(results['oof_probabilities'], expected_probabilities)
+    assert results['oof_predictions'].dtype == bool
+    assert results['cv_confusion_matrix'].sum() == len(y)
+
+
+def test_cross_validation_runs_folds_in_parallel_processes():
+    X, y = make_dataset()
+    sequential = CrossValidationEngine(n_folds=4, n_jobs=1).run(LogisticModel(X, y))
+    parallel = CrossValidationEngine(n_folds=4, n_jobs=2).run(LogisticModel(X, y))
+    np.testing.assert_array_equal(parallel['oof_probabilities'], sequential['oof_probabilities'])
+
+
+def test_orchestrator_trains_models_in_worker_processes_and_streams_results():
+    from models.training_orchestrator import TrainingOrchestrator
+
+    X, y = make_dataset(200)
+    model_configs = [
+        {'name': 'RandomForest', 'type': 'RandomForestClassifier', 'params': {'n_estimators': 10, 'random_state': 0}},
+        {'name': 'GradientBoosting', 'type': 'GradientBoostingClassifier', 'params': {'n_estimators': 10}},
+    ]
+    orchestrator = TrainingOrchestrator(model_configs, n_folds=3, max_workers=2, threads_per_job=1)
+    results = {}
+    orchestrator.run(X, y, on_result=lambda name, model, cv_results: results.update({name: (model, cv_results)}))
+
+    assert set(results) == {'RandomForest', 'GradientBoosting'}
+    for model, cv_results in results.values():
+        assert cv_results['fit_count'] == 3
+        assert model.predict(X).shape == (len(X),)
+
+
+def test_registry_loads_unchanged_models_instead_of_retraining(tmp_path, monkeypatch):
+    import models.training_orchestrator as training_orchestrator
+    from models.model_registry import ModelRegistry
+    from models.training_orchestrator import TrainingOrchestrator
+
+    X, y = make_dataset(200)
+    model_config = {'name': 'RandomForest', 'type': 'RandomForestClassifier', 'params': {'n_estimators': 5, 'random_state': 0}}
+    trained = []
+    train_model = training_orchestrator.train_model
+    monkeypatch.setattr(training_orchestrator, 'train_model', lambda config, *args: trained.append(config['name']) or train_model(config, *args))
+
+    def run(registry, configs=(model_config,)):
+        results = {}
+        TrainingOrchestrator(list(configs), n_folds=3, max_workers=1, registry=registry).run(
+            X, y, on_result=lambda name, model, cv_results: results.update({name: (model, cv_results)}))
+        return results
+
+    first = run(ModelRegistry(tmp_path, config={'target': {'type': 'profit'}}, max_entries=2))
+    second = run(ModelRegistry(tmp_path, config={'target': {'type': 'profit'}}, max_entries=2))
+    assert trained == ['RandomForest']
+    np.testing.assert_array_equal(second['RandomForest'][0].predict(X), first['RandomForest'][0].predict(X))
+    np.testing.assert_array_equal(second['RandomForest'][1]['oof_probabilities'], first['RandomForest'][1]['oof_probabilities'])
+
+    run(ModelRegistry(tmp_path, config={'target': {'type': 'profit'}}, force_retrain=True))
+    run(ModelRegistry(tmp_path, config={'target': {'type': 'delta_profit'}}, max_entries=2))
+    changed = {**model_config, 'params': {'n_estimators': 6, 'random_state': 0}}
+    run(ModelRegistry(tmp_path, config={'target': {'type': 'profit'}}, max_entries=2), [changed])
+    assert len(trained) == 4
+    assert len(ModelRegistry(tmp_path).entries()) == 2
+
+    registry = ModelRegistry(tmp_path)
+    key = registry.key(model_config, X, y)
+    X.iloc[0, 0] += 1
+    assert registry.key(model_config, X, y) != key
+
+
+def test_registry_pairs_fits_with_the_preprocessor_they_were_trained_behind(tmp_path):
+    from data.preprocessor import StreamingPreprocessor
+    from models.model_registry import ModelRegistry
+    from models.training_orchestrator import TrainingOrchestrator
+
+    X, y = make_dataset(200)
+    forest = {'name': 'RandomForest', 'type': 'RandomForestClassifier', 'params': {'n_estimators': 5, 'random_state': 0}}
+    boosting = {'name': 'GradientBoosting', 'type': 'GradientBoostingClassifier', 'params': {'n_estimators': 5, 'random_state': 0}}
+    registry = ModelRegistry(tmp_path)
+    old, new = StreamingPreprocessor().fit(X), StreamingPreprocessor().fit(X * 2)
+    TrainingOrchestrator([forest, boosting], n_folds=3, max_workers=1, registry=registry).run(
+        X, y, on_result=lambda *args: None, preprocessor=old)
+    TrainingOrchestrator([boosting], n_folds=3, max_workers=1, registry=registry).run(
+        X * 2, y, on_result=lambda *args: None, preprocessor=new)
+
+    preprocessor, preprocessor_fingerprint = registry.latest_preprocessor([forest, boosting])
+    np.testing.assert_array_equal(preprocessor.transform(X), new.transform(X))
+    assert registry.latest(boosting, preprocessor_fingerprint) is not None
+    assert registry.latest(forest, preprocessor_fingerprint) is None
+    assert registry.latest(forest) is not None
+
+
+def test_successive_halving_promotes_best_trials_and_resumes_from_checkpoint(tmp_path, monkeypatch):
+    import models.hyperparameter_search as hyperparameter_search
+    from models.hyperparameter_search import SuccessiveHalvingSearch, rung_budgets
+
+    assert rung_budgets(12, 300, 3) == [33, 100, 300]
+    X, y = make_dataset(200)
+    model_config = {'name': 'RandomForest', 'type': 'RandomForestClassifier', 'params': {'random_state': 0}}
+    fits = []
+    evaluate_fold = hyperparameter_search._evaluate_fold
+    monkeypatch.setattr(hyperparameter_search, '_evaluate_fold', lambda *args: fits.append(args[3]) or evaluate_fold(*args))
+
+    def search():
+        return SuccessiveHalvingSearch(model_config, {'max_depth': {'type': 'int', 'low': 1, 'high': 6}},
+                                       {'param': 'n_estimators', 'min': 2, 'max': 8}, n_trials=4, eta=2,
+                                       n_folds=3, n_jobs=1, checkpoint_path=tmp_path / 'RandomForest.json')
+
+    result = search().run(X, y)
+    # 4 trials at 2 trees, 2 at 4, 1 at 8, three folds each.
+    assert fits == [2] * 12 + [4] * 6 + [8] * 3
+    assert result['best_params']['n_estimators'] == 8
+    top = result['trials'].iloc[0]
+    assert top['rung'] == 2 and top['max_depth'] == result['best_params']['max_depth']
+
+    # An interrupted search only refits what the checkpoint is missing.
+    state = json.loads((tmp_path / 'RandomForest.json').read_text())
+    del state['scores'][next(key for key in state['scores'] if key.endswith('@2'))]
+    (tmp_path / 'RandomForest.json').write_text(json.dumps(state))
+    fits.clear()
+    assert search().run(X, y)['best_params'] == result['best_params']
+    assert fits == [8] * 3
+
+
+def test_neural_network_stops_early_and_scores_single_and_bulk_rows(tmp_path):
+    import tensorflow as tf
+    from models.model_factory import ModelFactory
+    from utils.config_manager import ConfigManager
+
+    tf.keras.utils.set_random_seed(0)
+    config_path = tmp_path / 'config.yaml'
+    config_path.write_text("model_params:\n  neural_network:\n    positive_threshold: 0.3\n    patience: 2\n"
+                           "models:\n  - name: NeuralNetwork\n    type: NeuralNetworkModel\n"
+                           "    params:\n      epochs: 40\n      batch_size: 64\n      random_state: 0\n")
+    (model_config,) = ModelFactory.model_configs(ConfigManager(config_path))
+    X, y = make_dataset(300)
+    model = ModelFactory.create_model(model_config['type'], X, y, model_config['params'])
+    estimator = model.make_estimator().fit(X, y)
+
+    assert model.positive_threshold == estimator.threshold == 0.3
+    assert len(estimator.history_['loss']) < 40 and estimator.best_epoch_ <= len(estimator.history_['loss'])
+    bulk = estimator.predict_proba(X)
+    np.testing.assert_allclose(estimator.predict_proba(X.to_numpy()[0]), bulk[:1], rtol=1e-5)
+    np.testing.assert_allclose(bulk[:, 1], estimator.model_.predict(X.to_numpy(), verbose=0).ravel(), rtol=1e-5)
+    np.testing.assert_array_equal(estimator.predict(X), estimator.classes_[(bulk[:, 1] > 0.3).astype(int)])
+
+    model.model = estimator
+    model.save_estimator(tmp_path)
+    np.testing.assert_allclose(model.load_estimator(tmp_path).predict_proba(X), bulk, rtol=1e-5)
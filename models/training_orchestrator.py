@@ -0,0 +1,146 @@
+# models/training_orchestrator.py
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from threadpoolctl import threadpool_limits
+from utils.instrumentation import Instrumentation, instrumentation, peak_rss
+from utils.logger import app_logger as logger
+
+from .model_factory import ModelFactory
+
+
+def available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def limit_tensorflow_threads(n_threads):
+    # TensorFlow fixes its pools when the runtime starts, so this only works in a fresh process.
+    try:
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(n_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(min(n_threads, 2))
+    except RuntimeError as e:
+        logger.debug(f"TensorFlow thread limits not applied: {str(e)}")
+
+
+def train_model(model_config, X, y, n_folds, n_threads, instrumentation_settings=None):
+    """Train and cross-validate one configured model within ``n_threads`` threads.
+
+    Returns (seconds, process peak RSS) of the fit and of the CV with the results. A worker
+    process passes ``instrumentation_settings`` to run the profile hook on its own fit or CV.
+    """
+    metrics = Instrumentation(**instrumentation_settings) if instrumentation_settings else instrumentation
+    name = model_config['name']
+    timings = {}
+    for variable in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[variable] = str(n_threads)
+    if model_config['type'] == 'NeuralNetworkModel':
+        limit_tensorflow_threads(n_threads)
+
+    with threadpool_limits(limits=n_threads):
+        start = time.perf_counter()
+        with metrics.span('model.fit', model=name):
+            model = ModelFactory.create_model(model_config['type'], X, y, model_config['params'])
+            model.train()
+        timings['fit'] = (time.perf_counter() - start, peak_rss())
+        # Folds share the job's budget: one thread each, at most n_threads folds at a time.
+        start = time.perf_counter()
+        with metrics.span('model.cv', model=name), threadpool_limits(limits=1):
+            cv_results = model.cross_validate(cv=n_folds, n_jobs=min(n_threads, n_folds), threads_per_fold=1)
+        timings['cv'] = (time.perf_counter() - start, peak_rss())
+    if metrics is not instrumentation:
+        metrics.write_profile()
+    return name, model, cv_results, timings
+
+
+class TrainingOrchestrator:
+    """Trains the configured models concurrently, one process per model.
+
+    The CPUs are split between the jobs: each gets ``threads_per_job`` threads, enforced on
+    BLAS/OpenMP pools with threadpoolctl and on TensorFlow through its intra/inter-op settings,
+    and its CV folds run at most that many at a time. Workers are spawned fresh for every job
+    because TensorFlow's thread settings cannot change once its runtime has started. Results
+    are handed to ``on_result`` as each model finishes, in completion order. With a registry,
+    stored fits are loaded instead of retrained and new fits are stored, together with the
+    preprocessor X came out of.
+    """
+
+    def __init__(self, model_configs, n_folds=5, max_workers=None, threads_per_job=None, registry=None):
+        self.model_configs = model_configs
+        self.n_folds = n_folds
+        self.registry = registry
+        cpus = available_cpus()
+        self.max_workers = max(1, min(max_workers or cpus, len(model_configs)))
+        self.threads_per_job = threads_per_job or max(1, cpus // self.max_workers)
+
+    @classmethod
+    def from_config(cls, config, registry=None):
+        return cls(ModelFactory.model_configs(config),
+                   n_folds=config.get_nested('cross_validation', 'n_folds', default=5),
+                   max_workers=config.get_nested('training', 'max_workers'),
+                   threads_per_job=config.get_nested('training', 'threads_per_job'),
+                   registry=registry)
+
+    def run(self, X, y, on_result, preprocessor=None):
+        model_configs = self._train_or_load(X, y, on_result)
+        if not model_configs:
+            return
+        logger.info(f"Training {len(model_configs)} models with {self.max_workers} workers, "
+                    f"{self.threads_per_job} threads each")
+        if self.max_workers == 1:
+            for model_config in model_configs:
+                try:
+                    result = train_model(model_config, X, y, self.n_folds, self.threads_per_job)
+                except Exception as e:
+                    logger.error(f"Training {model_config['name']} failed: {str(e)}")
+                    continue
+                self._deliver(model_config, X, y, result, on_result, preprocessor)
+            return
+
+        settings = instrumentation.settings() if instrumentation.enabled else None
+
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context, max_tasks_per_child=1) as executor:
+            futures = {executor.submit(train_model, model_config, X, y, self.n_folds, self.threads_per_job, settings):
+                       model_config for model_config in model_configs}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Training {futures[future]['name']} failed: {str(e)}")
+                    continue
+                # Spans from a worker process are timed there and recorded here. Each worker
+                # trains one model, so its process peak is the peak of that model's stages.
+                name, _, _, timings = result
+                for stage, (seconds, peak) in timings.items():
+                    instrumentation.record(f"model.{stage}", seconds, peak_rss=peak, model=name)
+                self._deliver(futures[future], X, y, result, on_result, preprocessor)
+
+    def _train_or_load(self, X, y, on_result):
+        # Registry hits are reported straight away; only the misses need a worker.
+        if self.registry is None:
+            return list(self.model_configs)
+        pending = []
+        for model_config in self.model_configs:
+            stored = self.registry.load(model_config, X, y)
+            instrumentation.count('registry_lookups', result='miss' if stored is None else 'hit')
+            if stored is None:
+                pending.append(model_config)
+            else:
+                on_result(model_config['name'], *stored)
+        return pending
+
+    def _deliver(self, model_config, X, y, result, on_result, preprocessor):
+        name, model, cv_results, timings = result
+        (fit_seconds, _), (cv_seconds, _) = timings['fit'], timings['cv']
+        logger.info(f"{name} finished in {fit_seconds + cv_seconds:.1f}s ({fit_seconds:.1f}s fit, "
+                    f"{cv_seconds:.1f}s CV) with {cv_results['fit_count']} CV fits")
+        instrumentation.count('fits', 1 + cv_results['fit_count'], model=name)
+        if self.registry is not None:
+            self.registry.save(model_config, X, y, model, cv_results, preprocessor)
+        on_result(name, model, cv_results)
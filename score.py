@@ -0,0 +1,66 @@
+# score.py
+import argparse
+import asyncio
+import os
+from utils.config_manager import ConfigManager
+from scoring.live_screener import LiveScreener
+from scoring.scorer import BatchScorer, screen
+from scoring.server import ScoringServer
+from utils.instrumentation import configure as configure_instrumentation, instrumentation
+from utils.logger import app_logger as logger, toggle_debug_logging
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Score fresh option chains with the trained models.")
+    parser.add_argument('--tickers', nargs='+', help="Tickers to screen (default: data.tickers in the config)")
+    parser.add_argument('--top-n', type=int, help="Number of ranked contracts to keep (default: scoring.top_n)")
+    parser.add_argument('--output', help="Write the ranked contracts to this CSV file")
+    parser.add_argument('--serve', action='store_true',
+                        help="Serve POST /score requests on the configured host and port instead")
+    parser.add_argument('--live', action='store_true',
+                        help="Rescreen every scoring.live.interval_seconds, publishing the ranked contracts each cycle")
+    parser.add_argument('--cycles', type=int, help="Stop the live screener after this many cycles")
+    return parser.parse_args()
+
+def publish(ranked, output=None):
+    if output:
+        # Replaced whole, so a reader never sees a half-written ranking.
+        ranked.to_csv(f"{output}.tmp", index=False)
+        os.replace(f"{output}.tmp", output)
+        logger.info(f"Wrote {len(ranked)} ranked contracts to {output}")
+    else:
+        print(ranked.to_string(index=False))
+
+def main():
+    args = parse_args()
+    config = ConfigManager('config.yaml')
+
+    if config.get('debug_logging', False):
+        toggle_debug_logging(True)
+    configure_instrumentation(config)
+
+    # Preprocessor and models are loaded once and reused for every batch.
+    scorer = BatchScorer.from_config(config)
+
+    if args.serve:
+        ScoringServer.from_config(config, scorer).serve_forever()
+        return
+
+    if args.live:
+        screener = LiveScreener.from_config(config, scorer, tickers=args.tickers,
+                                            publish=lambda ranked: publish(ranked, args.output))
+        screener.top_n = args.top_n or screener.top_n
+        try:
+            asyncio.run(screener.run(cycles=args.cycles))
+        except KeyboardInterrupt:
+            logger.info("Live screener stopped")
+        finally:
+            instrumentation.write()
+        return
+
+    with instrumentation.span('screen'):
+        ranked = screen(config, scorer, tickers=args.tickers, top_n=args.top_n)
+    instrumentation.write()
+    publish(ranked, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# scoring/live_screener.py
+import asyncio
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+from data.provider_factory import ProviderFactory
+from features.feature_graph import UNDERLYING
+from utils.instrumentation import instrumentation
+from utils.logger import app_logger as logger
+
+# A contract whose values in any of these columns changed is re-engineered and rescored.
+QUOTE_COLUMNS = ['lastPrice', 'bid', 'ask', 'volume', 'openInterest']
+
+
+def in_market_hours(now=None, timezone='America/New_York', open_time='09:30', close_time='16:00'):
+    """Whether ``now`` falls in the regular session. Exchange holidays are not known here."""
+    now = now or datetime.now(ZoneInfo(timezone))
+    if now.tzinfo is not None:
+        now = now.astimezone(ZoneInfo(timezone))
+    return now.weekday() < 5 and open_time <= now.strftime('%H:%M') < close_time
+
+
+class AsyncRateLimiter:
+    """Token bucket for coroutines: ``rate`` acquisitions per second, in bursts of at most ``burst``."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens go out in arrival order.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class TickerState:
+    def __init__(self, contracts, quotes, underlying_key, session):
+        self.contracts = contracts
+        self.quotes = quotes
+        self.underlying_key = underlying_key
+        self.session = session
+        self.top = None
+
+
+class LiveScreener:
+    """Rescreens a universe in a loop, doing work in proportion to what changed.
+
+    Every cycle polls each ticker's chain concurrently under one rate limit and diffs the
+    snapshot against the previous one by contractSymbol. New contracts, and contracts whose
+    quote, volume or open interest changed, get every feature recomputed and are rescored.
+    When the underlying moves, only the features that read it (FeatureGraph.dependents of
+    'underlying') are recomputed for the ticker's other contracts, which are then rescored too.
+    Unchanged contracts keep their features and scores. The published top N is merged from each
+    ticker's own top N, which is only re-ranked for tickers that changed. A new day starts
+    from scratch, as time to expiry has moved for every contract.
+    """
+
+    def __init__(self, pipeline, scorer, tickers, interval=300, rate=2.0, burst=5, max_concurrency=4, top_n=25,
+                 market_hours_only=True, quote_columns=QUOTE_COLUMNS, publish=None):
+        self.pipeline = pipeline
+        self.scorer = scorer
+        self.tickers = list(tickers)
+        self.interval = interval
+        self.top_n = top_n
+        self.market_hours_only = market_hours_only
+        self.quote_columns = list(quote_columns)
+        self.publish = publish
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.plan = pipeline.feature_graph.plan(pipeline.requested_features())
+        self.underlying_plan = pipeline.feature_graph.dependents(self.plan, [UNDERLYING])
+        self.states = {}
+        self.cycles = 0
+
+    @classmethod
+    def from_config(cls, config, scorer, tickers=None, publish=None):
+        from data.data_pipeline import DataPipeline
+
+        live = config.get_nested('scoring', 'live', default=None) or {}
+        return cls(DataPipeline(config), scorer, tickers or config.get_nested('data', 'tickers'),
+                   interval=live.get('interval_seconds', 300),
+                   rate=live.get('requests_per_second', 2.0),
+                   burst=live.get('burst', 5),
+                   max_concurrency=live.get('max_concurrency', 4),
+                   top_n=config.get_nested('scoring', 'top_n', default=25),
+                   market_hours_only=live.get('market_hours_only', True),
+                   quote_columns=live.get('quote_columns', QUOTE_COLUMNS),
+                   publish=publish)
+
+    async def run(self, cycles=None):
+        """Screen every ``interval`` seconds, ``cycles`` times or until cancelled."""
+        limiter = AsyncRateLimiter(self.rate, self.burst)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        completed = 0
+        while cycles is None or completed < cycles:
+            started = time.monotonic()
+            if self.market_hours_only and not in_market_hours():
+                logger.info(f"Market closed, checking again in {self.interval}s")
+            else:
+                ranked = await self.cycle(limiter, semaphore)
+                if self.publish is not None:
+                    self.publish(ranked)
+                completed += 1
+                if completed == cycles:
+                    break
+            await asyncio.sleep(max(self.interval - (time.monotonic() - started), 0))
+
+    async def cycle(self, limiter, semaphore):
+        """Poll, diff and rescore every ticker once; returns the ranked top N."""
+        start = time.perf_counter()
+        start_date, end_date = self.pipeline.date_range(live=True)
+        rescored = changed_tickers = 0
+        with instrumentation.span('live.cycle'):
+            polls = [self._poll(ticker, start_date, end_date, limiter, semaphore) for ticker in self.tickers]
+            # Snapshots are diffed as they arrive, while the remaining polls are still waiting.
+            for poll in asyncio.as_completed(polls):
+                ticker, snapshot = await poll
+                if snapshot is None:
+                    continue
+                try:
+                    count = self.update(ticker, *snapshot)
+                except Exception as e:
+                    logger.error(f"Rescoring {ticker} failed: {str(e)}")
+                    continue
+                rescored += count
+                changed_tickers += count > 0
+            ranked = self.ranked()
+        self.cycles += 1
+        total = sum(len(state.contracts) for state in self.states.values())
+        logger.info(f"Cycle {self.cycles}: rescored {rescored} of {total} contracts across {changed_tickers} "
+                    f"changed tickers in {time.perf_counter() - start:.2f}s")
+        return ranked
+
+    async def _poll(self, ticker, start_date, end_date, limiter, semaphore):
+        async with semaphore:
+            await limiter.acquire()
+            try:
+                # No market-data cache: a cached chain would hide exactly the changes being polled for.
+                fetcher = ProviderFactory.create_fetcher(self.pipeline.config, ticker, start_date, end_date,
+                                                         bar_store=self.pipeline.bar_store, universe=self.tickers)
+                return ticker, await asyncio.to_thread(fetcher.fetch_data)
+            except Exception as e:
+                logger.error(f"Polling {ticker} failed: {str(e)}")
+                instrumentation.count('live_polls', status='failed')
+                return ticker, None
+
+    def update(self, ticker, calls, underlying, expiration_date):
+        """Fold a fresh snapshot of ``ticker`` into its state; returns how many contracts were rescored."""
+        calls = calls.drop_duplicates('contractSymbol')
+        calls.index = pd.Index(calls['contractSymbol'].to_numpy())
+        quote_columns = [column for column in self.quote_columns if column in calls.columns]
+        quotes = calls[quote_columns].to_numpy(dtype=float)
+        underlying_key = (underlying.index[-1], float(underlying['Close'].iloc[-1]))
+        session = datetime.now().date()
+        state = self.states.get(ticker)
+
+        if state is None or state.session != session or list(state.quotes.columns) != quote_columns:
+            changed = np.ones(len(calls), dtype=bool)
+            moved = False
+        else:
+            previous = state.quotes.reindex(calls.index).to_numpy()
+            same = (previous == quotes) | (np.isnan(previous) & np.isnan(quotes))
+            changed = ~same.all(axis=1) | ~calls.index.isin(state.contracts.index)
+            moved = underlying_key != state.underlying_key
+
+        parts = []
+        fresh = calls[changed].copy()
+        if len(fresh) > 0:
+            self.pipeline.engineer_features(ticker, fresh, underlying.copy(), expiration_date, self.plan)
+            parts.append(self._score(ticker, fresh))
+        kept = state.contracts.loc[calls.index[~changed]] if state is not None else calls.iloc[:0]
+        if moved and len(kept) > 0:
+            kept = kept.drop(columns=['score'] + [f"score_{name}" for name in self.scorer.models]).copy()
+            self.pipeline.engineer_features(ticker, kept, underlying.copy(), expiration_date, self.underlying_plan)
+            parts.append(self._score(ticker, kept))
+        elif len(kept) > 0:
+            parts.append(kept)
+
+        rescored = len(fresh) + (len(kept) if moved else 0)
+        removed = state is not None and len(state.contracts) != len(kept) + len(fresh)
+        contracts = pd.concat(parts).loc[calls.index] if parts else calls.iloc[:0]
+        previous_top = state.top if state is not None else None
+        state = self.states[ticker] = TickerState(contracts, pd.DataFrame(quotes, index=calls.index,
+                                                                          columns=quote_columns),
+                                                  underlying_key, session)
+        # The top N of an untouched ticker cannot have changed.
+        state.top = previous_top if rescored == 0 and not removed else contracts.nlargest(self.top_n, 'score')
+        instrumentation.count('live_contracts', rescored, status='rescored')
+        instrumentation.count('live_contracts', len(calls) - rescored, status='unchanged')
+        return rescored
+
+    def ranked(self):
+        """The top N contracts across every screened ticker."""
+        tops = [state.top for state in self.states.values() if state.top is not None and len(state.top) > 0]
+        if not tops:
+            return pd.DataFrame(columns=self.scorer.output_columns(pd.DataFrame()))
+        ranked = pd.concat(tops).sort_values('score', ascending=False, kind='stable').head(self.top_n)
+        return ranked[self.scorer.output_columns(ranked)].reset_index(drop=True)
+
+    def _score(self, ticker, contracts):
+        contracts['ticker'] = ticker
+        return self.scorer.score(contracts)
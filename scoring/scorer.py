@@ -0,0 +1,83 @@
+# scoring/scorer.py
+import time
+
+import numpy as np
+from models.cross_validation import positive_probability
+from models.model_factory import ModelFactory
+from models.model_registry import ModelRegistry
+from utils.instrumentation import instrumentation
+from utils.logger import app_logger as logger
+
+# Identifying columns carried into the ranked output when present.
+CONTRACT_COLUMNS = ['ticker', 'contractSymbol', 'option_type', 'expiration', 'strike', 'lastPrice']
+
+
+class BatchScorer:
+    """Scores engineered option contracts with stored models and the preprocessor they were trained behind.
+
+    Everything is loaded once. A batch is imputed and scaled in one float32 pass and every
+    model scores the whole matrix at once; ``score`` is the mean positive-class probability
+    across models, and each model's own probability is kept as ``score_<name>``.
+    """
+
+    def __init__(self, preprocessor, models):
+        if not models:
+            raise ValueError("No trained models to score with. Run main.py first.")
+        self.preprocessor = preprocessor
+        self.models = models
+
+    @classmethod
+    def from_config(cls, config):
+        registry = ModelRegistry.from_config(config)
+        if registry is None:
+            raise ValueError("Scoring loads models from the model registry, which is disabled in the config.")
+
+        selected = config.get_nested('scoring', 'models', default=[])
+        model_configs = [model_config for model_config in ModelFactory.model_configs(config)
+                         if not selected or model_config['name'] in selected]
+        # All models share one transform, so each one comes from a fit behind the preprocessor
+        # stored with the newest fit.
+        preprocessor, preprocessor_fingerprint = registry.latest_preprocessor(model_configs)
+        models = {}
+        for model_config in model_configs:
+            model = registry.latest(model_config, preprocessor_fingerprint) if preprocessor is not None else None
+            if model is None:
+                logger.warning(f"No stored fit for {model_config['name']} behind the latest preprocessor; "
+                               f"it will not be used for scoring.")
+                continue
+            models[model_config['name']] = model
+        return cls(preprocessor, models)
+
+    def score(self, contracts):
+        with instrumentation.span('score.transform'):
+            X = self.preprocessor.transform(contracts)
+        scores = {}
+        for name, model in self.models.items():
+            with instrumentation.span('score.predict', model=name):
+                scores[f"score_{name}"] = positive_probability(model, X)
+        instrumentation.count('scored_contracts', len(contracts))
+        result = contracts.assign(**scores)
+        result['score'] = np.mean(list(scores.values()), axis=0)
+        return result
+
+    def rank(self, contracts, top_n=None):
+        start = time.perf_counter()
+        scored = self.score(contracts)
+        ranked = scored.sort_values('score', ascending=False, kind='stable')
+        logger.info(f"Scored {len(contracts)} contracts in {(time.perf_counter() - start) * 1000:.1f} ms")
+        ranked = ranked[self.output_columns(ranked)].reset_index(drop=True)
+        return ranked.head(top_n) if top_n else ranked
+
+    def output_columns(self, scored):
+        """The identifying columns of ``scored`` followed by the scores, as in the ranked output."""
+        columns = [column for column in CONTRACT_COLUMNS if column in scored.columns]
+        return columns + ['score'] + [f"score_{name}" for name in self.models]
+
+
+def screen(config, scorer, tickers=None, top_n=None):
+    """Fetch and engineer fresh chains through DataPipeline, then rank them."""
+    from data.data_pipeline import DataPipeline
+
+    pipeline = DataPipeline(config)
+    contracts = pipeline.process_data(tickers=tickers, with_target=False)
+    return scorer.rank(contracts, top_n or config.get_nested('scoring', 'top_n'))
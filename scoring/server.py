@@ -0,0 +1,189 @@
+# scoring/server.py
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+from utils.logger import app_logger as logger
+
+
+class LatencyTracker:
+    """Request latencies over a sliding window of the most recent requests."""
+
+    def __init__(self, window=10_000):
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def record_request(self, seconds):
+        with self._lock:
+            self.latencies.append(seconds)
+            self.requests += 1
+
+    def record_batch(self, size):
+        with self._lock:
+            self.batch_sizes.append(size)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = np.array(self.latencies)
+            batch_sizes = np.array(self.batch_sizes)
+            requests = self.requests
+        if len(latencies) == 0:
+            return {'requests': requests, 'p50_ms': None, 'p99_ms': None, 'batches': 0, 'mean_batch_contracts': None}
+        return {
+            'requests': requests,
+            'p50_ms': float(np.percentile(latencies, 50) * 1000),
+            'p99_ms': float(np.percentile(latencies, 99) * 1000),
+            'batches': len(batch_sizes),
+            'mean_batch_contracts': float(batch_sizes.mean()) if len(batch_sizes) else None,
+        }
+
+
+class MicroBatcher:
+    """Coalesces concurrent scoring requests into one vectorized call.
+
+    A single worker thread takes the first waiting request, then keeps collecting for up to
+    ``max_wait_ms`` or until ``max_batch_size`` contracts are queued, scores the concatenation
+    once and hands each request its own slice back through a Future.
+    """
+
+    def __init__(self, score, max_batch_size=4096, max_wait_ms=5, metrics=None):
+        self.score = score
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.metrics = metrics or LatencyTracker()
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, contracts):
+        future = Future()
+        self._queue.put((contracts, future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            size = len(item[0])
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+                size += len(item[0])
+            self._score_batch(batch)
+
+    def _score_batch(self, batch):
+        try:
+            scored = self.score(pd.concat([contracts for contracts, _ in batch], ignore_index=True))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.metrics.record_batch(len(scored))
+        offset = 0
+        for contracts, future in batch:
+            future.set_result(scored.iloc[offset:offset + len(contracts)])
+            offset += len(contracts)
+
+
+def make_handler(batcher, output_columns):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/health':
+                self._send(200, {'status': 'ok'})
+            elif self.path == '/metrics':
+                self._send(200, batcher.metrics.snapshot())
+            else:
+                self._send(404, {'error': f"Unknown path {self.path}"})
+
+        def do_POST(self):
+            if self.path != '/score':
+                self._send(404, {'error': f"Unknown path {self.path}"})
+                return
+            start = time.perf_counter()
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                contracts = pd.DataFrame.from_records(payload['contracts'])
+                scored = batcher.submit(contracts).result()
+            except (KeyError, ValueError) as e:
+                self._send(400, {'error': str(e)})
+                return
+            except Exception as e:
+                logger.error(f"Scoring request failed: {str(e)}")
+                self._send(500, {'error': str(e)})
+                return
+            body = {'scores': json.loads(scored[output_columns(scored)].to_json(orient='records', date_format='iso'))}
+            batcher.metrics.record_request(time.perf_counter() - start)
+            self._send(200, body)
+
+        def _send(self, status, body):
+            encoded = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(encoded)))
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+    return ScoringHandler
+
+
+class ScoringServer:
+    """Local HTTP scoring service.
+
+    POST /score with ``{"contracts": [{...feature columns...}, ...]}`` returns the contracts'
+    identifying columns and scores, as in the ranked output, in request order; GET /metrics reports p50/p99 request latency and batch sizes.
+    """
+
+    def __init__(self, scorer, host='127.0.0.1', port=8080, max_batch_size=4096, max_wait_ms=5):
+        self.scorer = scorer
+        self.batcher = MicroBatcher(scorer.score, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(self.batcher, scorer.output_columns))
+
+    @classmethod
+    def from_config(cls, config, scorer):
+        server_config = config.get_nested('scoring', 'server', default={})
+        return cls(scorer,
+                   host=server_config.get('host', '127.0.0.1'),
+                   port=server_config.get('port', 8080),
+                   max_batch_size=server_config.get('max_batch_size', 4096),
+                   max_wait_ms=server_config.get('max_wait_ms', 5))
+
+    @property
+    def address(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self):
+        logger.info(f"Scoring server listening on {self.address}")
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.batcher.close()
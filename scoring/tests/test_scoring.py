@@ -0,0 +1,194 @@
+# Core tests for scoring
+
+import asyncio
+import json
+import threading
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_classification
+
+import yaml
+from data.data_pipeline import DataPipeline
+from data.preprocessor import StreamingPreprocessor
+from data.provider_factory import ProviderFactory
+from data.simulated_data_fetcher import SimulatedDataFetcher
+from models.random_forest_model import RandomForestModel
+from scoring.live_screener import AsyncRateLimiter, LiveScreener, in_market_hours
+from scoring.scorer import BatchScorer
+from scoring.server import LatencyTracker, MicroBatcher, ScoringServer
+from utils.config_manager import ConfigManager
+from utils.plugins import PluginRegistry
+
+CONFIG_PATH = Path(__file__).resolve().parents[2] / 'config.yaml'
+
+
+def make_scorer(n_samples=300):
+    X, y = make_classification(n_samples=n_samples, n_features=5, random_state=0)
+    X = pd.DataFrame(X, columns=[f'f{i}' for i in range(5)])
+    preprocessor = StreamingPreprocessor().fit(X)
+    model = RandomForestModel(preprocessor.transform(X), y, {'n_estimators': 10, 'random_state': 0})
+    model.train()
+    contracts = X.assign(contractSymbol=[f'C{i:04d}' for i in range(n_samples)])
+    return BatchScorer(preprocessor, {'RandomForest': model}), contracts
+
+
+def test_batch_scorer_ranks_contracts_by_model_probability():
+    scorer, contracts = make_scorer()
+    ranked = scorer.rank(contracts, top_n=10)
+
+    assert len(ranked) == 10
+    assert list(ranked.columns) == ['contractSymbol', 'score', 'score_RandomForest']
+    assert ranked['score'].is_monotonic_decreasing
+    expected = scorer.models['RandomForest'].predict_proba(scorer.preprocessor.transform(contracts))[:, 1]
+    assert ranked['score'].iloc[0] == expected.max()
+
+
+def test_micro_batcher_coalesces_concurrent_requests():
+    scorer, contracts = make_scorer()
+    calls = []
+    batcher = MicroBatcher(lambda batch: calls.append(len(batch)) or scorer.score(batch), max_wait_ms=50)
+    chunks = [contracts.iloc[i:i + 30] for i in range(0, len(contracts), 30)]
+    try:
+        futures = [batcher.submit(chunk) for chunk in chunks]
+        results = [future.result(timeout=10) for future in futures]
+    finally:
+        batcher.close()
+
+    assert len(calls) < len(chunks) and sum(calls) == len(contracts)
+    for chunk, result in zip(chunks, results):
+        assert list(result['contractSymbol']) == list(chunk['contractSymbol'])
+    np.testing.assert_allclose(pd.concat(results)['score'], scorer.score(contracts)['score'])
+
+
+def test_scoring_server_answers_requests_and_reports_latency():
+    scorer, contracts = make_scorer()
+    server = ScoringServer(scorer, port=0)
+    thread = threading.Thread(target=server.httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        body = json.dumps({'contracts': contracts.head(5).to_dict(orient='records')}).encode()
+        request = urllib.request.Request(f"{server.address}/score", data=body, method='POST')
+        scores = json.loads(urllib.request.urlopen(request).read())['scores']
+        metrics = json.loads(urllib.request.urlopen(f"{server.address}/metrics").read())
+    finally:
+        server.shutdown()
+
+    assert [row['contractSymbol'] for row in scores] == list(contracts['contractSymbol'].head(5))
+    assert list(scores[0]) == scorer.output_columns(contracts)
+    assert metrics['requests'] == 1 and metrics['p99_ms'] >= metrics['p50_ms'] > 0
+
+
+def test_latency_tracker_percentiles():
+    tracker = LatencyTracker()
+    for milliseconds in range(1, 101):
+        tracker.record_request(milliseconds / 1000)
+    snapshot = tracker.snapshot()
+    assert snapshot['requests'] == 100
+    assert abs(snapshot['p50_ms'] - 50.5) < 1e-6 and snapshot['p99_ms'] > 99
+
+
+class SnapshotFetcher:
+    """Serves copies of whatever is in ``snapshots``, so tests can move quotes between polls."""
+    snapshots = {}
+    end_dates = []
+
+    def __init__(self, ticker, start_date, end_date, **kwargs):
+        self.ticker = ticker
+        self.end_dates.append(end_date)
+
+    def fetch_data(self):
+        calls, underlying, expiration = self.snapshots[self.ticker]
+        return calls.copy(), underlying.copy(), expiration
+
+
+def make_live_screener(tmp_path, monkeypatch, tickers):
+    with open(CONFIG_PATH) as file:
+        config = yaml.safe_load(file)
+    for section in ('cache', 'bar_store', 'feature_store'):
+        config[section]['enabled'] = False
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump(config))
+    config = ConfigManager(str(path))
+    monkeypatch.setattr(ProviderFactory, 'PROVIDERS', PluginRegistry('data provider', 'optimal_options.tests',
+                                                                     {'yfinance': SnapshotFetcher}))
+    expirations = {'mode': 'all', 'option_types': ['calls', 'puts']}
+    SnapshotFetcher.end_dates = []
+    SnapshotFetcher.snapshots = {ticker: SimulatedDataFetcher(ticker, None, None, expirations=expirations, n_bars=300,
+                                                              n_strikes=8, n_expirations=2).fetch_data()
+                                 for ticker in tickers}
+
+    pipeline = DataPipeline(config)
+    plan = pipeline.feature_graph.plan(pipeline.requested_features())
+    frames = []
+    for ticker, (calls, underlying, expiration) in SnapshotFetcher.snapshots.items():
+        calls = calls.copy()
+        pipeline.engineer_features(ticker, calls, underlying.copy(), expiration, plan)
+        frames.append(calls)
+    X = pd.concat(frames, ignore_index=True).reindex(columns=pipeline.feature_columns())
+    preprocessor = StreamingPreprocessor().fit(X)
+    model = RandomForestModel(preprocessor.transform(X), np.arange(len(X)) % 2, {'n_estimators': 10, 'random_state': 0})
+    model.train()
+    return LiveScreener(pipeline, BatchScorer(preprocessor, {'RandomForest': model}), tickers, interval=0, rate=1000,
+                        burst=10, top_n=10, market_hours_only=False)
+
+
+def test_live_screener_rescores_only_what_changed(tmp_path, monkeypatch):
+    screener = make_live_screener(tmp_path, monkeypatch, ['AAA', 'BBB'])
+    scored = []
+    score = screener.scorer.score
+    screener.scorer.score = lambda contracts: scored.append(len(contracts)) or score(contracts)
+    published = []
+    screener.publish = published.append
+    n_aaa, n_bbb = (len(SnapshotFetcher.snapshots[ticker][0]) for ticker in ('AAA', 'BBB'))
+
+    asyncio.run(screener.run(cycles=2))
+    assert sorted(scored) == sorted([n_aaa, n_bbb]) and len(published) == 2
+    # Polling runs through today whatever data.end_date the config pins.
+    tomorrow = (pd.Timestamp.now().normalize() + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    assert set(SnapshotFetcher.end_dates) == {tomorrow}
+    pd.testing.assert_frame_equal(published[0], published[1])
+
+    calls, underlying, expiration = SnapshotFetcher.snapshots['AAA']
+    calls.loc[calls.index[:3], 'volume'] += 7
+    underlying = pd.concat([underlying, underlying.iloc[[-1]].assign(Close=underlying['Close'].iloc[-1] * 1.01)])
+    underlying.index = underlying.index[:-1].append(underlying.index[[-1]] + pd.Timedelta(hours=1))
+    SnapshotFetcher.snapshots['BBB'] = (SnapshotFetcher.snapshots['BBB'][0], underlying,
+                                        SnapshotFetcher.snapshots['BBB'][2])
+    scored.clear()
+    asyncio.run(screener.run(cycles=1))
+    # AAA: the three changed contracts. BBB: its underlying moved, so every contract, on the
+    # underlying-dependent features only.
+    assert sorted(scored) == sorted([3, n_bbb])
+
+    # The incrementally maintained state matches screening the current snapshots from scratch.
+    fresh = LiveScreener(screener.pipeline, screener.scorer, screener.tickers, interval=0, rate=1000, burst=10,
+                         top_n=10, market_hours_only=False)
+    asyncio.run(fresh.run(cycles=1))
+    for ticker in ('AAA', 'BBB'):
+        expected, actual = fresh.states[ticker].contracts, screener.states[ticker].contracts
+        pd.testing.assert_frame_equal(actual[expected.columns], expected, check_dtype=False)
+    pd.testing.assert_frame_equal(screener.ranked(), fresh.ranked())
+
+
+def test_async_rate_limiter_spaces_acquisitions():
+    async def acquire_all(limiter, n):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(limiter.acquire() for _ in range(n)))
+        return loop.time() - start
+
+    # A burst of 2 goes out at once, the other 3 at 100 per second.
+    assert 0.025 <= asyncio.run(acquire_all(AsyncRateLimiter(100, burst=2), 5)) < 0.5
+
+
+def test_market_hours_are_weekdays_in_new_york():
+    from datetime import datetime
+    from zoneinfo import ZoneInfo
+    new_york = ZoneInfo('America/New_York')
+    assert in_market_hours(datetime(2024, 7, 3, 10, 0, tzinfo=new_york))
+    assert not in_market_hours(datetime(2024, 7, 3, 16, 0, tzinfo=new_york))
+    assert not in_market_hours(datetime(2024, 7, 6, 11, 0, tzinfo=new_york))
+    assert in_market_hours(datetime(2024, 7, 3, 14, 0, tzinfo=ZoneInfo('UTC')))
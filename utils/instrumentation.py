@@ -0,0 +1,317 @@
+# utils/instrumentation.py
+import cProfile
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+from utils.logger import LazyText, app_logger as logger
+
+METRIC_PREFIX = 'optimal_options'
+# Kept on spans in the trace, but not turned into Prometheus series.
+HIGH_CARDINALITY_LABELS = {'ticker'}
+PROFILE_MODES = ('cprofile', 'sample')
+
+
+def current_rss():
+    """Resident set size in bytes; the process's peak so far where /proc is not available."""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return peak_rss()
+
+
+def peak_rss():
+    """Highest resident set size of the process so far, in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval into collapsed-stack counts.
+
+    The counts are written one ``frame;frame;...;frame count`` line per stack, root first, which
+    is what ``py-spy record --format raw`` produces and flamegraph.pl or speedscope read.
+    """
+
+    def __init__(self, thread_id, interval, counts):
+        super().__init__(daemon=True, name='stack-sampler')
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = counts
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class Instrumentation:
+    """Timing spans, peak RSS and counters for one run.
+
+    ``span`` times a block under a name and labels (ticker, model, ...); spans nest per thread,
+    so the trace shows fetches, feature nodes and fits inside the stages that ran them. A
+    background thread samples RSS every ``rss_interval`` seconds and every open span keeps the
+    highest sample seen. ``count`` adds to a counter. ``write`` exports the spans as a Chrome
+    trace (chrome://tracing, Perfetto) and totals per span name and counter in the Prometheus
+    text format. Spans named ``profile_stage`` also run under cProfile, or under a stack
+    sampler writing py-spy compatible collapsed stacks. Disabled, spans and counters cost a
+    function call.
+    """
+
+    def __init__(self, enabled=False, directory='artifacts/metrics', rss_interval=0.05, max_trace_spans=100_000,
+                 profile_stage=None, profile_mode='cprofile', profile_interval=0.005):
+        self.configure(enabled, directory, rss_interval, max_trace_spans, profile_stage, profile_mode, profile_interval)
+
+    def configure(self, enabled=False, directory='artifacts/metrics', rss_interval=0.05, max_trace_spans=100_000,
+                  profile_stage=None, profile_mode='cprofile', profile_interval=0.005):
+        if profile_mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {profile_mode}")
+        self.enabled = enabled
+        self.directory = Path(directory)
+        self.rss_interval = rss_interval
+        self.max_trace_spans = max_trace_spans
+        self.profile_stage = profile_stage
+        self.profile_mode = profile_mode
+        self.profile_interval = profile_interval
+        self.reset()
+
+    def reset(self):
+        self.spans = []
+        self.totals = defaultdict(lambda: {'seconds': 0.0, 'count': 0, 'peak_rss': 0})
+        self.counters = defaultdict(float)
+        self.dropped_spans = 0
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._open = {}
+        self._next_id = 0
+        self._rss = 0
+        self._sampler = None
+        self._profiler = None
+        self._profiling = False
+        self._stacks = Counter()
+
+    def settings(self):
+        """Constructor arguments, to configure the same instrumentation in a worker process."""
+        return {'enabled': self.enabled, 'directory': str(self.directory), 'rss_interval': self.rss_interval,
+                'max_trace_spans': self.max_trace_spans, 'profile_stage': self.profile_stage,
+                'profile_mode': self.profile_mode, 'profile_interval': self.profile_interval}
+
+    @contextmanager
+    def span(self, name, **labels):
+        if not self.enabled:
+            yield
+            return
+        self._start_rss_sampler()
+        stack = self._stack()
+        with self._lock:
+            span_id = self._next_id
+            self._next_id += 1
+            self._open[span_id] = self._rss
+        record = {'id': span_id, 'name': name, 'labels': labels, 'parent': stack[-1] if stack else None,
+                  'thread': threading.get_ident(), 'start': time.perf_counter() - self.origin}
+        stack.append(span_id)
+        try:
+            with self._profiled(name):
+                yield
+        finally:
+            stack.pop()
+            seconds = time.perf_counter() - self.origin - record['start']
+            with self._lock:
+                peak_rss = max(self._open.pop(span_id), self._rss)
+            self._add(record, seconds, peak_rss)
+
+    def record(self, name, seconds, peak_rss=None, **labels):
+        """A span timed elsewhere, such as in a worker process, ending now."""
+        if not self.enabled:
+            return
+        stack = self._stack()
+        end = time.perf_counter() - self.origin
+        record = {'id': None, 'name': name, 'labels': labels, 'parent': stack[-1] if stack else None,
+                  'thread': threading.get_ident(), 'start': max(end - seconds, 0.0)}
+        self._add(record, seconds, peak_rss)
+
+    def count(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] += value
+
+    def _add(self, record, seconds, peak_rss):
+        record['seconds'] = seconds
+        record['peak_rss'] = peak_rss
+        key = (record['name'], tuple(sorted((label, value) for label, value in record['labels'].items()
+                                            if label not in HIGH_CARDINALITY_LABELS)))
+        with self._lock:
+            total = self.totals[key]
+            total['seconds'] += seconds
+            total['count'] += 1
+            total['peak_rss'] = max(total['peak_rss'], peak_rss or 0)
+            if len(self.spans) < self.max_trace_spans:
+                self.spans.append(record)
+            else:
+                self.dropped_spans += 1
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _start_rss_sampler(self):
+        if self._sampler is not None:
+            return
+        with self._lock:
+            if self._sampler is not None:
+                return
+            self._rss = current_rss()
+            self._sampler = threading.Thread(target=self._sample_rss, daemon=True, name='rss-sampler')
+            self._sampler.start()
+
+    def _sample_rss(self):
+        sampler = self._sampler
+        while self._sampler is sampler:
+            rss = current_rss()
+            with self._lock:
+                self._rss = rss
+                for span_id, peak in self._open.items():
+                    if rss > peak:
+                        self._open[span_id] = rss
+            time.sleep(self.rss_interval)
+
+    @contextmanager
+    def _profiled(self, name):
+        # One stage at a time: a nested or concurrent span of the same name runs unprofiled.
+        with self._lock:
+            active = name == self.profile_stage and not self._profiling
+            self._profiling = self._profiling or active
+        if not active:
+            yield
+            return
+        if self.profile_mode == 'cprofile':
+            self._profiler = self._profiler or cProfile.Profile()
+            self._profiler.enable()
+        else:
+            sampler = StackSampler(threading.get_ident(), self.profile_interval, self._stacks)
+            sampler.start()
+        try:
+            yield
+        finally:
+            if self.profile_mode == 'cprofile':
+                self._profiler.disable()
+            else:
+                sampler.stop()
+            self._profiling = False
+
+    def trace(self):
+        """The spans as Chrome trace events, with the counters alongside."""
+        pid = os.getpid()
+        events = [{'name': span['name'], 'ph': 'X', 'pid': pid, 'tid': span['thread'],
+                   'ts': round(span['start'] * 1e6), 'dur': round(span['seconds'] * 1e6),
+                   'args': {**span['labels'], 'peak_rss_mb': round(span['peak_rss'] / 2 ** 20, 1)
+                            if span['peak_rss'] else None, 'id': span['id'], 'parent': span['parent']}}
+                  for span in self.spans]
+        counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self.counters.items())]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'counters': counters, 'dropped_spans': self.dropped_spans}}
+
+    def prometheus(self):
+        lines = []
+
+        def family(metric, kind, help_text, samples):
+            lines.extend([f"# HELP {METRIC_PREFIX}_{metric} {help_text}", f"# TYPE {METRIC_PREFIX}_{metric} {kind}"])
+            lines.extend(f"{METRIC_PREFIX}_{metric}{_labels(labels)} {float(value)!r}" for labels, value in samples)
+
+        spans = sorted(self.totals.items())
+        family('span_seconds_total', 'counter', "Wall time spent in spans.",
+               [({'span': name, **dict(labels)}, total['seconds']) for (name, labels), total in spans])
+        family('span_total', 'counter', "Spans completed.",
+               [({'span': name, **dict(labels)}, total['count']) for (name, labels), total in spans])
+        family('span_peak_rss_bytes', 'gauge', "Highest resident set size sampled while a span was open.",
+               [({'span': name, **dict(labels)}, total['peak_rss']) for (name, labels), total in spans
+                if total['peak_rss']])
+        by_name = defaultdict(list)
+        for (name, labels), value in sorted(self.counters.items()):
+            by_name[name].append((dict(labels), value))
+        for name, samples in by_name.items():
+            family(f"{name}_total", 'counter', f"Count of {name.replace('_', ' ')}.", samples)
+        return '\n'.join(lines) + '\n'
+
+    def summary(self, top=10):
+        ranked = sorted(self.totals.items(), key=lambda item: item[1]['seconds'], reverse=True)[:top]
+        return '\n'.join(f"{name}{_labels(dict(labels))}: {total['seconds']:.3f}s over {total['count']} spans"
+                         + (f", peak RSS {total['peak_rss'] / 2 ** 20:.0f} MB" if total['peak_rss'] else '')
+                         for (name, labels), total in ranked)
+
+    def write(self):
+        """Write trace.json, metrics.prom and the stage profile, if any, to ``directory``."""
+        if not self.enabled:
+            return None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            trace, metrics = self.trace(), self.prometheus()
+        (self.directory / 'trace.json').write_text(json.dumps(trace, default=str))
+        # Written whole then renamed, as the node_exporter textfile collector expects.
+        tmp_path = self.directory / 'metrics.prom.tmp'
+        tmp_path.write_text(metrics)
+        os.replace(tmp_path, self.directory / 'metrics.prom')
+        self.write_profile()
+        logger.info("Instrumentation written to %s, slowest spans:\n%s", self.directory, LazyText(self.summary))
+        return self.directory
+
+    def write_profile(self):
+        # Suffixed with the pid: worker processes profiling the same stage write their own file.
+        if self._profiler is not None or self._stacks:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        if self._profiler is not None:
+            path = self.directory / f"{self.profile_stage}.{os.getpid()}.prof"
+            self._profiler.dump_stats(path)
+            logger.info("cProfile stats for %s written to %s", self.profile_stage, path)
+        if self._stacks:
+            path = self.directory / f"{self.profile_stage}.{os.getpid()}.folded"
+            path.write_text(''.join(f"{stack} {count}\n" for stack, count in self._stacks.items()))
+            logger.info("Sampled stacks for %s written to %s", self.profile_stage, path)
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = {name: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for name, value in labels.items()}
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped.items()) + '}'
+
+
+# Shared by every module of the process, like app_logger; configure() switches it on.
+instrumentation = Instrumentation()
+
+
+def configure(config):
+    settings = config.get('instrumentation') or {}
+    profile = settings.get('profile') or {}
+    instrumentation.configure(enabled=settings.get('enabled', False),
+                              directory=settings.get('directory', 'artifacts/metrics'),
+                              rss_interval=settings.get('rss_interval_ms', 50) / 1000,
+                              max_trace_spans=settings.get('max_trace_spans', 100_000),
+                              profile_stage=profile.get('stage'),
+                              profile_mode=profile.get('mode', 'cprofile'),
+                              profile_interval=profile.get('interval_ms', 5) / 1000)
+    return instrumentation
@@ -16,6 +16,16 @@ def setup_logger(name, level=logging.INFO):
 
     return logger
 
+class LazyText:
+    """A log argument computed only if a handler formats the record, e.g.
+    ``logger.debug("Counts:\\n%s", LazyText(lambda: frame.value_counts()))``."""
+
+    def __init__(self, function):
+        self.function = function
+
+    def __str__(self):
+        return str(self.function())
+
 # Create a logger for the entire application
 app_logger = setup_logger('options_screening')
 
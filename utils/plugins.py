@@ -0,0 +1,54 @@
+# utils/plugins.py
+import importlib
+from importlib.metadata import entry_points
+
+
+class PluginRegistry:
+    """Names mapped to classes that are imported on first use.
+
+    A target is a class or a ``'package.module:ClassName'`` string whose module is imported
+    only when the name is first looked up, so heavy backends load only for configs that use
+    them. Installed packages can add names through ``entry_point_group`` entry points, which
+    are read the first time a name is not found here.
+    """
+
+    def __init__(self, kind, entry_point_group, targets=None):
+        self.kind = kind
+        self.entry_point_group = entry_point_group
+        self._targets = dict(targets or {})
+        self._entry_points_loaded = False
+
+    def register(self, name, target=None):
+        """Register ``target`` under ``name``; without a target, returns a class decorator."""
+        if target is None:
+            return lambda klass: self.register(name, klass)
+        self._targets[name] = target
+        return target
+
+    def get(self, name):
+        if name not in self._targets:
+            self._load_entry_points()
+        if name not in self._targets:
+            raise ValueError(f"Unknown {self.kind}: {name}")
+        target = self._targets[name]
+        if isinstance(target, str):
+            module, _, attribute = target.partition(':')
+            target = self._targets[name] = getattr(importlib.import_module(module), attribute)
+        return target
+
+    def names(self):
+        self._load_entry_points()
+        return list(self._targets)
+
+    def is_loaded(self, name):
+        return name in self._targets and not isinstance(self._targets[name], str)
+
+    def __contains__(self, name):
+        return name in self.names()
+
+    def _load_entry_points(self):
+        if self._entry_points_loaded:
+            return
+        self._entry_points_loaded = True
+        for entry_point in entry_points(group=self.entry_point_group):
+            self._targets.setdefault(entry_point.name, entry_point.value)
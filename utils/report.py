@@ -0,0 +1,110 @@
+# utils/report.py
+import base64
+import html
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from utils.logger import app_logger as logger
+
+
+def render_chart(chart, kwargs, save_path):
+    """Draw one chart from utils.visualizations to ``save_path`` with the Agg backend."""
+    import matplotlib
+    matplotlib.use('Agg')
+    from . import visualizations
+    getattr(visualizations, chart)(**kwargs, save_path=save_path)
+    return save_path
+
+
+def render_learning_curve(estimator, X, y, folds, train_sizes, title, save_path):
+    # The learning curve refits every fold at every size, so it is computed where it is drawn.
+    from sklearn.model_selection import learning_curve
+    train_sizes, train_scores, test_scores = learning_curve(estimator, X, y, cv=folds, train_sizes=train_sizes)
+    return render_chart('plot_learning_curve', {'train_sizes': train_sizes, 'train_scores': train_scores,
+                                                'test_scores': test_scores, 'title': title}, save_path)
+
+
+def _slug(text):
+    return re.sub(r'[^A-Za-z0-9]+', '_', text).strip('_').lower()
+
+
+class HtmlReport:
+    """Charts rendered to PNG files in worker processes, collected into one static HTML page.
+
+    Charts are queued as results arrive and drawn in a spawned process pool with matplotlib's
+    non-interactive Agg backend, so the caller never waits on rendering. ``write`` waits for
+    the charts and inlines them (base64) with the text and tables of each section.
+    """
+
+    def __init__(self, directory, max_workers=None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+        self.sections = {}
+
+    @classmethod
+    def from_config(cls, config):
+        """None unless reporting.mode is headless."""
+        if config.get_nested('reporting', 'mode', default='interactive') != 'headless':
+            return None
+        return cls(config.get_nested('reporting', 'directory', default='artifacts/report'),
+                   max_workers=config.get_nested('reporting', 'max_workers'))
+
+    def add_chart(self, section, heading, chart, kwargs):
+        """Queue ``chart`` (a utils.visualizations function name) called with ``kwargs``."""
+        save_path = self._chart_path(section, heading)
+        self._add(section, 'chart', heading, self.executor.submit(render_chart, chart, kwargs, save_path))
+
+    def add_learning_curve(self, section, title, estimator, X, y, folds, train_sizes):
+        save_path = self._chart_path(section, title)
+        self._add(section, 'chart', title, self.executor.submit(render_learning_curve, estimator, X, y, folds,
+                                                                train_sizes, title, save_path))
+
+    def add_text(self, section, title, text):
+        self._add(section, 'text', title, text)
+
+    def add_table(self, section, title, frame):
+        self._add(section, 'table', title, frame)
+
+    def write(self, title="Options Screening Report"):
+        body = []
+        for section, items in self.sections.items():
+            body.append(f"<h2>{html.escape(section)}</h2>")
+            for kind, item_title, payload in items:
+                body.append(f"<h3>{html.escape(item_title)}</h3>")
+                if kind == 'chart':
+                    body.append(self._image(item_title, payload))
+                elif kind == 'table':
+                    body.append(payload.to_html(border=0, float_format=lambda value: f"{value:.4f}"))
+                else:
+                    body.append(f"<pre>{html.escape(str(payload))}</pre>")
+        self.executor.shutdown()
+
+        path = self.directory / 'report.html'
+        path.write_text(f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(title)}</title>
+<style>body {{font-family: sans-serif; max-width: 1100px; margin: auto;}} img {{max-width: 100%;}}
+table {{border-collapse: collapse;}} td, th {{padding: 2px 10px; text-align: right;}}</style></head>
+<body><h1>{html.escape(title)}</h1><p>Generated {datetime.now():%Y-%m-%d %H:%M:%S}</p>
+{chr(10).join(body)}
+</body></html>
+""")
+        logger.info(f"Report written to {path}")
+        return path
+
+    def _add(self, section, kind, title, payload):
+        self.sections.setdefault(section, []).append((kind, title, payload))
+
+    def _chart_path(self, section, title):
+        return str(self.directory / f"{_slug(section)}_{_slug(title)}.png")
+
+    def _image(self, title, future):
+        try:
+            encoded = base64.b64encode(Path(future.result()).read_bytes()).decode()
+        except Exception as e:
+            logger.error(f"Rendering {title} failed: {str(e)}")
+            return f"<p>Rendering failed: {html.escape(str(e))}</p>"
+        return f'<img alt="{html.escape(title)}" src="data:image/png;base64,{encoded}">'
@@ -1,51 +1,110 @@
 # utils/results_manager.py
-from .visualizations import (plot_feature_importance, plot_confusion_matrix, plot_roc_curve,
-                             plot_precision_recall_curve, plot_learning_curve, plot_model_comparison)
-from sklearn.model_selection import learning_curve
 import numpy as np
+import pandas as pd
+from .instrumentation import instrumentation
+from .report import HtmlReport
 
 class ResultsManager:
     def __init__(self, config):
         self.config = config
         self.results = {}
+        # Headless: charts render in worker processes into one HTML report instead of plt.show().
+        self.report = HtmlReport.from_config(config)
 
     def save_results(self, model_name, model, X, y):
-        cv_results = model.cross_validate(cv=self.config.get_nested('cross_validation', 'n_folds', 5))
+        cv_results = model.cross_validate(cv=self.config.get_nested('cross_validation', 'n_folds', default=5),
+                                          n_jobs=self.config.get_nested('cross_validation', 'n_jobs'))
+        self.add_results(model_name, model, X, y, cv_results)
+
+    def add_results(self, model_name, model, X, y, cv_results):
+        # Plots use out-of-fold predictions from the CV fits rather than predictions on the
+        # training data, which cost another pass and overstate performance.
         self.results[model_name] = {
             'model': model,
             'feature_importance': model.get_feature_importance(X.columns),
-            'predictions': model.predict(X),
-            'probabilities': model.predict_proba(X)[:, 1] if hasattr(model, 'predict_proba') else None,
+            'predictions': cv_results['oof_predictions'],
+            'probabilities': cv_results['oof_probabilities'],
             'cv_results': cv_results
         }
-        self._plot_results(model_name, X, y)
+        with instrumentation.span('report.plot', model=model_name):
+            self._plot_results(model_name, X, y)
 
     def _plot_results(self, model_name, X, y):
-        result = self.results[model_name]
-        plot_feature_importance(result['feature_importance'], title=f"{model_name} - Feature Importance")
-        plot_confusion_matrix(y, result['predictions'], classes=['0', '1'], title=f"{model_name} - Confusion Matrix")
-        if result['probabilities'] is not None:
-            plot_roc_curve(y, result['probabilities'], title=f"{model_name} - ROC Curve")
-            plot_precision_recall_curve(y, result['probabilities'], title=f"{model_name} - Precision-Recall Curve")
-        
-        # Generate learning curve data
-        train_sizes, train_scores, test_scores = learning_curve(
-            result['model'].model, X, y, cv=5, n_jobs=-1, train_sizes=np.linspace(0.1, 1.0, 10))
-        plot_learning_curve(train_sizes, train_scores, test_scores, title=f"{model_name} - Learning Curve")
-
         result = self.results[model_name]
         cv_results = result['cv_results']
+        charts = self._charts(model_name, y)
+        learning_curve = self.config.get_nested('cross_validation', 'learning_curve', default=False)
+        sizes = np.linspace(0.1, 1.0, self.config.get_nested('cross_validation', 'learning_curve_sizes', default=5))
+
+        if self.report is not None:
+            for title, chart, kwargs in charts:
+                self.report.add_chart(model_name, title, chart, kwargs)
+            if learning_curve:
+                # Opt-in: every train size refits every fold, on the folds the CV already used.
+                self.report.add_learning_curve(model_name, f"{model_name} - Learning Curve", result['model'].make_estimator(),
+                                               X, y, cv_results['folds'], sizes)
+                cv_results['fit_count'] += len(sizes) * len(cv_results['folds'])
+            self.report.add_text(model_name, "Cross-Validation Results", self._cv_summary(cv_results))
+            self.report.add_table(model_name, "Top 10 Important Features",
+                                  result['feature_importance'].head(10).set_index('feature'))
+        else:
+            # matplotlib and seaborn are imported with the first plot, not with this module.
+            from . import visualizations
+            for title, chart, kwargs in charts:
+                getattr(visualizations, chart)(**kwargs)
+            if learning_curve:
+                # Opt-in: every train size refits every fold, on the folds the CV already used.
+                from sklearn.model_selection import learning_curve
+                train_sizes, train_scores, test_scores = learning_curve(
+                    result['model'].make_estimator(), X, y, cv=cv_results['folds'],
+                    n_jobs=self.config.get_nested('cross_validation', 'n_jobs'), train_sizes=sizes)
+                cv_results['fit_count'] += len(train_sizes) * len(cv_results['folds'])
+                visualizations.plot_learning_curve(train_sizes, train_scores, test_scores,
+                                                   title=f"{model_name} - Learning Curve")
+
         print(f"\n--- {model_name} Cross-Validation Results ---")
-        print(f"Mean CV Score: {cv_results['cv_mean_score']:.4f} (+/- {cv_results['cv_std_score']:.4f})")
-        print("\nClassification Report:")
-        print(cv_results['cv_report'])
-        print("\nConfusion Matrix:")
-        print(cv_results['cv_confusion_matrix'])
+        print(self._cv_summary(cv_results))
+
+    def _charts(self, model_name, y):
+        result = self.results[model_name]
+        importance_plot = self.config.get_nested('visualization', 'feature_importance_plot', default={})
+        charts = [
+            ("Feature Importance", 'plot_feature_importance',
+             {'feature_importance': result['feature_importance'], 'title': f"{model_name} - Feature Importance",
+              'figsize': tuple(importance_plot.get('figsize', (12, 6))), 'rotation': importance_plot.get('rotation', 45)}),
+            ("Confusion Matrix", 'plot_confusion_matrix',
+             {'y_true': y, 'y_pred': result['predictions'], 'classes': ['0', '1'], 'title': f"{model_name} - Confusion Matrix"}),
+        ]
+        if result['probabilities'] is not None:
+            charts += [
+                ("ROC Curve", 'plot_roc_curve',
+                 {'y_true': y, 'y_pred_proba': result['probabilities'], 'title': f"{model_name} - ROC Curve"}),
+                ("Precision-Recall Curve", 'plot_precision_recall_curve',
+                 {'y_true': y, 'y_pred_proba': result['probabilities'], 'title': f"{model_name} - Precision-Recall Curve"}),
+            ]
+        return charts
+
+    def _cv_summary(self, cv_results):
+        return (f"Mean CV Score: {cv_results['cv_mean_score']:.4f} (+/- {cv_results['cv_std_score']:.4f})\n"
+                f"Model fits for evaluation: {cv_results['fit_count']}\n"
+                f"\nClassification Report:\n{cv_results['cv_report']}\n"
+                f"\nConfusion Matrix:\n{cv_results['cv_confusion_matrix']}")
 
     def plot_model_comparison(self, metric='cv_mean_score'):
         model_names = list(self.results.keys())
         scores = [result['cv_results'][metric] for result in self.results.values()]
-        plot_model_comparison(model_names, scores, f'Cross-Validated {metric.replace("_", " ").title()}')
+        kwargs = {'model_names': model_names, 'scores': scores,
+                  'metric': f'Cross-Validated {metric.replace("_", " ").title()}'}
+        if self.report is not None:
+            self.report.add_chart("Model Comparison", "Model Comparison", 'plot_model_comparison', kwargs)
+            self.report.add_table("Model Comparison", "Cross-Validation Scores", pd.DataFrame(
+                {'cv_mean_score': [result['cv_results']['cv_mean_score'] for result in self.results.values()],
+                 'cv_std_score': [result['cv_results']['cv_std_score'] for result in self.results.values()],
+                 'fit_count': [result['cv_results']['fit_count'] for result in self.results.values()]},
+                index=pd.Index(model_names, name='model')))
+        else:
+            from .visualizations import plot_model_comparison
+            plot_model_comparison(**kwargs)
 
     def print_summary(self):
         for model_name, result in self.results.items():
@@ -56,18 +115,8 @@ class ResultsManager:
             cv_results = result['cv_results']
             print(f"Mean CV Score: {cv_results['cv_mean_score']:.4f} (+/- {cv_results['cv_std_score']:.4f})")
 
-
-
-
-    def plot_model_comparison(self, metric='accuracy'):
-        model_names = list(self.results.keys())
-        scores = [result['model'].score(metric) for result in self.results.values()]
-        plot_model_comparison(model_names, scores, metric)
-
-    def print_summary(self):
-        for model_name, result in self.results.items():
-            print(f"\n--- {model_name} Summary ---")
-            print("Top 10 Important Features:")
-            print(result['feature_importance'].head(10))
-            print("\nModel Performance:")
-            print(result['model'].performance_report())
+    def write_report(self):
+        """Wait for the headless charts and write the HTML report; None in interactive mode."""
+        if self.report is None:
+            return None
+        return self.report.write()
@@ -2,3 +2,123 @@
 
 import pytest
 
+
+import subprocess
+import sys
+from pathlib import Path
+
+from utils.plugins import PluginRegistry
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def test_plugin_registry_imports_targets_on_first_lookup():
+    registry = PluginRegistry('widget', 'optimal_options.tests', {'fraction': 'fractions:Fraction'})
+
+    @registry.register('dict')
+    class Widget(dict):
+        pass
+
+    assert not registry.is_loaded('fraction')
+    assert registry.get('fraction')(1, 2) == 0.5
+    assert registry.is_loaded('fraction') and registry.get('dict') is Widget
+    assert set(registry.names()) == {'fraction', 'dict'}
+    with pytest.raises(ValueError, match="Unknown widget: missing"):
+        registry.get('missing')
+
+
+def test_tree_models_and_reporting_do_not_import_heavy_backends():
+    probe = ("import sys, main; from models.model_factory import ModelFactory; "
+             "ModelFactory.create_model('RandomForestClassifier', None, None, {}); "
+             "print([name for name in ('tensorflow', 'matplotlib', 'plotly') if name in sys.modules])")
+    output = subprocess.run([sys.executable, '-c', probe], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    assert output.strip().splitlines()[-1] == '[]'
+
+
+def test_headless_results_render_into_one_html_report(tmp_path):
+    from sklearn.datasets import make_classification
+    import pandas as pd
+    from models.random_forest_model import RandomForestModel
+    from utils.config_manager import ConfigManager
+    from utils.results_manager import ResultsManager
+
+    config_path = tmp_path / 'config.yaml'
+    config_path.write_text(f"reporting:\n  mode: headless\n  directory: {tmp_path / 'report'}\n  max_workers: 2\n"
+                           "cross_validation:\n  learning_curve: true\n  learning_curve_sizes: 2\n")
+    X, y = make_classification(n_samples=120, n_features=4, random_state=0)
+    X = pd.DataFrame(X, columns=['a', 'b', 'c', 'd'])
+    model = RandomForestModel(X, y, {'n_estimators': 5, 'random_state': 0})
+    model.train()
+
+    results_manager = ResultsManager(ConfigManager(config_path))
+    results_manager.add_results('RandomForest', model, X, y, model.cross_validate(cv=3))
+    results_manager.plot_model_comparison()
+    report = results_manager.write_report().read_text()
+
+    # Four model charts, the learning curve and the comparison, all inlined.
+    assert report.count('src="data:image/png;base64,') == 6
+    assert 'Rendering failed' not in report and 'Classification Report' in report
+    assert len(list((tmp_path / 'report').glob('*.png'))) == 6
+    assert results_manager.results['RandomForest']['cv_results']['fit_count'] == 3 + 2 * 3
+
+
+def test_instrumentation_nests_spans_and_exports_trace_and_metrics(tmp_path):
+    import json
+    from utils.instrumentation import Instrumentation
+
+    instrumentation = Instrumentation(enabled=True, directory=tmp_path, rss_interval=0.001)
+    with instrumentation.span('process_data'):
+        for ticker in ('AAPL', 'MSFT'):
+            with instrumentation.span('fetch', ticker=ticker):
+                instrumentation.count('network_calls', 2, endpoint='history')
+    instrumentation.record('model.fit', 0.5, model='rf')
+    instrumentation.record('model.cv', 1234.5678, peak_rss=1_234_567_890, model='rf')
+    instrumentation.write()
+
+    trace = json.loads((tmp_path / 'trace.json').read_text())
+    spans = {(event['name'], event['args'].get('ticker')): event['args'] for event in trace['traceEvents']}
+    parent = spans[('process_data', None)]['id']
+    assert spans[('fetch', 'AAPL')]['parent'] == parent and spans[('fetch', 'MSFT')]['parent'] == parent
+    assert spans[('process_data', None)]['peak_rss_mb'] > 0
+    assert trace['otherData']['counters'] == [{'name': 'network_calls', 'labels': {'endpoint': 'history'}, 'value': 4}]
+
+    metrics = (tmp_path / 'metrics.prom').read_text()
+    # Tickers stay in the trace; the Prometheus series are per span name and low-cardinality labels.
+    assert 'optimal_options_span_total{span="fetch"} 2.0' in metrics
+    assert 'optimal_options_span_seconds_total{span="model.fit",model="rf"} 0.5' in metrics
+    assert 'optimal_options_network_calls_total{endpoint="history"} 4.0' in metrics
+    # Samples are written exactly, not rounded to a few significant digits.
+    assert 'optimal_options_span_seconds_total{span="model.cv",model="rf"} 1234.5678' in metrics
+    assert 'optimal_options_span_peak_rss_bytes{span="model.cv",model="rf"} 1234567890.0' in metrics
+
+
+@pytest.mark.parametrize('mode, suffix', [('cprofile', 'prof'), ('sample', 'folded')])
+def test_instrumentation_profiles_the_chosen_stage(tmp_path, mode, suffix):
+    import time
+    from utils.instrumentation import Instrumentation
+
+    instrumentation = Instrumentation(enabled=True, directory=tmp_path, profile_stage='features',
+                                      profile_mode=mode, profile_interval=0.001)
+    with instrumentation.span('fetch'):
+        pass
+    with instrumentation.span('features'):
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            sum(range(1000))
+    instrumentation.write()
+
+    profiles = list(tmp_path.glob(f"features.*.{suffix}"))
+    assert len(profiles) == 1 and profiles[0].stat().st_size > 0
+    assert not list(tmp_path.glob('fetch.*'))
+
+
+def test_lazy_log_arguments_are_only_computed_when_emitted():
+    import logging
+    from utils.logger import LazyText
+
+    calls = []
+    logger = logging.getLogger('lazy-text-test')
+    logger.setLevel(logging.INFO)
+    logger.debug("Counts: %s", LazyText(lambda: calls.append('debug')))
+    assert calls == []
+    assert str(LazyText(lambda: 'value')) == 'value'
@@ -1,11 +1,17 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
-import plotly.graph_objs as go
-from plotly.subplots import make_subplots
 from sklearn.metrics import roc_curve, auc, precision_recall_curve, confusion_matrix
 import numpy as np
 
-def plot_feature_importance(feature_importance, title="Feature Importance", figsize=(12, 6), rotation=45):
+def _finish(save_path):
+    # With a save_path the chart goes to a file (headless reporting), otherwise to the screen.
+    if save_path is None:
+        plt.show()
+    else:
+        plt.savefig(save_path, dpi=100)
+        plt.close()
+
+def plot_feature_importance(feature_importance, title="Feature Importance", figsize=(12, 6), rotation=45, save_path=None):
     plt.figure(figsize=figsize)
     sns.barplot(x='feature', y='importance', data=feature_importance)
     plt.title(title)
@@ -13,9 +19,9 @@ def plot_feature_importance(feature_importance, title="Feature Importance", figs
     plt.ylabel('Importance')
     plt.xticks(rotation=rotation)
     plt.tight_layout()
-    plt.show()
+    _finish(save_path)
 
-def plot_confusion_matrix(y_true, y_pred, classes, title="Confusion Matrix", cmap=plt.cm.Blues):
+def plot_confusion_matrix(y_true, y_pred, classes, title="Confusion Matrix", cmap=plt.cm.Blues, save_path=None):
     cm = confusion_matrix(y_true, y_pred)
     plt.figure(figsize=(8, 6))
     sns.heatmap(cm, annot=True, fmt='d', cmap=cmap, xticklabels=classes, yticklabels=classes)
@@ -23,9 +29,9 @@ def plot_confusion_matrix(y_true, y_pred, classes, title="Confusion Matrix", cma
     plt.ylabel('True label')
     plt.xlabel('Predicted label')
     plt.tight_layout()
-    plt.show()
+    _finish(save_path)
 
-def plot_roc_curve(y_true, y_pred_proba, title="Receiver Operating Characteristic (ROC) Curve"):
+def plot_roc_curve(y_true, y_pred_proba, title="Receiver Operating Characteristic (ROC) Curve", save_path=None):
     fpr, tpr, _ = roc_curve(y_true, y_pred_proba)
     roc_auc = auc(fpr, tpr)
 
@@ -38,9 +44,9 @@ def plot_roc_curve(y_true, y_pred_proba, title="Receiver Operating Characteristi
     plt.ylabel('True Positive Rate')
     plt.title(title)
     plt.legend(loc="lower right")
-    plt.show()
+    _finish(save_path)
 
-def plot_precision_recall_curve(y_true, y_pred_proba, title="Precision-Recall Curve"):
+def plot_precision_recall_curve(y_true, y_pred_proba, title="Precision-Recall Curve", save_path=None):
     precision, recall, _ = precision_recall_curve(y_true, y_pred_proba)
 
     plt.figure(figsize=(8, 6))
@@ -48,9 +54,9 @@ def plot_precision_recall_curve(y_true, y_pred_proba, title="Precision-Recall Cu
     plt.xlabel('Recall')
     plt.ylabel('Precision')
     plt.title(title)
-    plt.show()
+    _finish(save_path)
 
-def plot_learning_curve(train_sizes, train_scores, test_scores, title="Learning Curve"):
+def plot_learning_curve(train_sizes, train_scores, test_scores, title="Learning Curve", save_path=None):
     train_mean = np.mean(train_scores, axis=1)
     train_std = np.std(train_scores, axis=1)
     test_mean = np.mean(test_scores, axis=1)
@@ -65,9 +71,9 @@ def plot_learning_curve(train_sizes, train_scores, test_scores, title="Learning
     plt.ylabel('Score')
     plt.title(title)
     plt.legend(loc='lower right')
-    plt.show()
+    _finish(save_path)
 
-def plot_model_comparison(model_names, scores, metric='Accuracy'):
+def plot_model_comparison(model_names, scores, metric='Accuracy', save_path=None):
     plt.figure(figsize=(10, 6))
     sns.barplot(x=model_names, y=scores)
     plt.title(f'Model Comparison - {metric}')
@@ -75,4 +81,4 @@ def plot_model_comparison(model_names, scores, metric='Accuracy'):
     plt.ylabel(metric)
     plt.xticks(rotation=45)
     plt.tight_layout()
-    plt.show()
+    _finish(save_path)